@@ -18,6 +18,9 @@ from browser_use.agent.views import AgentHistoryList as AgentHistoryList
 from browser_use.browser.browser import Browser as Browser
 from browser_use.browser.browser import BrowserConfig as BrowserConfig
 from browser_use.browser.context import BrowserContextConfig
+from browser_use.browser.daemon import BrowserDaemon as BrowserDaemon
+from browser_use.browser.pool import BrowserContextPool as BrowserContextPool
+from browser_use.browser.shards import ShardedBrowser as ShardedBrowser
 from browser_use.controller.service import Controller as Controller
 from browser_use.dom.service import DomService as DomService
 
@@ -32,4 +35,7 @@ __all__ = [
 	'ActionModel',
 	'AgentHistoryList',
 	'BrowserContextConfig',
+	'BrowserContextPool',
+	'BrowserDaemon',
+	'ShardedBrowser',
 ]
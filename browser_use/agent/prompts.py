@@ -73,7 +73,7 @@ class AgentMessagePrompt:
 		self.step_info = step_info
 
 	def get_user_message(self, use_vision: bool = True) -> HumanMessage:
-		elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
+		elements_text = self.state.clickable_elements_to_string(include_attributes=self.include_attributes)
 
 		has_content_above = (self.state.pixels_above or 0) > 0
 		has_content_below = (self.state.pixels_below or 0) > 0
@@ -91,6 +91,16 @@ class AgentMessagePrompt:
 				)
 			else:
 				elements_text = f'{elements_text}\n[End of page]'
+			truncation = self.state.truncation
+			if truncation is not None and truncation.is_truncated:
+				# the elements skipped by buildDomTree.js are not counted
+				dropped_elements = (
+					'interactive elements' if truncation.walk_stopped else f'{truncation.dropped_elements} interactive elements'
+				)
+				elements_text = (
+					f'{elements_text}\n... page too large, {dropped_elements} further from the viewport '
+					'are not shown - scroll or extract content to see more ...'
+				)
 		else:
 			elements_text = 'empty page'
 
@@ -122,14 +132,16 @@ Interactive elements from top layer of the current page inside the viewport:
 					error = result.error.split('\n')[-1]
 					state_description += f'\nAction error {i + 1}/{len(self.result)}: ...{error}'
 
-		if self.state.screenshot and use_vision is True:
+		if use_vision is True and self.state.screenshot:
 			# Format message for vision model
 			return HumanMessage(
 				content=[
 					{'type': 'text', 'text': state_description},
 					{
 						'type': 'image_url',
-						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},  # , 'detail': 'low'
+						'image_url': {
+							'url': f'data:{self.state.screenshot_mime_type};base64,{self.state.screenshot}'
+						},  # , 'detail': 'low'
 					},
 				]
 			)
@@ -1136,6 +1136,7 @@ class Agent(Generic[Context]):
 		max_retries: int = 3,
 		skip_failures: bool = True,
 		delay_between_actions: float = 2.0,
+		fuzzy_element_matching: bool = False,
 	) -> list[ActionResult]:
 		"""
 		Rerun a saved history of actions with error handling and retry logic.
@@ -1145,6 +1146,7 @@ class Agent(Generic[Context]):
 				max_retries: Maximum number of retries per action
 				skip_failures: Whether to skip failed actions or stop execution
 				delay_between_actions: Delay between actions in seconds
+				fuzzy_element_matching: If an element is not found exactly, use the only element matching two of its branch path, attributes and xpath
 
 		Returns:
 				List of action results
@@ -1172,7 +1174,7 @@ class Agent(Generic[Context]):
 			retry_count = 0
 			while retry_count < max_retries:
 				try:
-					result = await self._execute_history_step(history_item, delay_between_actions)
+					result = await self._execute_history_step(history_item, delay_between_actions, fuzzy_element_matching)
 					results.extend(result)
 					break
 
@@ -1190,7 +1192,9 @@ class Agent(Generic[Context]):
 
 		return results
 
-	async def _execute_history_step(self, history_item: AgentHistory, delay: float) -> list[ActionResult]:
+	async def _execute_history_step(
+		self, history_item: AgentHistory, delay: float, fuzzy_element_matching: bool = False
+	) -> list[ActionResult]:
 		"""Execute a single step from history with element validation"""
 		state = await self.browser_context.get_state(cache_clickable_elements_hashes=False)
 		if not state or not history_item.model_output:
@@ -1201,6 +1205,7 @@ class Agent(Generic[Context]):
 				history_item.state.interacted_element[i],
 				action,
 				state,
+				fuzzy_element_matching,
 			)
 			updated_actions.append(updated_action)
 
@@ -1217,6 +1222,7 @@ class Agent(Generic[Context]):
 		historical_element: DOMHistoryElement | None,
 		action: ActionModel,  # Type this properly based on your action model
 		current_state: BrowserState,
+		fuzzy_element_matching: bool = False,
 	) -> ActionModel | None:
 		"""
 		Update action indices based on current page state.
@@ -1225,7 +1231,9 @@ class Agent(Generic[Context]):
 		if not historical_element or not current_state.element_tree:
 			return action
 
-		current_element = HistoryTreeProcessor.find_history_element_in_tree(historical_element, current_state.element_tree)
+		current_element = HistoryTreeProcessor.find_history_element_in_state(
+			historical_element, current_state, fuzzy=fuzzy_element_matching
+		)
 
 		if not current_element or current_element.highlight_index is None:
 			return None
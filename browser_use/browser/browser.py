@@ -31,6 +31,7 @@ from browser_use.browser.chrome import (
 	CHROME_HEADLESS_ARGS,
 )
 from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.daemon import BrowserDaemon
 from browser_use.browser.utils.screen_resolution import get_screen_resolution, get_window_adjustments
 from browser_use.utils import time_execution_async
 
@@ -90,6 +91,10 @@ class BrowserConfig(BaseModel):
 		keep_alive: False
 			Keep the browser alive after the agent has finished running
 
+		use_daemon: False
+			Attach to the local browser daemon shared by all processes (started on first use) instead of launching a browser,
+			see BrowserDaemon. The daemon keeps running after the browser is closed.
+
 		deterministic_rendering: False
 			Enable deterministic rendering (makes GPU/font rendering consistent across different OS's and docker)
 	"""
@@ -117,6 +122,7 @@ class BrowserConfig(BaseModel):
 	disable_security: bool = False  # disable_security=True is dangerous as any malicious URL visited could embed an iframe for the user's bank, and use their cookies to steal money
 	deterministic_rendering: bool = False
 	keep_alive: bool = Field(default=False, alias='_force_keep_browser_alive')  # used to be called _force_keep_browser_alive
+	use_daemon: bool = False
 
 	proxy: ProxySettings | None = None
 	new_context_config: BrowserContextConfig = Field(default_factory=BrowserContextConfig)
@@ -188,6 +194,25 @@ class Browser:
 		browser = await browser_class.connect(self.config.wss_url)
 		return browser
 
+	async def _setup_daemon_browser(self, playwright: Playwright) -> PlaywrightBrowser:
+		"""Connects to the local browser daemon, starting it if it is not running yet"""
+		assert self.config.browser_class == 'chromium', (
+			'use_daemon only supports chromium browsers (make sure browser_class=chromium)'
+		)
+
+		cdp_url = await BrowserDaemon().start(
+			headless=self.config.headless,
+			browser_binary_path=self.config.browser_binary_path,
+			extra_browser_args=self.config.extra_browser_args,
+			disable_security=self.config.disable_security,
+			deterministic_rendering=self.config.deterministic_rendering,
+		)
+		logger.info(f'🔌  Connecting to browser daemon via CDP {cdp_url}')
+		browser_class = getattr(playwright, self.config.browser_class)
+		# contexts are still created per Browser (cdp_url stays unset), so clients never share cookies or pages
+		browser = await browser_class.connect_over_cdp(cdp_url)
+		return browser
+
 	async def _setup_user_provided_browser(self, playwright: Playwright) -> PlaywrightBrowser:
 		"""Sets up and returns a Playwright Browser instance with anti-detection measures."""
 		if not self.config.browser_binary_path:
@@ -365,6 +390,8 @@ class Browser:
 				return await self._setup_remote_cdp_browser(playwright)
 			if self.config.wss_url:
 				return await self._setup_remote_wss_browser(playwright)
+			if self.config.use_daemon:
+				return await self._setup_daemon_browser(playwright)
 
 			if self.config.headless:
 				logger.warning('⚠️ Headless mode is not recommended. Many sites will detect and block all headless browsers.')
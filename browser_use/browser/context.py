@@ -4,6 +4,7 @@ Playwright browser on steroids.
 
 import asyncio
 import base64
+import contextlib
 import gc
 import json
 import logging
@@ -11,8 +12,10 @@ import os
 import re
 import time
 import uuid
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Literal
+from urllib.parse import urlparse
 
 import anyio
 from playwright._impl._errors import TimeoutError
@@ -24,18 +27,37 @@ from playwright.async_api import (
 	ElementHandle,
 	FrameLocator,
 	Page,
+	Route,
 )
-from pydantic import BaseModel, ConfigDict, Field
-
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from browser_use.browser.utils.highlights import can_draw_highlights, draw_highlights
+from browser_use.browser.utils.network_idle import NetworkIdleTracker, RequestClassifier
+from browser_use.browser.utils.resource_blocking import (
+	ResourceBlocker,
+	ResourceBlockingConfig,
+	ResourceBlockingPreset,
+	ResourceBlockingStats,
+)
+from browser_use.browser.utils.settle_timing import AdaptiveSettleTimer, SettleSample, SettleTimings
 from browser_use.browser.views import (
+	SCREENSHOT_MIME_TYPES,
 	BrowserError,
 	BrowserState,
+	ScreenshotFormat,
 	TabInfo,
 	URLNotAllowedError,
 )
 from browser_use.dom.clickable_element_processor.service import ClickableElementProcessor
 from browser_use.dom.service import DomService
-from browser_use.dom.views import DOMElementNode, SelectorMap
+from browser_use.dom.views import (
+	DOMBudget,
+	DOMElementNode,
+	DOMExtractionEngine,
+	DOMSerializationCache,
+	IncrementalDOMCache,
+	SelectorMap,
+)
 from browser_use.utils import time_execution_async, time_execution_sync
 
 if TYPE_CHECKING:
@@ -53,6 +75,64 @@ BROWSER_NAVBAR_HEIGHT = {
 
 _GLOB_WARNING_SHOWN = False
 
+# Cheap change fingerprint of a frame, see BrowserContextConfig.reuse_unchanged_state.
+# The first call installs a tracker on the window that counts DOM mutations (except our own highlight overlays)
+# and input/scroll/hover/resize events, it disappears with the document on navigation.
+PAGE_CHANGE_FINGERPRINT_JS = """() => {
+	let tracker = window._browserUsePageChangeTracker;
+	if (!tracker) {
+		const isHighlightNode = (n) => n && (n.id === 'playwright-highlight-container' || n.className === 'playwright-highlight-label');
+		const isOwnHighlightMutation = (record) => {
+			if (record.type === 'attributes' && record.attributeName === 'browser-user-highlight-id') return true;
+			const container = document.getElementById('playwright-highlight-container');
+			if (container && (record.target === container || container.contains(record.target))) return true;
+			if (record.type === 'childList') {
+				const touched = [...record.addedNodes, ...record.removedNodes];
+				return touched.length > 0 && touched.every(isHighlightNode);
+			}
+			return false;
+		};
+		tracker = { changes: 0, lastChange: Date.now(), focusIds: new WeakMap(), nextFocusId: 1 };
+		tracker.countMutations = (records) => {
+			if (records.some((record) => !isOwnHighlightMutation(record))) {
+				tracker.changes++;
+				tracker.lastChange = Date.now();
+			}
+		};
+		tracker.observer = new MutationObserver(tracker.countMutations);
+		tracker.observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+		const countChange = () => {
+			tracker.changes++;
+			tracker.lastChange = Date.now();
+		};
+		for (const type of ['input', 'change', 'scroll', 'mouseover']) {
+			document.addEventListener(type, countChange, { capture: true, passive: true });
+		}
+		window.addEventListener('resize', countChange, { passive: true });
+		window._browserUsePageChangeTracker = tracker;
+	}
+	// mutation records are delivered asynchronously, count the pending ones now
+	tracker.countMutations(tracker.observer.takeRecords());
+
+	const active = document.activeElement;
+	let focusId = 0;
+	if (active && active !== document.body) {
+		focusId = tracker.focusIds.get(active);
+		if (!focusId) {
+			focusId = tracker.nextFocusId++;
+			tracker.focusIds.set(active, focusId);
+		}
+	}
+	return [location.href, document.title, tracker.changes, window.scrollX, window.scrollY,
+		window.innerWidth, window.innerHeight, focusId].join('|');
+}"""
+
+# Milliseconds since the last change counted by the tracker above, null if it is not installed in the page (yet)
+PAGE_QUIET_TIME_JS = """() => {
+	const tracker = window._browserUsePageChangeTracker;
+	return tracker ? Date.now() - tracker.lastChange : null;
+}"""
+
 
 class BrowserContextConfig(BaseModel):
 	"""
@@ -75,6 +155,28 @@ class BrowserContextConfig(BaseModel):
 	    maximum_wait_page_load_time: 5.0
 	        Maximum time to wait for page load before proceeding anyway
 
+	    adaptive_settle_timing: False
+	        Learn per domain how long pages take to settle (network idle and DOM changes) and use the
+	        settle_timing_percentile of the observed times for the minimum and network idle waits instead of the static
+	        waits above, which remain the fallback for unknown domains and the upper bound of every wait.
+	        maximum_wait_page_load_time is always used as is.
+
+	    settle_timing_percentile: 0.9
+	        Percentile of the observed settle times to wait for, higher is safer but slower.
+
+	    settle_timing_file: None
+	        Path to persist the learned settle timings between runs.
+
+	    ignored_network_url_patterns: []
+	        Extra case-insensitive URL substrings (on top of the built-in analytics, ads, chat widget... patterns)
+	        of requests that are not waited for before getting the page state, e.g. ['/api/poll', 'sentry.io']
+
+	    resource_blocking: None
+	        Block (or answer with an empty stub) requests the agent does not need, by resource type, domain and URL pattern,
+	        so that pages settle sooner and use less bandwidth. Either a preset: 'agent-fast' (no images, media, fonts or
+	        trackers, for agents without vision) or 'vision-safe' (no media or trackers), or a ResourceBlockingConfig.
+	        Routing every request disables the browser's HTTP cache for the context.
+
 	    wait_between_actions: 1.0
 	        Time to wait between multiple per step actions
 
@@ -92,6 +194,29 @@ class BrowserContextConfig(BaseModel):
 	    save_downloads_path: None
 	        Path to save downloads to
 
+	    save_har_path: None
+	        Path to save a HAR of all the traffic of the context to when it is closed, for inspecting a run (Playwright's
+	        record_har_path). Cannot be combined with har_mode='record', which records a HAR meant to be replayed instead.
+
+	    har_mode: None
+	        'record' captures the traffic of the context into har_path. The HAR is written when the context is closed, so
+	        not with keep_alive. 'replay' serves every request from har_path instead of the network, for reproducible
+	        offline runs (benchmarks, CI) that measure the agent without the variance of live sites.
+
+	    har_path: None
+	        HAR file to record to / replay from. With har_content='attach' the response bodies are stored as separate files
+	        named by the sha1 hash of their content (inside the archive for a .zip path), so identical bodies are stored once.
+
+	    har_content: 'attach'
+	        'attach' stores the recorded bodies in the content-addressed files described above, 'embed' inlines them in the HAR.
+
+	    har_not_found: 'abort'
+	        What happens in 'replay' mode to requests that are not in the HAR: 'abort' fails them, 'fallback' sends them to
+	        the network. Missed URLs are logged and counted in BrowserSession.har_misses.
+
+	    har_url_filter: None
+	        Glob pattern of the URLs to record or replay (e.g. '**/example.com/**'), other requests always use the network.
+
 	    trace_path: None
 	        Path to save trace files. It will auto name the file with the TRACE_PATH/{context_id}.zip
 
@@ -104,9 +229,63 @@ class BrowserContextConfig(BaseModel):
 	    highlight_elements: True
 	        Highlight elements in the DOM on the screen
 
+	    composite_highlights: False
+	        Draw the highlights onto the screenshot instead of injecting overlay elements into the page, so the page is never mutated.
+	        Requires Pillow ("pip install pillow"), without it the highlights are drawn in the page. With the 'cdp_snapshot'
+	        engine, which never draws into the page, this is the only way to get highlights on the screenshot.
+
+	    screenshot_format: 'png'
+	        Image format of the screenshot of every state: 'png', 'jpeg', 'webp' (Chromium only) or 'off' to take none,
+	        e.g. when the agent does not use vision. JPEG and WebP are much cheaper to encode and send than PNG.
+
+	    screenshot_quality: 80
+	        Quality (0-100) of JPEG and WebP screenshots.
+
+	    screenshot_scale: 'device'
+	        'css' captures one image pixel per CSS pixel instead of one per device pixel, which shrinks screenshots
+	        of high-DPI screens (e.g. 4x fewer pixels at a device scale factor of 2).
+
+	    cdp_screenshots: False
+	        Capture screenshots with the Chrome DevTools Page.captureScreenshot command (Chromium only), clipped to
+	        the visible viewport and with optimizeForSpeed, instead of Playwright's page.screenshot. Always used for WebP.
+
 	    viewport_expansion: 0
 	        Viewport expansion in pixels. This amount will increase the number of elements which are included in the state what the LLM will see. If set to -1, all elements will be included (this leads to high token usage). If set to 0, only the elements which are visible in the viewport will be included.
 
+	    incremental_dom_extraction: False
+	        Keep a resident agent in the page that tracks DOM mutations, scrolling and resizing between steps.
+	        Unchanged pages are not walked again and only changed nodes are sent back and patched into the previous tree.
+	        Style-only changes that do not touch the DOM (e.g. hover states, CSS animations) are not detected.
+
+	    columnar_dom_transfer: False
+	        Send the extracted DOM from the page as parallel arrays with an interned string table instead of one object per node.
+	        Shrinks the payload and the decoding time on large pages. Ignored when incremental_dom_extraction is enabled.
+
+	    dom_extraction_engine: 'js'
+	        How the DOM tree is extracted. 'js' evaluates buildDomTree.js in the page. 'cdp_snapshot' (Chromium only) builds it
+	        from one Chrome DevTools DOMSnapshot.captureSnapshot call, which also sees cross-origin iframes and closed shadow roots.
+	        With 'cdp_snapshot' no highlights are drawn in the page and the incremental/columnar options above are ignored.
+
+	    include_cross_origin_iframes: False
+	        Also extract the content of cross-origin iframes (payment forms, chat widgets, embedded forms...) with the 'js' engine.
+	        Every frame is extracted concurrently and stitched under its <iframe> element. Elements in these frames are not
+	        highlighted in the page, use composite_highlights to see them on the screenshot.
+
+	    max_dom_elements: None
+	    max_dom_nodes: None
+	    max_dom_text_chars: None
+	        Upper bounds for the extracted page (interactive elements, nodes, characters of text), None means unbounded.
+	        On giant pages (infinite feeds, huge tables) the tree is filled by priority instead: elements in the viewport first,
+	        then by distance from the viewport and by interactivity. The state reports what was left out (BrowserState.truncation).
+	        Once the 'js' engine holds max_dom_nodes nodes or max_dom_elements elements it stops walking the page outside of the viewport.
+
+	    reuse_unchanged_state: False
+	        Check a cheap in-page fingerprint (DOM mutations, input/scroll/hover events, URL, scroll position, focused element,
+	        open tabs) after waiting for the page to load. If nothing changed since the last state and no request is still in
+	        flight, e.g. after a wait or a failed action, the previous state is returned without extracting the DOM or taking
+	        a screenshot. Changes that do not touch the DOM (canvas, video, CSS-only animations) and changes inside shadow roots
+	        are not detected, so the previous state may be returned for them.
+
 	    allowed_domains: None
 	        List of allowed domains that can be accessed. If None, all domains are allowed.
 	        Example: ['example.com', 'api.example.com']
@@ -150,6 +329,11 @@ class BrowserContextConfig(BaseModel):
 	minimum_wait_page_load_time: float = 0.25
 	wait_for_network_idle_page_load_time: float = 0.5
 	maximum_wait_page_load_time: float = 5
+	adaptive_settle_timing: bool = False
+	settle_timing_percentile: float = 0.9
+	settle_timing_file: str | None = None
+	ignored_network_url_patterns: list[str] = Field(default_factory=list)
+	resource_blocking: ResourceBlockingPreset | ResourceBlockingConfig | None = None
 	wait_between_actions: float = 0.5
 
 	disable_security: bool = False  # disable_security=True is dangerous as any malicious URL visited could embed an iframe for the user's bank, and use their cookies to steal money
@@ -161,12 +345,30 @@ class BrowserContextConfig(BaseModel):
 	save_recording_path: str | None = None
 	save_downloads_path: str | None = None
 	save_har_path: str | None = None
+	har_mode: Literal['record', 'replay'] | None = None
+	har_path: str | None = None
+	har_content: Literal['attach', 'embed'] = 'attach'
+	har_not_found: Literal['abort', 'fallback'] = 'abort'
+	har_url_filter: str | None = None
 	trace_path: str | None = None
 	locale: str | None = None
 	user_agent: str | None = None
 
 	highlight_elements: bool = True
+	composite_highlights: bool = False
+	screenshot_format: ScreenshotFormat = 'png'
+	screenshot_quality: int = 80
+	screenshot_scale: Literal['css', 'device'] = 'device'
+	cdp_screenshots: bool = False
 	viewport_expansion: int = 0
+	incremental_dom_extraction: bool = False
+	columnar_dom_transfer: bool = False
+	dom_extraction_engine: DOMExtractionEngine = 'js'
+	include_cross_origin_iframes: bool = False
+	max_dom_elements: int | None = None
+	max_dom_nodes: int | None = None
+	max_dom_text_chars: int | None = None
+	reuse_unchanged_state: bool = False
 	allowed_domains: list[str] | None = None
 	include_dynamic_attributes: bool = True
 	http_credentials: dict[str, str] | None = None
@@ -185,6 +387,13 @@ class BrowserContextConfig(BaseModel):
 
 	force_new_context: bool = False
 
+	@model_validator(mode='after')
+	def validate_har_recording(self) -> 'BrowserContextConfig':
+		# both would make playwright write a HAR of the context when it is closed, possibly to the same file
+		if self.har_mode == 'record' and self.save_har_path:
+			raise ValueError("save_har_path and har_mode='record' both record a HAR, use only one of them")
+		return self
+
 
 @dataclass
 class CachedStateClickableElementsHashes:
@@ -202,6 +411,15 @@ class BrowserSession:
 		self.cached_state = cached_state
 
 		self.cached_state_clickable_elements_hashes: CachedStateClickableElementsHashes | None = None
+		self.incremental_dom_cache: IncrementalDOMCache | None = None
+		self.dom_serialization_cache = DOMSerializationCache()
+		self.request_classifier = RequestClassifier()
+		self.network_idle_trackers: dict[Page, NetworkIdleTracker] = {}
+		self.resource_blocker: ResourceBlocker | None = None
+		# url -> number of requests replay found no HAR entry for, see har_mode
+		self.har_misses: Counter[str] = Counter()
+		# change fingerprint of the page taken right before cached_state was extracted, see reuse_unchanged_state
+		self.cached_state_fingerprint: str | None = None
 
 
 @dataclass
@@ -234,6 +452,20 @@ class BrowserContext:
 		self.agent_current_page: Page | None = None  # The tab the agent intends to interact with
 		self.human_current_page: Page | None = None  # The tab currently shown in the browser UI
 
+		self.settle_timer = (
+			AdaptiveSettleTimer(percentile=self.config.settle_timing_percentile) if self.config.adaptive_settle_timing else None
+		)
+
+		# set for the contexts of a BrowserContextPool, the cookies of one user must not reach the next one through the file
+		self.read_only_cookies_file = False
+
+		self.composite_highlights = self.config.highlight_elements and self.config.composite_highlights
+		if self.composite_highlights and not can_draw_highlights():
+			logger.warning(
+				'⚠️  Pillow is required for composite_highlights, highlighting in the page instead (pip install pillow)'
+			)
+			self.composite_highlights = False
+
 	async def __aenter__(self):
 		"""Async context manager entry"""
 		await self._initialize_session()
@@ -261,6 +493,13 @@ class BrowserContext:
 				self._page_event_handler = None
 
 			await self.save_cookies()
+			if self.session.har_misses:
+				logger.info(
+					f'📼  HAR replay missed {sum(self.session.har_misses.values())} requests to '
+					f'{len(self.session.har_misses)} URLs, e.g. {list(self.session.har_misses)[:3]}'
+				)
+			if self.settle_timer and self.config.settle_timing_file:
+				await self.settle_timer.save(self.config.settle_timing_file)
 
 			if self.config.trace_path:
 				try:
@@ -319,6 +558,22 @@ class BrowserContext:
 			cached_state=None,
 		)
 
+		if self.settle_timer and self.config.settle_timing_file:
+			await self.settle_timer.load(self.config.settle_timing_file)
+
+		# track the requests of every page from its creation on, see _wait_for_stable_network
+		self.session.request_classifier = RequestClassifier(self.config.ignored_network_url_patterns)
+		context.on('page', self._add_network_idle_tracker)
+		for page in pages:
+			self._add_network_idle_tracker(page)
+
+		# route handlers run in reverse order of registration: resource blocking, then the HAR, then the HAR misses
+		if self.config.har_mode:
+			await self._setup_har_routing(context)
+		if self.config.resource_blocking:
+			self.session.resource_blocker = ResourceBlocker.from_config(self.config.resource_blocking)
+			await context.route('**/*', self.session.resource_blocker.handle_route)
+
 		current_page = None
 		if self.browser.config.cdp_url:
 			# If we have a saved target ID, try to find and activate it
@@ -376,6 +631,44 @@ class BrowserContext:
 
 		return self.session
 
+	async def _setup_har_routing(self, context: PlaywrightBrowserContext) -> None:
+		"""Record the traffic of the context into har_path, or serve the requests from it, see har_mode"""
+		har_path = self.config.har_path
+		if not har_path:
+			raise ValueError(f"har_mode='{self.config.har_mode}' requires a har_path")
+
+		if self.config.har_mode == 'record':
+			logger.info(f'📼  Recording network traffic to {har_path}')
+			await context.route_from_har(
+				har_path,
+				update=True,
+				update_content=self.config.har_content,
+				update_mode='minimal',
+				url=self.config.har_url_filter,
+			)
+			return
+
+		if not await anyio.Path(har_path).exists():
+			raise FileNotFoundError(f'No HAR to replay at {har_path}, record one with har_mode="record" first')
+		logger.info(f'📼  Replaying network traffic from {har_path}')
+		# only reached by the requests route_from_har has no entry for
+		await context.route(self.config.har_url_filter or '**/*', self._handle_har_miss)
+		await context.route_from_har(har_path, not_found='fallback', url=self.config.har_url_filter)
+
+	async def _handle_har_miss(self, route: Route) -> None:
+		request = route.request
+		if self.session is not None:
+			self.session.har_misses[request.url] += 1
+		logger.debug(f'📼  Not in the HAR: {request.method} {request.url}')
+		try:
+			if self.config.har_not_found == 'fallback':
+				await route.fallback()
+			else:
+				await route.abort()
+		except Exception as e:
+			# the page or context was closed while the request was intercepted
+			logger.debug(f'Failed to handle HAR miss for {request.url}: {type(e).__name__}: {e}')
+
 	async def _add_tab_foregrounding_listener(self, page: Page):
 		"""
 		Attaches listeners that detect when the human steals active tab focus away from the agent.
@@ -589,7 +882,12 @@ class BrowserContext:
 			if context.pages and not self.browser.config.headless:
 				for page in context.pages:
 					await self.set_viewport_size(page)
-		elif self.browser.config.browser_binary_path and len(browser.contexts) > 0 and not self.config.force_new_context:
+		elif (
+			self.browser.config.browser_binary_path
+			and not self.browser.config.use_daemon
+			and len(browser.contexts) > 0
+			and not self.config.force_new_context
+		):
 			# Connect to existing Chrome instance instead of creating new one
 			context = browser.contexts[0]
 			# For existing contexts, we need to set the viewport size manually
@@ -649,25 +947,7 @@ class BrowserContext:
 		if not self.browser.config.headless:
 			await self._resize_window(context)
 
-		# Load cookies if they exist
-		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
-			async with await anyio.open_file(self.config.cookies_file, 'r') as f:
-				try:
-					cookies = json.loads(await f.read())
-
-					valid_same_site_values = ['Strict', 'Lax', 'None']
-					for cookie in cookies:
-						if 'sameSite' in cookie:
-							if cookie['sameSite'] not in valid_same_site_values:
-								logger.warning(
-									f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}"
-								)
-								cookie['sameSite'] = 'None'
-					logger.info(f'🍪  Loaded {len(cookies)} cookies from {self.config.cookies_file}')
-					await context.add_cookies(cookies)
-
-				except json.JSONDecodeError as e:
-					logger.error(f'Failed to parse cookies file: {str(e)}')
+		await self._load_cookies(context)
 
 		init_script = """
 			// check to make sure we're not inside the PDF viewer
@@ -740,174 +1020,46 @@ class BrowserContext:
 		except Exception as e:
 			logger.debug(f'Failed to set viewport size for page: {e}')
 
-	async def _wait_for_stable_network(self):
+	async def _wait_for_stable_network(self, timings: SettleTimings | None = None):
+		timings = timings or self._get_settle_timings()
 		page = await self.get_agent_current_page()
+		tracker = await self._get_network_idle_tracker(page)
+		if await tracker.wait_for_idle(idle_time=timings.network_idle, timeout=timings.maximum_wait):
+			logger.debug(f'⚖️  Network stabilized for {timings.network_idle} seconds')
+		if tracker.filter_counts:
+			logger.debug(f'Requests not waited for, by filter: {dict(tracker.filter_counts.most_common(10))}')
+		if self.session and self.session.resource_blocker:
+			blocking_stats = self.session.resource_blocker.get_stats(page)
+			if blocking_stats.blocked_requests:
+				logger.debug(
+					f'Blocked {blocking_stats.blocked_requests} requests (~{blocking_stats.blocked_bytes // 1024} KB) so far: '
+					f'{dict(blocking_stats.reasons.most_common(10))}'
+				)
 
-		pending_requests = set()
-		last_activity = asyncio.get_event_loop().time()
-
-		# Define relevant resource types and content types
-		RELEVANT_RESOURCE_TYPES = {
-			'document',
-			'stylesheet',
-			'image',
-			'font',
-			'script',
-			'iframe',
-		}
-
-		RELEVANT_CONTENT_TYPES = {
-			'text/html',
-			'text/css',
-			'application/javascript',
-			'image/',
-			'font/',
-			'application/json',
-		}
-
-		# Additional patterns to filter out
-		IGNORED_URL_PATTERNS = {
-			# Analytics and tracking
-			'analytics',
-			'tracking',
-			'telemetry',
-			'beacon',
-			'metrics',
-			# Ad-related
-			'doubleclick',
-			'adsystem',
-			'adserver',
-			'advertising',
-			# Social media widgets
-			'facebook.com/plugins',
-			'platform.twitter',
-			'linkedin.com/embed',
-			# Live chat and support
-			'livechat',
-			'zendesk',
-			'intercom',
-			'crisp.chat',
-			'hotjar',
-			# Push notifications
-			'push-notifications',
-			'onesignal',
-			'pushwoosh',
-			# Background sync/heartbeat
-			'heartbeat',
-			'ping',
-			'alive',
-			# WebRTC and streaming
-			'webrtc',
-			'rtmp://',
-			'wss://',
-			# Common CDNs for dynamic content
-			'cloudfront.net',
-			'fastly.net',
-		}
-
-		async def on_request(request):
-			# Filter by resource type
-			if request.resource_type not in RELEVANT_RESOURCE_TYPES:
-				return
-
-			# Filter out streaming, websocket, and other real-time requests
-			if request.resource_type in {
-				'websocket',
-				'media',
-				'eventsource',
-				'manifest',
-				'other',
-			}:
-				return
-
-			# Filter out by URL patterns
-			url = request.url.lower()
-			if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
-				return
-
-			# Filter out data URLs and blob URLs
-			if url.startswith(('data:', 'blob:')):
-				return
-
-			# Filter out requests with certain headers
-			headers = request.headers
-			if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in [
-				'video',
-				'audio',
-			]:
-				return
-
-			nonlocal last_activity
-			pending_requests.add(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request started: {request.url} ({request.resource_type})')
-
-		async def on_response(response):
-			request = response.request
-			if request not in pending_requests:
-				return
-
-			# Filter by content type if available
-			content_type = response.headers.get('content-type', '').lower()
-
-			# Skip if content type indicates streaming or real-time data
-			if any(
-				t in content_type
-				for t in [
-					'streaming',
-					'video',
-					'audio',
-					'webm',
-					'mp4',
-					'event-stream',
-					'websocket',
-					'protobuf',
-				]
-			):
-				pending_requests.remove(request)
-				return
-
-			# Only process relevant content types
-			if not any(ct in content_type for ct in RELEVANT_CONTENT_TYPES):
-				pending_requests.remove(request)
-				return
-
-			# Skip if response is too large (likely not essential for page load)
-			content_length = response.headers.get('content-length')
-			if content_length and int(content_length) > 5 * 1024 * 1024:  # 5MB
-				pending_requests.remove(request)
-				return
-
-			nonlocal last_activity
-			pending_requests.remove(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request resolved: {request.url} ({content_type})')
-
-		# Attach event listeners
-		page.on('request', on_request)
-		page.on('response', on_response)
-
-		try:
-			# Wait for idle time
-			start_time = asyncio.get_event_loop().time()
-			while True:
-				await asyncio.sleep(0.1)
-				now = asyncio.get_event_loop().time()
-				if len(pending_requests) == 0 and (now - last_activity) >= self.config.wait_for_network_idle_page_load_time:
-					break
-				if now - start_time > self.config.maximum_wait_page_load_time:
-					logger.debug(
-						f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
-						f'pending requests: {[r.url for r in pending_requests]}'
-					)
-					break
-
-		finally:
-			# Clean up event listeners
-			page.remove_listener('request', on_request)
-			page.remove_listener('response', on_response)
+	async def get_resource_blocking_stats(self, page: Page | None = None) -> ResourceBlockingStats | None:
+		"""Requests blocked on the page (the current one by default) by resource_blocking, None if it is disabled"""
+		session = await self.get_session()
+		if session.resource_blocker is None:
+			return None
+		return session.resource_blocker.get_stats(page or await self.get_agent_current_page())
 
-		logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
+	async def _get_network_idle_tracker(self, page: Page) -> NetworkIdleTracker:
+		"""The tracker attached to the page when it was created, or a new one for pages we did not see being created"""
+		session = await self.get_session()
+		tracker = session.network_idle_trackers.get(page)
+		if tracker is None:
+			tracker = self._add_network_idle_tracker(page)
+		return tracker
+
+	def _add_network_idle_tracker(self, page: Page) -> NetworkIdleTracker:
+		"""Start tracking the in-flight requests of a page, called for every page of the context as soon as it exists"""
+		assert self.session is not None
+		trackers = self.session.network_idle_trackers
+		if page in trackers:
+			return trackers[page]
+		tracker = trackers[page] = NetworkIdleTracker(page, self.session.request_classifier).attach()
+		page.once('close', lambda page: trackers.pop(page, None))
+		return tracker
 
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
@@ -917,14 +1069,18 @@ class BrowserContext:
 		"""
 		# Start timing
 		start_time = time.time()
+		timings = self._get_settle_timings()
 
 		# Wait for page load
 		try:
-			await self._wait_for_stable_network()
+			page = await self.get_agent_current_page()
+			timings = self._get_settle_timings(page.url)
+			await self._wait_for_stable_network(timings)
 
 			# Check if the loaded URL is allowed
 			page = await self.get_agent_current_page()
 			await self._check_and_handle_navigation(page)
+			await self._record_settle_sample(page, time.time() - start_time)
 		except URLNotAllowedError as e:
 			raise e
 		except Exception:
@@ -933,7 +1089,7 @@ class BrowserContext:
 
 		# Calculate remaining time to meet minimum WAIT_TIME
 		elapsed = time.time() - start_time
-		remaining = max((timeout_overwrite or self.config.minimum_wait_page_load_time) - elapsed, 0)
+		remaining = max((timeout_overwrite or timings.minimum_wait) - elapsed, 0)
 
 		logger.debug(f'--Page loaded in {elapsed:.2f} seconds, waiting for additional {remaining:.2f} seconds')
 
@@ -941,6 +1097,42 @@ class BrowserContext:
 		if remaining > 0:
 			await asyncio.sleep(remaining)
 
+	def _get_settle_timings(self, url: str | None = None) -> SettleTimings:
+		"""The waits of the config, or the ones learned for the domain of `url` with adaptive_settle_timing"""
+		static = SettleTimings(
+			minimum_wait=self.config.minimum_wait_page_load_time,
+			network_idle=self.config.wait_for_network_idle_page_load_time,
+			maximum_wait=self.config.maximum_wait_page_load_time,
+		)
+		if self.settle_timer is None or url is None:
+			return static
+		return self.settle_timer.timings_for(url, static)
+
+	async def _record_settle_sample(self, page: Page, elapsed: float) -> None:
+		"""Teach the settle timer how long the page took to settle, see adaptive_settle_timing"""
+		session = await self.get_session()
+		tracker = session.network_idle_trackers.get(page)
+		if self.settle_timer is None or tracker is None or tracker.last_settle is None:
+			return
+
+		settle_time = tracker.last_settle.settle_time
+		try:
+			# the DOM may keep changing after the network went idle (rendering, hydration)
+			quiet_time = await page.evaluate(PAGE_QUIET_TIME_JS)
+		except Exception as e:
+			logger.debug(f'Failed to get the DOM quiet time: {type(e).__name__}: {e}')
+			quiet_time = None
+		dom_was_active = quiet_time is not None and quiet_time / 1000 < elapsed
+		if not tracker.last_wait_was_active and not dom_was_active:
+			# nothing happened since the last action, this says nothing about how long the pages of the domain take
+			return
+		if dom_was_active:
+			settle_time = max(settle_time, elapsed - quiet_time / 1000)
+
+		self.settle_timer.record(page.url, SettleSample(settle_time=settle_time, max_gap=tracker.last_settle.max_gap))
+		if self.config.settle_timing_file and self.settle_timer.unsaved_samples >= 20:
+			asyncio.create_task(self.settle_timer.save(self.config.settle_timing_file))
+
 	def _is_url_allowed(self, url: str) -> bool:
 		"""
 		Check if a URL is allowed based on the whitelist configuration.
@@ -1171,9 +1363,23 @@ class BrowserContext:
 		cache_clickable_elements_hashes: bool
 			If True, cache the clickable elements hashes for the current state. This is used to calculate which elements are new to the llm (from last message) -> reduces token usage.
 		"""
-		await self._wait_for_page_and_frames_load()
 		session = await self.get_session()
+		# wait first, the requests started by the last action (a submit, a click fetching data) may not have changed the DOM yet
+		await self._wait_for_page_and_frames_load()
+		# taken before the extraction, so that changes made while extracting invalidate the state
+		fingerprint = await self._get_page_fingerprint() if self.config.reuse_unchanged_state else None
+		if (
+			fingerprint is not None
+			and session.cached_state is not None
+			and fingerprint == session.cached_state_fingerprint
+			and not await self._has_pending_requests()
+		):
+			logger.debug('♻️  Page unchanged since the last state, reusing it')
+			return self._reuse_cached_state(session, cache_clickable_elements_hashes)
+
 		updated_state = await self._get_updated_state()
+		# _get_updated_state returns the previous state when the extraction fails
+		session.cached_state_fingerprint = fingerprint if updated_state is not session.cached_state else None
 
 		# Find out which elements are new
 		# Do this only if url has not changed
@@ -1183,28 +1389,64 @@ class BrowserContext:
 				session.cached_state_clickable_elements_hashes
 				and session.cached_state_clickable_elements_hashes.url == updated_state.url
 			):
-				# Pointers, feel free to edit in place
-				updated_state_clickable_elements = ClickableElementProcessor.get_clickable_elements(updated_state.element_tree)
+				previous_hashes = session.cached_state_clickable_elements_hashes.hashes
+			else:
+				previous_hashes = None
+
+			# Pointers, feel free to edit in place
+			hashes = set()
+			for dom_element in ClickableElementProcessor.iter_clickable_elements(updated_state.element_tree):
+				element_hash = ClickableElementProcessor.hash_dom_element(dom_element)
+				hashes.add(element_hash)
+				if previous_hashes is not None:
+					# see which elements are new from the last state where we cached the hashes
+					dom_element.is_new = element_hash not in previous_hashes
 
-				for dom_element in updated_state_clickable_elements:
-					dom_element.is_new = (
-						ClickableElementProcessor.hash_dom_element(dom_element)
-						not in session.cached_state_clickable_elements_hashes.hashes  # see which elements are new from the last state where we cached the hashes
-					)
 			# in any case, we need to cache the new hashes
 			session.cached_state_clickable_elements_hashes = CachedStateClickableElementsHashes(
-				url=updated_state.url,
-				hashes=ClickableElementProcessor.get_clickable_elements_hashes(updated_state.element_tree),
+				url=updated_state.url, hashes=hashes
 			)
 
 		session.cached_state = updated_state
 
 		# Save cookies if a file is specified
-		if self.config.cookies_file:
+		if self.config.cookies_file and not self.read_only_cookies_file:
 			asyncio.create_task(self.save_cookies())
 
 		return session.cached_state
 
+	async def _has_pending_requests(self) -> bool:
+		"""Whether the agent's page still waits for a request that is not hanging, see NetworkIdleTracker"""
+		page = await self.get_agent_current_page()
+		tracker = await self._get_network_idle_tracker(page)
+		return tracker.has_pending_requests(max_age=self.config.maximum_wait_page_load_time)
+
+	async def _get_page_fingerprint(self) -> str | None:
+		"""Change fingerprint of the agent's page, its frames and the open tabs, None if it could not be taken"""
+		session = await self.get_session()
+		try:
+			page = await self.get_agent_current_page()
+			frame_fingerprints = await asyncio.gather(*(frame.evaluate(PAGE_CHANGE_FINGERPRINT_JS) for frame in page.frames))
+		except Exception as e:
+			logger.debug(f'Failed to take the page fingerprint: {type(e).__name__}: {e}')
+			return None
+		pages = session.context.pages
+		return json.dumps([pages.index(page) if page in pages else -1, [p.url for p in pages], frame_fingerprints])
+
+	def _reuse_cached_state(self, session: BrowserSession, cache_clickable_elements_hashes: bool) -> BrowserState:
+		"""The cached state as a new state, for a page that did not change since it was extracted"""
+		assert session.cached_state is not None
+		if cache_clickable_elements_hashes and session.cached_state_clickable_elements_hashes:
+			# same elements as the last state, so none of them is new
+			for dom_element in ClickableElementProcessor.iter_clickable_elements(session.cached_state.element_tree):
+				dom_element.is_new = False
+
+		# a new object (the memoized fingerprint and element index of the old one may be stale), errors are per state
+		self.current_state = replace(session.cached_state, browser_errors=[])
+		self.current_state.serialization_cache = session.dom_serialization_cache
+		session.cached_state = self.current_state
+		return self.current_state
+
 	async def _get_updated_state(self, focus_element: int = -1) -> BrowserState:
 		"""Update and return state."""
 		session = await self.get_session()
@@ -1218,17 +1460,25 @@ class BrowserContext:
 			logger.debug(f'👋  Current page is no longer accessible: {str(e)}')
 			raise BrowserError('Browser closed: no valid pages available')
 
+		# tabs, scroll position and title do not depend on the highlights, they are probed while the page is extracted
+		probes = asyncio.gather(self.get_tabs_info(), self.get_scroll_info(page), page.title())
 		try:
 			await self.remove_highlights()
-			dom_service = DomService(page)
+			if self.config.incremental_dom_extraction and session.incremental_dom_cache is None:
+				session.incremental_dom_cache = IncrementalDOMCache()
+			dom_service = DomService(
+				page, incremental_cache=session.incremental_dom_cache, engine=self.config.dom_extraction_engine
+			)
 			content = await dom_service.get_clickable_elements(
 				focus_element=focus_element,
 				viewport_expansion=self.config.viewport_expansion,
-				highlight_elements=self.config.highlight_elements,
+				highlight_elements=self.config.highlight_elements and not self.composite_highlights,
+				columnar=self.config.columnar_dom_transfer,
+				return_highlight_rects=self.composite_highlights,
+				include_cross_origin_iframes=self.config.include_cross_origin_iframes,
+				budget=self._get_dom_budget(),
 			)
 
-			tabs_info = await self.get_tabs_info()
-
 			# Get all cross-origin iframes within the page and open them in new tabs
 			# mark the titles of the new tabs so the LLM knows to check them for additional content
 			# unfortunately too buggy for now, too many sites use invisible cross-origin iframes for ads, tracking, youtube videos, social media, etc.
@@ -1249,8 +1499,16 @@ class BrowserContext:
 			# 		)
 			# 	)
 
-			screenshot_b64 = await self.take_screenshot()
-			pixels_above, pixels_below = await self.get_scroll_info(page)
+			# the screenshot has to show the highlights drawn by the extraction
+			screenshot, screenshot_format = None, self.config.screenshot_format
+			if screenshot_format != 'off':
+				screenshot, screenshot_format = await self._capture_screenshot(
+					page,
+					screenshot_format,
+					highlights=content.selector_map if self.composite_highlights else None,
+					focus_element=focus_element,
+				)
+			tabs_info, (pixels_above, pixels_below), title = await probes
 
 			# Find the agent's active tab ID
 			agent_current_page_id = 0
@@ -1264,26 +1522,45 @@ class BrowserContext:
 				element_tree=content.element_tree,
 				selector_map=content.selector_map,
 				url=page.url,
-				title=await page.title(),
+				title=title,
 				tabs=tabs_info,
-				screenshot=screenshot_b64,
 				pixels_above=pixels_above,
 				pixels_below=pixels_below,
+				truncation=content.truncation,
+				screenshot_bytes=screenshot,
+				screenshot_mime_type=SCREENSHOT_MIME_TYPES.get(screenshot_format, 'image/png'),
 			)
+			self.current_state.serialization_cache = session.dom_serialization_cache
 
 			return self.current_state
 		except Exception as e:
+			probes.cancel()
+			with contextlib.suppress(BaseException):
+				await probes
 			logger.error(f'❌  Failed to update state: {str(e)}')
 			# Return last known good state if available
 			if hasattr(self, 'current_state'):
 				return self.current_state
 			raise
 
+	def _get_dom_budget(self) -> DOMBudget | None:
+		if self.config.max_dom_elements is None and self.config.max_dom_nodes is None and self.config.max_dom_text_chars is None:
+			return None
+		return DOMBudget(
+			max_elements=self.config.max_dom_elements,
+			max_nodes=self.config.max_dom_nodes,
+			max_text_chars=self.config.max_dom_text_chars,
+		)
+
 	# region - Browser Actions
 	@time_execution_async('--take_screenshot')
-	async def take_screenshot(self, full_page: bool = False) -> str:
+	async def take_screenshot(
+		self, full_page: bool = False, highlights: SelectorMap | None = None, focus_element: int = -1
+	) -> str:
 		"""
-		Returns a base64 encoded screenshot of the current page.
+		Returns a base64 encoded screenshot of the current page, in the configured screenshot_format (PNG if it is 'off').
+
+		highlights: elements to draw highlight boxes for onto the screenshot (see composite_highlights)
 		"""
 		page = await self.get_agent_current_page()
 
@@ -1291,24 +1568,92 @@ class BrowserContext:
 		# await page.bring_to_front()
 		await page.wait_for_load_state()
 
-		screenshot = await page.screenshot(
-			full_page=full_page,
-			animations='disabled',
-			caret='initial',
-		)
-
+		image_format = self.config.screenshot_format if self.config.screenshot_format != 'off' else 'png'
+		screenshot, _ = await self._capture_screenshot(page, image_format, full_page, highlights, focus_element)
 		screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
 
 		# await self.remove_highlights()
 
 		return screenshot_b64
 
+	async def _capture_screenshot(
+		self,
+		page: Page,
+		image_format: ScreenshotFormat,
+		full_page: bool = False,
+		highlights: SelectorMap | None = None,
+		focus_element: int = -1,
+	) -> tuple[bytes, ScreenshotFormat]:
+		"""
+		Raw screenshot as configured by the screenshot_* options, and the format it was taken in
+		(PNG if WebP was asked for but cannot be captured by this browser).
+		"""
+		screenshot = None
+		if (self.config.cdp_screenshots or image_format == 'webp') and not full_page:
+			try:
+				screenshot = await self._capture_screenshot_with_cdp(page, image_format)
+			except Exception as e:
+				logger.debug(f'Failed to take a screenshot with CDP, using Playwright: {type(e).__name__}: {e}')
+
+		if screenshot is None:
+			if image_format == 'webp':
+				image_format = 'png'
+			screenshot = await page.screenshot(
+				full_page=full_page,
+				animations='disabled',
+				caret='initial',
+				type='jpeg' if image_format == 'jpeg' else 'png',
+				quality=self.config.screenshot_quality if image_format == 'jpeg' else None,
+				scale=self.config.screenshot_scale,
+			)
+
+		if highlights:
+			# decoding, drawing and encoding the image is CPU-bound, keep it off the event loop
+			screenshot = await asyncio.to_thread(
+				draw_highlights,
+				screenshot,
+				highlights,
+				focus_element,
+				image_format=image_format,
+				quality=self.config.screenshot_quality,
+			)
+
+		return screenshot, image_format
+
+	async def _capture_screenshot_with_cdp(self, page: Page, image_format: ScreenshotFormat) -> bytes:
+		"""Screenshot of the visible viewport with Page.captureScreenshot, Chromium only"""
+		cdp_session = await page.context.new_cdp_session(page)  # type: ignore
+		try:
+			params: dict = {'format': image_format, 'optimizeForSpeed': True, 'captureBeyondViewport': False}
+			if image_format != 'png':
+				params['quality'] = self.config.screenshot_quality
+			if self.config.screenshot_scale == 'css':
+				# one image pixel per css pixel, the deprecated visualViewport is in device pixels
+				metrics = await cdp_session.send('Page.getLayoutMetrics')
+				viewport = metrics['cssVisualViewport']
+				device_width = metrics.get('visualViewport', {}).get('clientWidth') or viewport['clientWidth']
+				params['clip'] = {
+					'x': viewport['pageX'],
+					'y': viewport['pageY'],
+					'width': viewport['clientWidth'],
+					'height': viewport['clientHeight'],
+					'scale': viewport['clientWidth'] / device_width,
+				}
+			result = await cdp_session.send('Page.captureScreenshot', params)
+		finally:
+			await cdp_session.detach()
+		return base64.b64decode(result['data'])
+
 	@time_execution_async('--remove_highlights')
 	async def remove_highlights(self):
 		"""
 		Removes all highlight overlays and labels created by the highlightElement function.
 		Handles cases where the page might be closed or inaccessible.
 		"""
+		if self.composite_highlights:
+			# highlights are drawn onto the screenshot, there is nothing to remove from the page
+			return
+
 		try:
 			page = await self.get_agent_current_page()
 			await page.evaluate(
@@ -1764,18 +2109,17 @@ class BrowserContext:
 		"""Get information about all tabs"""
 		session = await self.get_session()
 
-		tabs_info = []
-		for page_id, page in enumerate(session.context.pages):
+		async def get_tab_info(page_id: int, page: Page) -> TabInfo:
 			try:
-				tab_info = TabInfo(page_id=page_id, url=page.url, title=await asyncio.wait_for(page.title(), timeout=1))
-			except TimeoutError:
+				return TabInfo(page_id=page_id, url=page.url, title=await asyncio.wait_for(page.title(), timeout=1))
+			except asyncio.TimeoutError:
 				# page.title() can hang forever on tabs that are crashed/disappeared/about:blank
 				# we dont want to try automating those tabs because they will hang the whole script
 				logger.debug('⚠  Failed to get tab info for tab #%s: %s (ignoring)', page_id, page.url)
-				tab_info = TabInfo(page_id=page_id, url='about:blank', title='ignore this tab and do not use it')
-			tabs_info.append(tab_info)
+				return TabInfo(page_id=page_id, url='about:blank', title='ignore this tab and do not use it')
 
-		return tabs_info
+		# all titles at once, a hanging tab costs at most 1s in total instead of 1s each
+		return list(await asyncio.gather(*(get_tab_info(page_id, page) for page_id, page in enumerate(session.context.pages))))
 
 	@time_execution_async('--switch_to_tab')
 	async def switch_to_tab(self, page_id: int) -> None:
@@ -1860,7 +2204,7 @@ class BrowserContext:
 
 	async def save_cookies(self):
 		"""Save current cookies to file"""
-		if self.session and self.session.context and self.config.cookies_file:
+		if self.session and self.session.context and self.config.cookies_file and not self.read_only_cookies_file:
 			try:
 				cookies = await self.session.context.cookies()
 				logger.debug(f'🍪  Saving {len(cookies)} cookies to {self.config.cookies_file}')
@@ -1904,9 +2248,11 @@ class BrowserContext:
 
 	async def get_scroll_info(self, page: Page) -> tuple[int, int]:
 		"""Get scroll position information for the current page."""
-		scroll_y = await page.evaluate('window.scrollY')
-		viewport_height = await page.evaluate('window.innerHeight')
-		total_height = await page.evaluate('document.documentElement.scrollHeight')
+		scroll_y, viewport_height, total_height = await asyncio.gather(
+			page.evaluate('window.scrollY'),
+			page.evaluate('window.innerHeight'),
+			page.evaluate('document.documentElement.scrollHeight'),
+		)
 		pixels_above = scroll_y
 		pixels_below = total_height - (scroll_y + viewport_height)
 		return pixels_above, pixels_below
@@ -1925,6 +2271,79 @@ class BrowserContext:
 		session.cached_state = None
 		self.state.target_id = None
 
+	async def _load_cookies(self, context: PlaywrightBrowserContext) -> None:
+		"""Load cookies from cookies_file if it exists"""
+		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
+			async with await anyio.open_file(self.config.cookies_file, 'r') as f:
+				try:
+					cookies = json.loads(await f.read())
+
+					valid_same_site_values = ['Strict', 'Lax', 'None']
+					for cookie in cookies:
+						if 'sameSite' in cookie:
+							if cookie['sameSite'] not in valid_same_site_values:
+								logger.warning(
+									f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}"
+								)
+								cookie['sameSite'] = 'None'
+					logger.info(f'🍪  Loaded {len(cookies)} cookies from {self.config.cookies_file}')
+					await context.add_cookies(cookies)
+
+				except json.JSONDecodeError as e:
+					logger.error(f'Failed to parse cookies file: {str(e)}')
+
+	async def fast_reset(self) -> None:
+		"""
+		Bring the context back to a clean state without recreating it (see BrowserContextPool):
+		all tabs are replaced by one blank tab, cookies and site data are cleared, the cookies of cookies_file
+		are loaded again and the cached page state is forgotten.
+		"""
+		session = await self.get_session()
+		old_pages = list(session.context.pages)
+		origins = {origin['origin'] for origin in (await session.context.storage_state()).get('origins', [])}
+		origins.update(self._get_origin(page.url) for page in old_pages)
+		origins.discard(None)
+
+		# a new tab instead of navigating an old one, so that no session storage or history survives
+		page = await session.context.new_page()
+		await self.set_viewport_size(page)
+		await asyncio.gather(*(old_page.close() for old_page in old_pages), return_exceptions=True)
+		await session.context.clear_cookies()
+		await self._clear_site_data(page, origins)
+		await self._load_cookies(session.context)
+
+		session.cached_state = None
+		session.cached_state_clickable_elements_hashes = None
+		session.cached_state_fingerprint = None
+		session.incremental_dom_cache = None
+		self.state = BrowserContextState()
+		self.agent_current_page = self.human_current_page = page
+		if hasattr(self, 'current_state'):
+			del self.current_state
+
+	async def _clear_site_data(self, page: Page, origins: set[str]) -> None:
+		"""Clear local storage, IndexedDB, caches, service workers... of the origins, Chromium only"""
+		if not origins:
+			return
+		try:
+			cdp_session = await page.context.new_cdp_session(page)  # type: ignore
+		except Exception as e:
+			logger.debug(f'Cannot clear the site data of {len(origins)} origins without CDP: {type(e).__name__}: {e}')
+			return
+		try:
+			await asyncio.gather(
+				*(cdp_session.send('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'}) for origin in origins)
+			)
+		finally:
+			await cdp_session.detach()
+
+	@staticmethod
+	def _get_origin(url: str) -> str | None:
+		parsed_url = urlparse(url)
+		if parsed_url.scheme not in ('http', 'https') or not parsed_url.netloc:
+			return None
+		return f'{parsed_url.scheme}://{parsed_url.netloc}'
+
 	async def _get_unique_filename(self, directory, filename):
 		"""Generate a unique filename by appending (1), (2), etc., if a file already exists."""
 		base, ext = os.path.splitext(filename)
@@ -0,0 +1,236 @@
+"""
+Long-lived local browser shared by all browser-use processes.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+from contextlib import asynccontextmanager
+from pathlib import Path
+from tempfile import gettempdir
+
+import httpx
+import psutil
+from playwright.async_api import async_playwright
+
+try:
+	import fcntl
+except ImportError:  # Windows
+	fcntl = None
+
+from browser_use.browser.chrome import (
+	CHROME_ARGS,
+	CHROME_DETERMINISTIC_RENDERING_ARGS,
+	CHROME_DISABLE_SECURITY_ARGS,
+	CHROME_DOCKER_ARGS,
+	CHROME_HEADLESS_ARGS,
+)
+
+logger = logging.getLogger(__name__)
+
+IN_DOCKER = os.environ.get('IN_DOCKER', 'false').lower()[0] in 'ty1'
+
+# separate from CHROME_DEBUG_PORT, so that the daemon never collides with the browsers launched by Browser
+CHROME_DAEMON_DEBUG_PORT = 9243
+# seconds to wait for a launched daemon to accept CDP connections
+DAEMON_STARTUP_TIMEOUT = 20
+
+
+def _get_daemon_dir() -> Path:
+	try:
+		# ~/.config/browseruse/daemon
+		daemon_dir = (Path('~/.config') / 'browseruse' / 'daemon').expanduser()
+		daemon_dir.mkdir(parents=True, exist_ok=True)
+	except Exception as e:
+		logger.debug(f'Failed to create ~/.config/browseruse/daemon directory: {type(e).__name__}: {e}')
+		daemon_dir = Path(gettempdir()) / 'browseruse' / 'daemon'
+		daemon_dir.mkdir(parents=True, exist_ok=True)
+	return daemon_dir
+
+
+class BrowserDaemon:
+	"""
+	Keeps one Chromium process running in the background, detached from the process that started it, so that
+	every Browser created with BrowserConfig(use_daemon=True) (and every `browser-use --daemon` CLI run) attaches
+	to the already running browser over CDP in milliseconds instead of launching a new one.
+
+	The pid and CDP url of the running daemon are kept in a state file, a daemon whose browser no longer
+	answers is replaced by a new one. Processes starting the daemon at the same time are serialized by a
+	lock file. Clients only create and close their own contexts, the browser keeps running after they exit
+	until `stop()` is called.
+	"""
+
+	def __init__(self, state_dir: Path | str | None = None, port: int = CHROME_DAEMON_DEBUG_PORT):
+		self.state_dir = Path(state_dir) if state_dir else _get_daemon_dir()
+		self.state_file = self.state_dir / 'daemon.json'
+		self.lock_file = self.state_dir / 'daemon.lock'
+		self.port = port
+
+	async def get_cdp_url(self) -> str | None:
+		"""CDP url of the running daemon, or None if there is none"""
+		state = self._read_state()
+		if state and await self._is_responding(state['cdp_url']):
+			return state['cdp_url']
+		return None
+
+	async def start(
+		self,
+		headless: bool = False,
+		browser_binary_path: str | None = None,
+		extra_browser_args: list[str] | None = None,
+		disable_security: bool = False,
+		deterministic_rendering: bool = False,
+	) -> str:
+		"""Start the daemon unless one is already running, returns its CDP url"""
+		# another process may be starting the daemon right now, wait for it instead of launching a second browser
+		async with self._lock():
+			state = self._read_state()
+			if state and await self._is_responding(state['cdp_url']):
+				if state.get('headless') != headless:
+					logger.debug(f'Reusing running browser daemon with headless={state.get("headless")}, stop it to change this')
+				return state['cdp_url']
+
+			cdp_url = f'http://localhost:{self.port}'
+			if await self._is_responding(cdp_url):
+				# started by a previous version or without the lock
+				logger.info(f'🔌  Reusing browser daemon found running on {cdp_url}')
+				return cdp_url
+
+			if state:
+				self._kill(state.get('pid'))
+
+			executable_path = browser_binary_path or await self._get_builtin_executable_path()
+			user_data_dir = self.state_dir / 'profile'
+			user_data_dir.mkdir(parents=True, exist_ok=True)
+			launch_args = [
+				*{  # remove duplicates (usually preserves the order, but not guaranteed)
+					f'--remote-debugging-port={self.port}',
+					f'--user-data-dir={user_data_dir.resolve()}',
+					'--no-first-run',
+					*CHROME_ARGS,
+					*(CHROME_DOCKER_ARGS if IN_DOCKER else []),
+					*(CHROME_HEADLESS_ARGS if headless else []),
+					*(CHROME_DISABLE_SECURITY_ARGS if disable_security else []),
+					*(CHROME_DETERMINISTIC_RENDERING_ARGS if deterministic_rendering else []),
+					*(extra_browser_args or []),
+				}
+			]
+
+			logger.info(f'🚀  Starting browser daemon on {cdp_url}')
+			process = self._launch([executable_path, *launch_args])
+
+			loop = asyncio.get_event_loop()
+			deadline = loop.time() + DAEMON_STARTUP_TIMEOUT
+			while not await self._is_responding(cdp_url):
+				if process.poll() is not None:
+					# chrome hands over to a browser already running with the same profile and exits
+					if await self._is_responding(cdp_url):
+						logger.info(f'🔌  Reusing browser daemon found running on {cdp_url}')
+						return cdp_url
+					raise RuntimeError(f'Browser daemon exited with code {process.returncode} during startup')
+				if loop.time() >= deadline:
+					self._kill(process.pid)
+					raise RuntimeError(f'Browser daemon did not start listening on {cdp_url} within {DAEMON_STARTUP_TIMEOUT}s')
+				await asyncio.sleep(0.1)
+
+			self._write_state({'pid': process.pid, 'cdp_url': cdp_url, 'headless': headless})
+			return cdp_url
+
+	async def stop(self) -> bool:
+		"""Stop the running daemon, returns whether there was one"""
+		async with self._lock():
+			state = self._read_state()
+			if not state:
+				return False
+			stopped = self._kill(state.get('pid'))
+			self.state_file.unlink(missing_ok=True)
+		logger.info('🛑  Stopped browser daemon' if stopped else 'Browser daemon was not running anymore')
+		return stopped
+
+	@asynccontextmanager
+	async def _lock(self):
+		"""Exclusive lock on the daemon state across processes (not available on Windows, where starts are not serialized)"""
+		if fcntl is None:
+			yield
+			return
+		lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+
+		def close_lock_file(locking: asyncio.Task) -> None:
+			if not locking.cancelled():
+				locking.exception()  # nobody waits for it anymore
+			# closing the file releases the lock
+			os.close(lock_fd)
+
+		# blocks until the process holding the lock releases it, off the event loop
+		locking = asyncio.ensure_future(asyncio.to_thread(fcntl.flock, lock_fd, fcntl.LOCK_EX))
+		try:
+			await asyncio.shield(locking)
+		except BaseException:
+			# a thread cannot be interrupted, when cancelled the file is only closed once flock returned
+			if locking.done():
+				os.close(lock_fd)
+			else:
+				locking.add_done_callback(close_lock_file)
+			raise
+
+		try:
+			yield
+		finally:
+			os.close(lock_fd)
+
+	def _read_state(self) -> dict | None:
+		try:
+			state = json.loads(self.state_file.read_text())
+		except (FileNotFoundError, json.JSONDecodeError):
+			return None
+		return state if isinstance(state, dict) and state.get('cdp_url') else None
+
+	def _write_state(self, state: dict) -> None:
+		# write to a temporary file first, concurrent readers never see a half written state
+		tmp_file = self.state_file.with_suffix(f'.{os.getpid()}.tmp')
+		tmp_file.write_text(json.dumps(state))
+		tmp_file.replace(self.state_file)
+
+	@staticmethod
+	def _launch(command: list[str]) -> subprocess.Popen:
+		# not an asyncio subprocess, those are killed when their event loop closes. A new session keeps
+		# the browser running (and out of reach of Ctrl+C) after the starting process exits
+		return subprocess.Popen(
+			command,
+			stdin=subprocess.DEVNULL,
+			stdout=subprocess.DEVNULL,
+			stderr=subprocess.DEVNULL,
+			start_new_session=True,
+		)
+
+	@staticmethod
+	async def _is_responding(cdp_url: str) -> bool:
+		try:
+			async with httpx.AsyncClient() as client:
+				response = await client.get(f'{cdp_url}/json/version', timeout=1)
+				return response.status_code == 200
+		except httpx.HTTPError:
+			return False
+
+	@staticmethod
+	async def _get_builtin_executable_path() -> str:
+		async with async_playwright() as playwright:
+			return playwright.chromium.executable_path
+
+	def _kill(self, pid: int | None) -> bool:
+		if not pid:
+			return False
+		try:
+			process = psutil.Process(pid)
+			# the pid may have been reused by an unrelated process since the daemon died
+			if f'--remote-debugging-port={self.port}' not in process.cmdline():
+				return False
+			# always kill all children processes, otherwise chrome leaves a bunch of zombie processes
+			for child in process.children(recursive=True):
+				child.kill()
+			process.kill()
+			return True
+		except psutil.Error:
+			return False
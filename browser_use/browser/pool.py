@@ -0,0 +1,138 @@
+"""
+Pool of warm browser contexts.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from browser_use.browser.browser import Browser
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserContextPool:
+	"""
+	Keeps `size` pre-created and initialized contexts of a browser ready, so that handing one to an agent takes
+	milliseconds instead of the seconds it takes to create a context, run its init scripts and open its first page.
+
+	Released contexts are cleaned with BrowserContext.fast_reset and handed out again, until they have been used
+	`max_uses` times or fail to reset, then they are closed and replaced by a new one in the background.
+	The contexts only read the cookies_file of their config, they never write the cookies of their users to it.
+
+	    async with BrowserContextPool(browser, size=3) as pool:
+	        async with pool.context() as browser_context:
+	            agent = Agent(task=task, llm=llm, browser=browser, browser_context=browser_context)
+	            await agent.run()
+	"""
+
+	def __init__(self, browser: Browser, size: int = 2, config: BrowserContextConfig | None = None, max_uses: int = 20):
+		self.browser = browser
+		self.size = size
+		self.config = config
+		self.max_uses = max_uses
+
+		self.idle_contexts: list[BrowserContext] = []
+		self.uses: dict[str, int] = {}  # context_id -> number of times it was handed out
+		self._warming: set[asyncio.Task] = set()
+		self._closed = False
+
+	async def __aenter__(self):
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
+
+	async def start(self) -> None:
+		"""Create the warm contexts, waits until all of them are ready"""
+		self._closed = False
+		self._refill()
+		if self._warming:
+			await asyncio.gather(*self._warming, return_exceptions=True)
+
+	async def acquire(self) -> BrowserContext:
+		"""A warm context if one is ready, otherwise a newly created one"""
+		if self._closed:
+			raise RuntimeError('BrowserContextPool is closed')
+
+		if self.idle_contexts:
+			context = self.idle_contexts.pop()
+		else:
+			logger.debug('No warm browser context available, creating one')
+			context = await self._create_context()
+		self.uses[context.context_id] = self.uses.get(context.context_id, 0) + 1
+		self._refill()
+		return context
+
+	async def release(self, context: BrowserContext) -> None:
+		"""Give a context back to the pool, it is reset for the next user or closed"""
+		if self._closed or self.uses.get(context.context_id, 0) >= self.max_uses or len(self.idle_contexts) >= self.size:
+			await self._discard(context)
+			self._refill()
+			return
+
+		try:
+			await context.fast_reset()
+		except Exception as e:
+			logger.debug(f'Failed to reset browser context, replacing it: {type(e).__name__}: {e}')
+			await self._discard(context)
+			self._refill()
+			return
+		if self._closed or len(self.idle_contexts) >= self.size:
+			# the pool was closed or refilled by other releases and warm-ups during the reset
+			await self._discard(context)
+			return
+		self.idle_contexts.append(context)
+
+	@asynccontextmanager
+	async def context(self) -> AsyncIterator[BrowserContext]:
+		"""Acquire a context for the duration of the block"""
+		context = await self.acquire()
+		try:
+			yield context
+		finally:
+			await self.release(context)
+
+	async def close(self) -> None:
+		"""Close the idle contexts and stop warming new ones, contexts in use are closed when they are released"""
+		self._closed = True
+		for task in self._warming:
+			task.cancel()
+		await asyncio.gather(*self._warming, return_exceptions=True)
+		idle_contexts, self.idle_contexts = self.idle_contexts, []
+		await asyncio.gather(*(self._discard(context) for context in idle_contexts))
+
+	def _refill(self) -> None:
+		"""Start creating contexts in the background until `size` of them are idle or warming"""
+		while not self._closed and len(self.idle_contexts) + len(self._warming) < self.size:
+			task = asyncio.create_task(self._warm_context())
+			self._warming.add(task)
+			task.add_done_callback(self._warming.discard)
+
+	async def _warm_context(self) -> None:
+		try:
+			context = await self._create_context()
+		except Exception as e:
+			logger.warning(f'❌  Failed to create a warm browser context: {type(e).__name__}: {e}')
+			return
+		if self._closed:
+			await self._discard(context)
+		else:
+			self.idle_contexts.append(context)
+
+	async def _create_context(self) -> BrowserContext:
+		context = await self.browser.new_context(self.config)
+		context.read_only_cookies_file = True
+		# creates the playwright context, with its init scripts, cookies and first page
+		await context.get_session()
+		return context
+
+	async def _discard(self, context: BrowserContext) -> None:
+		self.uses.pop(context.context_id, None)
+		try:
+			await context.close()
+		except Exception as e:
+			logger.debug(f'Failed to close browser context: {type(e).__name__}: {e}')
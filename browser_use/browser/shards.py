@@ -0,0 +1,178 @@
+"""
+Browser contexts spread over several browser processes.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import weakref
+from collections.abc import Coroutine
+from typing import Literal
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+ShardPlacement = Literal['least_loaded', 'consistent_hash']
+
+# points per shard on the consistent hash ring, more points spread the keys more evenly
+HASH_RING_POINTS_PER_SHARD = 64
+
+
+class ShardedBrowser:
+	"""
+	Launches `shards` browser processes, each with its own Playwright connection, and places every new context on
+	one of them, so that many concurrent agents are not all funneled through one browser process and connection.
+
+	Contexts go to the shard with the fewest open contexts ('least_loaded'), or with 'consistent_hash' to the
+	shard a `key` (e.g. a user or task id) hashes to, so that the same key keeps landing on the same process.
+	A shard whose browser process died is relaunched before the next context is placed on it. The contexts that
+	were open on it lose their pages and cookies, they create a new session on the relaunched browser when used next.
+
+	Shards are builtin browsers (with consecutive remote debugging ports), or remote browsers when `cdp_urls`
+	lists one CDP url per shard. Each shard is a regular Browser, contexts work exactly as with a single one.
+	"""
+
+	def __init__(
+		self,
+		config: BrowserConfig | None = None,
+		shards: int = 2,
+		placement: ShardPlacement = 'least_loaded',
+		cdp_urls: list[str] | None = None,
+	):
+		self.config = config or BrowserConfig()
+		self.placement = placement
+		if self.config.browser_binary_path:
+			raise ValueError('ShardedBrowser does not support browser_binary_path, use the builtin browsers or cdp_urls')
+
+		if cdp_urls:
+			shard_configs = [self.config.model_copy(update={'cdp_url': cdp_url}) for cdp_url in cdp_urls]
+		else:
+			base_port = self.config.chrome_remote_debugging_port
+			shard_configs = [
+				self.config.model_copy(update={'chrome_remote_debugging_port': base_port + i if base_port else None})
+				for i in range(shards)
+			]
+		self.shards = [Browser(config=shard_config) for shard_config in shard_configs]
+
+		# contexts placed on each shard that did not create their playwright context yet (they are counted by the browser once they did)
+		self._pending_contexts = [weakref.WeakSet() for _ in self.shards]
+		# every context placed on each shard, their sessions are dropped when the shard is relaunched
+		self._contexts = [weakref.WeakSet() for _ in self.shards]
+		# new_context calls waiting for their shard to start, counted as load so that concurrent calls spread out
+		self._reserved_contexts = [0 for _ in self.shards]
+		# the running start or restart of each shard, every caller waits for the same one
+		self._starts: dict[int, asyncio.Task] = {}
+		self._hash_ring = sorted(
+			(self._hash(f'shard-{shard_index}-{point}'), shard_index)
+			for shard_index in range(len(self.shards))
+			for point in range(HASH_RING_POINTS_PER_SHARD)
+		)
+		self._closing = False
+
+	async def __aenter__(self):
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
+
+	async def start(self) -> None:
+		"""Launch (or connect to) all shards at once, otherwise they are started by their first context"""
+		await asyncio.gather(*(self._ensure_shard_alive(shard_index) for shard_index in range(len(self.shards))))
+
+	async def new_context(self, config: BrowserContextConfig | None = None, key: str | None = None) -> BrowserContext:
+		"""Create a browser context on the shard chosen by the placement, `key` is required for 'consistent_hash'"""
+		shard_index = self.get_shard_index(key)
+		self._reserved_contexts[shard_index] += 1
+		try:
+			await self._ensure_shard_alive(shard_index)
+			context = await self.shards[shard_index].new_context(config)
+			self._pending_contexts[shard_index].add(context)
+			self._contexts[shard_index].add(context)
+		finally:
+			self._reserved_contexts[shard_index] -= 1
+		return context
+
+	def get_shard_index(self, key: str | None = None) -> int:
+		if self.placement == 'consistent_hash':
+			if key is None:
+				raise ValueError("A key is required to place contexts with placement='consistent_hash'")
+			ring_index = bisect.bisect(self._hash_ring, (self._hash(key), len(self.shards)))
+			return self._hash_ring[ring_index % len(self._hash_ring)][1]
+		return min(range(len(self.shards)), key=self.get_load)
+
+	def get_load(self, shard_index: int) -> int:
+		"""Open contexts of a shard"""
+		pending = self._pending_contexts[shard_index]
+		for context in list(pending):
+			if context.session is not None:
+				pending.discard(context)
+		playwright_browser = self.shards[shard_index].playwright_browser
+		open_contexts = len(playwright_browser.contexts) if playwright_browser and playwright_browser.is_connected() else 0
+		return open_contexts + len(pending) + self._reserved_contexts[shard_index]
+
+	async def close(self) -> None:
+		self._closing = True
+		for task in self._starts.values():
+			task.cancel()
+		await asyncio.gather(*self._starts.values(), return_exceptions=True)
+		await asyncio.gather(*(shard.close() for shard in self.shards), return_exceptions=True)
+
+	async def _start_shard(self, shard_index: int) -> None:
+		playwright_browser = await self.shards[shard_index].get_playwright_browser()
+		playwright_browser.on('disconnected', lambda _: self._on_shard_disconnected(shard_index))
+
+	def _on_shard_disconnected(self, shard_index: int) -> None:
+		if self._closing or shard_index in self._starts:
+			return
+		logger.warning(f'💥  Browser shard {shard_index} disconnected, relaunching it')
+		self._schedule_start(shard_index, self._restart_shard(shard_index))
+
+	async def _ensure_shard_alive(self, shard_index: int) -> None:
+		if shard_index not in self._starts:
+			shard = self.shards[shard_index]
+			if shard.playwright_browser is None:
+				self._schedule_start(shard_index, self._start_shard(shard_index))
+			elif not shard.playwright_browser.is_connected():
+				logger.warning(f'💥  Browser shard {shard_index} is not connected anymore, relaunching it')
+				self._schedule_start(shard_index, self._restart_shard(shard_index))
+			else:
+				return
+		# a caller that is cancelled must not cancel the start the other callers wait for
+		await asyncio.shield(self._starts[shard_index])
+
+	def _schedule_start(self, shard_index: int, start: Coroutine) -> None:
+		task = asyncio.create_task(start)
+		self._starts[shard_index] = task
+		task.add_done_callback(lambda _: self._starts.pop(shard_index, None))
+
+	async def _restart_shard(self, shard_index: int) -> None:
+		shard = self.shards[shard_index]
+		# their playwright contexts died with the browser process, calls on them fail until they are dropped below
+		lost_contexts = [context for context in self._contexts[shard_index] if context.session is not None]
+		try:
+			await shard.close()
+		except Exception as e:
+			logger.debug(f'Failed to clean up browser shard {shard_index}: {type(e).__name__}: {e}')
+		# close() keeps keep_alive browsers around, the process is gone anyway
+		shard.playwright_browser = None
+		shard.playwright = None
+		await self._start_shard(shard_index)
+
+		if lost_contexts:
+			logger.warning(
+				f'💥  {len(lost_contexts)} contexts on browser shard {shard_index} lost their pages, '
+				'they start over on the relaunched browser'
+			)
+		for context in lost_contexts:
+			# only after the relaunch: the next call creates a new session on the shard instead of launching it again
+			await context.close()
+			self._pending_contexts[shard_index].add(context)
+
+	@staticmethod
+	def _hash(key: str) -> int:
+		# stable across processes, unlike hash()
+		return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import importlib.util
+import io
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from browser_use.dom.views import SelectorMap
+
+logger = logging.getLogger(__name__)
+
+# same palette and opacity as the in-page overlays drawn by buildDomTree.js
+HIGHLIGHT_COLORS = [
+	'#FF0000',
+	'#00FF00',
+	'#0000FF',
+	'#FFA500',
+	'#800080',
+	'#008080',
+	'#FF69B4',
+	'#4B0082',
+	'#FF4500',
+	'#2E8B57',
+	'#DC143C',
+	'#4682B4',
+]
+HIGHLIGHT_FILL_ALPHA = 0x1A
+HIGHLIGHT_BORDER_WIDTH = 2
+
+
+def can_draw_highlights() -> bool:
+	"""Whether Pillow, which draw_highlights needs, is installed"""
+	return importlib.util.find_spec('PIL') is not None
+
+
+def draw_highlights(
+	screenshot: bytes, selector_map: SelectorMap, focus_element: int = -1, image_format: str = 'png', quality: int = 80
+) -> bytes:
+	"""
+	Draw the highlight boxes and index labels of the elements in `selector_map` onto a viewport screenshot,
+	instead of injecting overlay elements into the page. Elements need `viewport_coordinates` and `viewport_info`
+	(see DomService.get_clickable_elements(return_highlight_rects=True)), others are skipped.
+
+	Returns the composited screenshot in `image_format` ('png', 'jpeg' or 'webp' with `quality`),
+	or the screenshot unchanged if Pillow is not installed.
+	"""
+	try:
+		from PIL import Image, ImageDraw, ImageFont
+	except ImportError:
+		logger.warning('⚠️  Pillow is required to composite highlights onto screenshots, install it with "pip install pillow"')
+		return screenshot
+
+	image = Image.open(io.BytesIO(screenshot)).convert('RGBA')
+	overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
+	draw = ImageDraw.Draw(overlay)
+	font = ImageFont.load_default()
+
+	for highlight_index, element_node in selector_map.items():
+		coordinates = element_node.viewport_coordinates
+		if coordinates is None or element_node.viewport_info is None:
+			continue
+		if focus_element >= 0 and highlight_index != focus_element:
+			continue
+
+		# the screenshot may be scaled relative to css pixels (device scale factor)
+		scale = image.width / element_node.viewport_info.width if element_node.viewport_info.width else 1
+		left = coordinates.top_left.x * scale
+		top = coordinates.top_left.y * scale
+		right = coordinates.bottom_right.x * scale
+		bottom = coordinates.bottom_right.y * scale
+		if right <= 0 or bottom <= 0 or left >= image.width or top >= image.height:
+			continue
+
+		color = HIGHLIGHT_COLORS[highlight_index % len(HIGHLIGHT_COLORS)]
+		red, green, blue = (int(color[i : i + 2], 16) for i in (1, 3, 5))
+		draw.rectangle(
+			(left, top, right, bottom),
+			fill=(red, green, blue, HIGHLIGHT_FILL_ALPHA),
+			outline=(red, green, blue, 255),
+			width=round(HIGHLIGHT_BORDER_WIDTH * scale),
+		)
+
+		# label in the top right corner inside the box if it fits, otherwise above it
+		label = str(highlight_index)
+		text_left, text_top, text_right, text_bottom = draw.textbbox((0, 0), label, font=font)
+		label_width = text_right - text_left + 8
+		label_height = text_bottom - text_top + 4
+		label_left = right - label_width - 2
+		label_top = top + 2
+		if right - left < label_width + 4 or bottom - top < label_height + 4:
+			label_top = top - label_height - 2
+		label_left = min(max(label_left, 0), image.width - label_width)
+		label_top = min(max(label_top, 0), image.height - label_height)
+
+		draw.rectangle((label_left, label_top, label_left + label_width, label_top + label_height), fill=(red, green, blue, 255))
+		draw.text((label_left + 4 - text_left, label_top + 2 - text_top), label, fill=(255, 255, 255, 255), font=font)
+
+	output = io.BytesIO()
+	save_options = {} if image_format == 'png' else {'quality': quality}
+	Image.alpha_composite(image, overlay).convert('RGB').save(output, format=image_format.upper(), **save_options)
+	return output.getvalue()
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from collections import Counter
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from browser_use.browser.utils.settle_timing import SettleSample
+
+if TYPE_CHECKING:
+	from playwright.async_api import Page, Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Requests that matter for the page to look loaded
+RELEVANT_RESOURCE_TYPES = {
+	'document',
+	'stylesheet',
+	'image',
+	'font',
+	'script',
+	'iframe',
+}
+
+RELEVANT_CONTENT_TYPES = {
+	'text/html',
+	'text/css',
+	'application/javascript',
+	'image/',
+	'font/',
+	'application/json',
+}
+
+STREAMING_CONTENT_TYPES = {
+	'streaming',
+	'video',
+	'audio',
+	'webm',
+	'mp4',
+	'event-stream',
+	'websocket',
+	'protobuf',
+}
+
+# Additional patterns to filter out
+IGNORED_URL_PATTERNS = {
+	# Analytics and tracking
+	'analytics',
+	'tracking',
+	'telemetry',
+	'beacon',
+	'metrics',
+	# Ad-related
+	'doubleclick',
+	'adsystem',
+	'adserver',
+	'advertising',
+	# Social media widgets
+	'facebook.com/plugins',
+	'platform.twitter',
+	'linkedin.com/embed',
+	# Live chat and support
+	'livechat',
+	'zendesk',
+	'intercom',
+	'crisp.chat',
+	'hotjar',
+	# Push notifications
+	'push-notifications',
+	'onesignal',
+	'pushwoosh',
+	# Background sync/heartbeat
+	'heartbeat',
+	'ping',
+	'alive',
+	# WebRTC and streaming
+	'webrtc',
+	'rtmp://',
+	'wss://',
+	# Common CDNs for dynamic content
+	'cloudfront.net',
+	'fastly.net',
+}
+
+# Skip responses larger than this (likely not essential for page load)
+MAX_RELEVANT_CONTENT_LENGTH = 5 * 1024 * 1024
+
+
+class RequestClassifier:
+	"""
+	Decides which requests a page has to wait for, with all URL patterns compiled into one case-insensitive regex.
+	Verdicts for the scheme and host part of URLs are cached, so requests to the same (e.g. ad) host are
+	classified by a dict lookup and only the path of requests to other hosts is searched. Every check returns
+	the name of the filter that fired, or None if the request/response is relevant.
+	"""
+
+	max_cached_hosts = 4096
+
+	def __init__(self, extra_ignored_url_patterns: Iterable[str] = ()):
+		self.ignored_url_patterns = sorted({*IGNORED_URL_PATTERNS, *(pattern.lower() for pattern in extra_ignored_url_patterns)})
+		self._ignored_url_regex = self._compile(self.ignored_url_patterns)
+		# only patterns with a '/' can span the host and the path (e.g. facebook.com/plugins)
+		spanning_url_patterns = [pattern for pattern in self.ignored_url_patterns if '/' in pattern]
+		self._spanning_url_regex = self._compile(spanning_url_patterns)
+		self._max_spanning_url_pattern_length = max(map(len, spanning_url_patterns))
+		self._streaming_content_type_regex = self._compile(STREAMING_CONTENT_TYPES)
+		self._relevant_content_type_regex = self._compile(RELEVANT_CONTENT_TYPES)
+		# scheme://host -> pattern matching it, or None
+		self._host_verdicts: dict[str, str | None] = {}
+
+	def classify_request(self, request: Request) -> str | None:
+		# Filter by resource type, this also filters out streaming, websocket, and other real-time requests
+		if request.resource_type not in RELEVANT_RESOURCE_TYPES:
+			return f'resource_type:{request.resource_type}'
+
+		# Filter out data URLs and blob URLs
+		url = request.url
+		if url.startswith(('data:', 'blob:')):
+			return 'data_url'
+
+		# Filter out by URL patterns
+		pattern = self.match_ignored_url(url)
+		if pattern is not None:
+			return f'url:{pattern}'
+
+		# Filter out requests with certain headers
+		headers = request.headers
+		if headers.get('purpose') == 'prefetch':
+			return 'prefetch'
+		if headers.get('sec-fetch-dest') in ('video', 'audio'):
+			return 'media'
+
+		return None
+
+	def classify_response(self, response: Response) -> str | None:
+		headers = response.headers
+		content_type = headers.get('content-type', '')
+
+		# Skip if content type indicates streaming or real-time data
+		match = self._streaming_content_type_regex.search(content_type)
+		if match is not None:
+			return f'streaming:{match.group(0).lower()}'
+
+		# Only process relevant content types
+		if self._relevant_content_type_regex.search(content_type) is None:
+			return 'content_type'
+
+		content_length = headers.get('content-length')
+		if content_length and content_length.isdigit() and int(content_length) > MAX_RELEVANT_CONTENT_LENGTH:
+			return 'content_length'
+
+		return None
+
+	def match_ignored_url(self, url: str) -> str | None:
+		"""The ignored URL pattern found in `url`, or None"""
+		host_end = url.find('/', url.find('://') + 3)
+		host = url if host_end == -1 else url[:host_end]
+		if host in self._host_verdicts:
+			pattern = self._host_verdicts[host]
+		else:
+			match = self._ignored_url_regex.search(host)
+			pattern = match.group(0).lower() if match is not None else None
+			if len(self._host_verdicts) >= self.max_cached_hosts:
+				self._host_verdicts.clear()
+			self._host_verdicts[host] = pattern
+
+		if pattern is not None or host_end == -1:
+			return pattern
+		# the host has no match, look for patterns spanning the '/' after the host, then in the path
+		length = self._max_spanning_url_pattern_length
+		match = self._spanning_url_regex.search(url, max(0, host_end - length + 1), host_end + length)
+		if match is None:
+			match = self._ignored_url_regex.search(url, host_end)
+		return match.group(0).lower() if match is not None else None
+
+	@staticmethod
+	def _compile(patterns: Iterable[str]) -> re.Pattern[str]:
+		# longest first, so that the reported pattern is the most specific one starting at the match
+		return re.compile('|'.join(re.escape(pattern) for pattern in sorted(patterns, key=len, reverse=True)), re.IGNORECASE)
+
+
+class NetworkIdleTracker:
+	"""
+	Tracks the in-flight requests of a page for its whole lifetime, so that requests started before
+	anyone waits for the page (e.g. by the click that triggered a navigation) are not missed.
+
+	Attach it once when the page is created, then await `wait_for_idle` as often as needed.
+	It detaches itself when the page closes.
+	"""
+
+	def __init__(self, page: Page, classifier: RequestClassifier | None = None):
+		self.page = page
+		self.classifier = classifier or RequestClassifier()
+		# filter name -> number of requests/responses it filtered out, for debugging
+		self.filter_counts: Counter[str] = Counter()
+		# pending request -> loop time it started
+		self.pending_requests: dict[Request, float] = {}
+		self.last_activity = self._now()
+		self._activity = asyncio.Event()
+		# loop times of the activities seen by the running wait_for_idle call, starting with its own start time
+		self._wait_activity: list[float] | None = None
+		# how the last wait_for_idle call went, see AdaptiveSettleTimer
+		self.last_settle: SettleSample | None = None
+		# whether a request started or finished (or was still pending at the timeout) during the last wait_for_idle call
+		self.last_wait_was_active = False
+
+	def attach(self) -> NetworkIdleTracker:
+		self.page.on('request', self._on_request)
+		self.page.on('response', self._on_response)
+		self.page.on('requestfailed', self._on_request_failed)
+		self.page.on('close', self._on_close)
+		return self
+
+	def detach(self) -> None:
+		for event, listener in (
+			('request', self._on_request),
+			('response', self._on_response),
+			('requestfailed', self._on_request_failed),
+			('close', self._on_close),
+		):
+			self.page.remove_listener(event, listener)
+		self.pending_requests.clear()
+
+	def has_pending_requests(self, max_age: float) -> bool:
+		"""Whether a relevant request started less than `max_age` seconds ago is still in flight"""
+		now = self._now()
+		return any(now - started < max_age for started in self.pending_requests.values())
+
+	async def wait_for_idle(self, idle_time: float, timeout: float) -> bool:
+		"""
+		Resolve as soon as no relevant request has been in flight for `idle_time` seconds, or after `timeout` seconds.
+		Requests pending for longer than `timeout` (hanging or long-polling) do not block the page from being idle.
+
+		Returns whether the page went idle before the timeout.
+		"""
+		start = self._now()
+		deadline = start + timeout
+		self._wait_activity = [start]
+		try:
+			return await self._wait_for_idle(idle_time, timeout, deadline)
+		finally:
+			activity, self._wait_activity = self._wait_activity, None
+			timed_out = self._now() >= deadline
+			self.last_wait_was_active = len(activity) > 1 or timed_out
+			self.last_settle = SettleSample(
+				settle_time=timeout if timed_out else activity[-1] - start,
+				max_gap=max((later - earlier for earlier, later in zip(activity, activity[1:])), default=0.0),
+			)
+
+	async def _wait_for_idle(self, idle_time: float, timeout: float, deadline: float) -> bool:
+		while True:
+			now = self._now()
+			blocking = [started for started in self.pending_requests.values() if now - started < timeout]
+			if blocking:
+				# re-check when the oldest blocking request becomes stale
+				wake_up = min(blocking) + timeout
+			else:
+				wake_up = self.last_activity + idle_time
+				if wake_up <= now:
+					return True
+			if now >= deadline:
+				logger.debug(
+					f'Network timeout after {timeout}s with {len(blocking)} pending requests: '
+					f'{[request.url for request, started in self.pending_requests.items() if now - started < timeout]}'
+				)
+				return False
+
+			# sleep until the idle window (or the timeout) elapses, or until the next request starts or finishes
+			self._activity.clear()
+			try:
+				await asyncio.wait_for(self._activity.wait(), timeout=min(wake_up, deadline) - now)
+			except asyncio.TimeoutError:
+				pass
+
+	def _on_request(self, request: Request) -> None:
+		fired_filter = self.classifier.classify_request(request)
+		if fired_filter is not None:
+			self.filter_counts[fired_filter] += 1
+			return
+		self.pending_requests[request] = self._record_activity()
+		self._activity.set()
+		# logger.debug(f'Request started: {request.url} ({request.resource_type})')
+
+	def _on_response(self, response: Response) -> None:
+		request = response.request
+		if request not in self.pending_requests:
+			return
+		del self.pending_requests[request]
+		fired_filter = self.classifier.classify_response(response)
+		if fired_filter is None:
+			# only relevant responses count as activity, others are just no longer waited for
+			self._record_activity()
+		else:
+			self.filter_counts[fired_filter] += 1
+		self._activity.set()
+		# logger.debug(f'Request resolved: {request.url}')
+
+	def _on_request_failed(self, request: Request) -> None:
+		if self.pending_requests.pop(request, None) is not None:
+			self._activity.set()
+
+	def _on_close(self, page: Page) -> None:
+		self.detach()
+
+	def _record_activity(self) -> float:
+		self.last_activity = self._now()
+		if self._wait_activity is not None:
+			self._wait_activity.append(self.last_activity)
+		return self.last_activity
+
+	@staticmethod
+	def _now() -> float:
+		return asyncio.get_event_loop().time()
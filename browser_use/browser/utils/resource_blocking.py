@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import logging
+import re
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+if TYPE_CHECKING:
+	from playwright.async_api import Page, Request, Route
+
+logger = logging.getLogger(__name__)
+
+ResourceBlockingPreset = Literal['agent-fast', 'vision-safe']
+
+# Analytics, ads and tracking pixel hosts, subdomains are blocked too
+TRACKER_DOMAINS = [
+	# Analytics
+	'google-analytics.com',
+	'googletagmanager.com',
+	'analytics.google.com',
+	'segment.io',
+	'segment.com',
+	'mixpanel.com',
+	'amplitude.com',
+	'heap.io',
+	'heapanalytics.com',
+	'hotjar.com',
+	'fullstory.com',
+	'clarity.ms',
+	'mouseflow.com',
+	'newrelic.com',
+	'nr-data.net',
+	'quantserve.com',
+	'scorecardresearch.com',
+	'chartbeat.com',
+	'optimizely.com',
+	# Ads
+	'doubleclick.net',
+	'googlesyndication.com',
+	'googleadservices.com',
+	'adservice.google.com',
+	'amazon-adsystem.com',
+	'adnxs.com',
+	'criteo.com',
+	'criteo.net',
+	'taboola.com',
+	'outbrain.com',
+	'rubiconproject.com',
+	'pubmatic.com',
+	'openx.net',
+	'moatads.com',
+	# Social tracking pixels
+	'connect.facebook.net',
+	'ads.linkedin.com',
+	'px.ads.linkedin.com',
+	'analytics.tiktok.com',
+	'bat.bing.com',
+]
+
+# Rough median transfer size per resource type, blocked requests are never fetched so their real size is unknown
+ESTIMATED_RESOURCE_SIZES = {
+	'image': 15_000,
+	'media': 500_000,
+	'font': 25_000,
+	'script': 20_000,
+	'stylesheet': 10_000,
+	'xhr': 2_000,
+	'fetch': 2_000,
+}
+DEFAULT_ESTIMATED_RESOURCE_SIZE = 2_000
+
+# 1x1 transparent GIF
+_EMPTY_GIF = b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+
+# resource type -> (status, content type, body) of the stub answering a blocked request
+STUB_RESPONSES: dict[str, tuple[int, str, bytes]] = {
+	'script': (200, 'application/javascript', b''),
+	'stylesheet': (200, 'text/css', b''),
+	'image': (200, 'image/gif', _EMPTY_GIF),
+	'xhr': (204, 'text/plain', b''),
+	'fetch': (204, 'text/plain', b''),
+}
+
+
+class ResourceBlockingConfig(BaseModel):
+	"""
+	Which requests of a context are blocked, see BrowserContextConfig.resource_blocking.
+
+	blocked_resource_types: Playwright resource types (image, media, font, script, stylesheet, xhr, fetch...) to block
+	blocked_domains: hosts to block, including their subdomains
+	blocked_url_patterns: case-insensitive URL substrings to block
+	allowed_domains: hosts (and subdomains) that are never blocked, takes precedence over all of the above
+	stub_resource_types: blocked requests of these types are answered with an empty response (a transparent
+	    pixel for images) instead of failing, so that pages waiting for them do not run their error handlers
+	"""
+
+	model_config = ConfigDict(extra='forbid')
+
+	blocked_resource_types: list[str] = Field(default_factory=list)
+	blocked_domains: list[str] = Field(default_factory=list)
+	blocked_url_patterns: list[str] = Field(default_factory=list)
+	allowed_domains: list[str] = Field(default_factory=list)
+	stub_resource_types: list[str] = Field(default_factory=lambda: list(STUB_RESPONSES))
+
+
+RESOURCE_BLOCKING_PRESETS: dict[str, ResourceBlockingConfig] = {
+	# text-only agents: nothing that only matters for how the page looks
+	'agent-fast': ResourceBlockingConfig(
+		blocked_resource_types=['image', 'media', 'font'],
+		blocked_domains=TRACKER_DOMAINS,
+	),
+	# agents using screenshots: keep everything that is rendered, except videos
+	'vision-safe': ResourceBlockingConfig(
+		blocked_resource_types=['media'],
+		blocked_domains=TRACKER_DOMAINS,
+	),
+}
+
+
+@dataclass
+class ResourceBlockingStats:
+	"""Requests blocked on a page, blocked_bytes is estimated from ESTIMATED_RESOURCE_SIZES"""
+
+	blocked_requests: int = 0
+	blocked_bytes: int = 0
+	# rule that blocked the requests (e.g. 'resource_type:image', 'domain:doubleclick.net') -> number of requests
+	reasons: Counter[str] = field(default_factory=Counter)
+
+
+class ResourceBlocker:
+	"""
+	Route handler blocking or stubbing the requests matched by a ResourceBlockingConfig, registered for all
+	requests of a context with `context.route('**/*', blocker.handle_route)`. Requests it does not block fall
+	back to the other route handlers (or the network). Navigations of the top level page are never blocked.
+
+	Keeps ResourceBlockingStats per page.
+	"""
+
+	max_cached_hosts = 4096
+
+	def __init__(self, config: ResourceBlockingConfig):
+		self.config = config
+		self.blocked_resource_types = set(config.blocked_resource_types)
+		self.stub_resource_types = set(config.stub_resource_types)
+		self.blocked_domains = self._normalize_domains(config.blocked_domains)
+		self.allowed_domains = self._normalize_domains(config.allowed_domains)
+		self._blocked_url_regex = (
+			re.compile(
+				'|'.join(re.escape(pattern) for pattern in sorted(config.blocked_url_patterns, key=len, reverse=True)),
+				re.IGNORECASE,
+			)
+			if config.blocked_url_patterns
+			else None
+		)
+		# host -> ('allowed' | 'domain:<blocked domain>' | None)
+		self._host_verdicts: dict[str, str | None] = {}
+		self.stats: weakref.WeakKeyDictionary[Page, ResourceBlockingStats] = weakref.WeakKeyDictionary()
+		# requests that do not belong to a page (e.g. service workers)
+		self.other_stats = ResourceBlockingStats()
+
+	@classmethod
+	def from_config(cls, config: ResourceBlockingPreset | ResourceBlockingConfig) -> ResourceBlocker:
+		if isinstance(config, str):
+			if config not in RESOURCE_BLOCKING_PRESETS:
+				raise ValueError(f'Unknown resource blocking preset {config!r}, use one of {list(RESOURCE_BLOCKING_PRESETS)}')
+			config = RESOURCE_BLOCKING_PRESETS[config]
+		return cls(config)
+
+	def classify(self, request: Request) -> str | None:
+		"""The rule blocking `request`, or None if it is allowed"""
+		url = request.url
+		if not url.startswith(('http://', 'https://')):
+			return None
+
+		host_verdict = self._get_host_verdict(url)
+		if host_verdict == 'allowed':
+			return None
+		if request.is_navigation_request() and self._is_top_level(request):
+			return None
+
+		if request.resource_type in self.blocked_resource_types:
+			return f'resource_type:{request.resource_type}'
+		if host_verdict is not None:
+			return host_verdict
+		if self._blocked_url_regex is not None:
+			match = self._blocked_url_regex.search(url)
+			if match is not None:
+				return f'url:{match.group(0).lower()}'
+		return None
+
+	async def handle_route(self, route: Route) -> None:
+		request = route.request
+		reason = self.classify(request)
+		try:
+			if reason is None:
+				await route.fallback()
+				return
+
+			self._record(request, reason)
+			stub = STUB_RESPONSES.get(request.resource_type) if request.resource_type in self.stub_resource_types else None
+			if stub is not None:
+				status, content_type, body = stub
+				await route.fulfill(status=status, content_type=content_type, body=body)
+			else:
+				await route.abort('blockedbyclient')
+		except Exception as e:
+			# the page or context was closed while the request was intercepted
+			logger.debug(f'Failed to handle route for {request.url}: {type(e).__name__}: {e}')
+
+	def get_stats(self, page: Page) -> ResourceBlockingStats:
+		return self.stats.get(page) or ResourceBlockingStats()
+
+	def _record(self, request: Request, reason: str) -> None:
+		try:
+			page = request.frame.page
+			stats = self.stats.setdefault(page, ResourceBlockingStats())
+		except Exception:
+			# service worker requests have no frame
+			stats = self.other_stats
+		stats.blocked_requests += 1
+		stats.blocked_bytes += ESTIMATED_RESOURCE_SIZES.get(request.resource_type, DEFAULT_ESTIMATED_RESOURCE_SIZE)
+		stats.reasons[reason] += 1
+
+	def _get_host_verdict(self, url: str) -> str | None:
+		host_start = url.find('://') + 3
+		host_end = len(url)
+		for separator in '/?#':
+			index = url.find(separator, host_start)
+			if index != -1:
+				host_end = min(host_end, index)
+		host = url[host_start:host_end].rsplit('@', 1)[-1].split(':', 1)[0].lower()
+
+		if host in self._host_verdicts:
+			return self._host_verdicts[host]
+		if self._match_domain(host, self.allowed_domains):
+			verdict = 'allowed'
+		else:
+			blocked_domain = self._match_domain(host, self.blocked_domains)
+			verdict = f'domain:{blocked_domain}' if blocked_domain else None
+		if len(self._host_verdicts) >= self.max_cached_hosts:
+			self._host_verdicts.clear()
+		self._host_verdicts[host] = verdict
+		return verdict
+
+	@staticmethod
+	def _is_top_level(request: Request) -> bool:
+		try:
+			return request.frame.parent_frame is None
+		except Exception:
+			return False
+
+	@staticmethod
+	def _match_domain(host: str, domains: set[str]) -> str | None:
+		"""The entry of `domains` that `host` is or is a subdomain of"""
+		if not domains:
+			return None
+		labels = host.split('.')
+		for i in range(len(labels)):
+			suffix = '.'.join(labels[i:])
+			if suffix in domains:
+				return suffix
+		return None
+
+	@staticmethod
+	def _normalize_domains(domains: list[str]) -> set[str]:
+		return {domain.lower().strip().lstrip('*').lstrip('.') for domain in domains if domain.strip()}
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+# samples kept per domain, older ones are forgotten so that the timings follow site changes
+MAX_SAMPLES_PER_DOMAIN = 50
+# below this many samples the static config is used
+MIN_SAMPLES_PER_DOMAIN = 5
+# learned waits are this much longer than the observed percentile
+SAFETY_MARGIN = 1.5
+# never wait for less network idle time than this
+MIN_NETWORK_IDLE_TIME = 0.1
+
+
+@dataclass
+class SettleTimings:
+	"""How long to wait for a page to settle, see BrowserContextConfig.minimum_wait_page_load_time etc."""
+
+	minimum_wait: float
+	network_idle: float
+	maximum_wait: float
+
+
+@dataclass
+class SettleSample:
+	"""
+	One observed page settle: seconds from the start of the wait until the last network or DOM activity,
+	and the longest quiet gap between two network activities before that (how long an idle window must be).
+	"""
+
+	settle_time: float
+	max_gap: float
+
+
+class AdaptiveSettleTimer:
+	"""
+	Learns per domain how long pages take to settle and derives the minimum and network idle waits from a
+	percentile of the observed samples, so that fast sites are not waited for as long as slow ones. The static
+	config is used as the fallback for unknown domains and as the upper bound of every wait. The timeout
+	(maximum_wait) is never learned, a slow navigation on a usually fast site still gets the full time.
+
+	Only record waits that saw network or DOM activity, steps where nothing happened would drag the percentile
+	towards zero.
+	"""
+
+	def __init__(self, percentile: float = 0.9):
+		self.percentile = percentile
+		self.samples: dict[str, deque[SettleSample]] = {}
+		self.unsaved_samples = 0
+
+	def timings_for(self, url: str, static: SettleTimings) -> SettleTimings:
+		samples = self.samples.get(self._domain(url))
+		if not samples or len(samples) < MIN_SAMPLES_PER_DOMAIN:
+			return static
+
+		settle_time = self._percentile([sample.settle_time for sample in samples])
+		max_gap = self._percentile([sample.max_gap for sample in samples])
+
+		return SettleTimings(
+			minimum_wait=min(static.minimum_wait, settle_time),
+			network_idle=min(static.network_idle, max(MIN_NETWORK_IDLE_TIME, max_gap * SAFETY_MARGIN)),
+			maximum_wait=static.maximum_wait,
+		)
+
+	def record(self, url: str, sample: SettleSample) -> None:
+		domain = self._domain(url)
+		if not domain:
+			return
+		self.samples.setdefault(domain, deque(maxlen=MAX_SAMPLES_PER_DOMAIN)).append(sample)
+		self.unsaved_samples += 1
+
+	async def load(self, path: str) -> None:
+		if not await anyio.Path(path).exists():
+			return
+		try:
+			async with await anyio.open_file(path, 'r') as f:
+				data = json.loads(await f.read())
+			for domain, samples in data.get('domains', {}).items():
+				self.samples[domain] = deque(
+					(SettleSample(settle_time, max_gap) for settle_time, max_gap in samples), maxlen=MAX_SAMPLES_PER_DOMAIN
+				)
+			logger.debug(f'⏱️  Loaded settle timings of {len(self.samples)} domains from {path}')
+		except Exception as e:
+			logger.warning(f'❌  Failed to load settle timings: {str(e)}')
+
+	async def save(self, path: str) -> None:
+		try:
+			dirname = os.path.dirname(path)
+			if dirname:
+				os.makedirs(dirname, exist_ok=True)
+			data = {
+				'domains': {
+					domain: [[round(sample.settle_time, 3), round(sample.max_gap, 3)] for sample in samples]
+					for domain, samples in self.samples.items()
+				}
+			}
+			self.unsaved_samples = 0
+			async with await anyio.open_file(path, 'w') as f:
+				await f.write(json.dumps(data))
+		except Exception as e:
+			logger.warning(f'❌  Failed to save settle timings: {str(e)}')
+
+	def _percentile(self, values: list[float]) -> float:
+		# nearest rank
+		values = sorted(values)
+		return values[min(len(values) - 1, max(0, math.ceil(self.percentile * len(values)) - 1))]
+
+	@staticmethod
+	def _domain(url: str) -> str:
+		return urlparse(url).netloc.lower()
@@ -1,5 +1,6 @@
+import base64
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel
 
@@ -17,15 +18,44 @@ class TabInfo(BaseModel):
 	parent_page_id: int | None = None  # parent page that contains this popup or cross-origin iframe
 
 
+ScreenshotFormat = Literal['png', 'jpeg', 'webp', 'off']
+
+SCREENSHOT_MIME_TYPES: dict[str, str] = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+class _LazyBase64Screenshot:
+	"""
+	Descriptor for BrowserState.screenshot: the base64 string is only encoded from `screenshot_bytes`
+	the first time it is read (e.g. when the screenshot is sent to a vision model), not for every state.
+	"""
+
+	def __set_name__(self, owner, name):
+		self.attribute_name = f'_{name}_base64'
+
+	def __get__(self, instance, owner=None) -> str | None:
+		if instance is None:
+			return None  # the dataclass field default
+		value = instance.__dict__.get(self.attribute_name)
+		if value is None and instance.screenshot_bytes is not None:
+			value = instance.__dict__[self.attribute_name] = base64.b64encode(instance.screenshot_bytes).decode('utf-8')
+		return value
+
+	def __set__(self, instance, value: str | None) -> None:
+		instance.__dict__[self.attribute_name] = value
+
+
 @dataclass
 class BrowserState(DOMState):
 	url: str
 	title: str
 	tabs: list[TabInfo]
-	screenshot: str | None = None
+	screenshot: str | None = _LazyBase64Screenshot()  # base64 encoded
 	pixels_above: int = 0
 	pixels_below: int = 0
 	browser_errors: list[str] = field(default_factory=list)
+	# raw screenshot, `screenshot` is encoded from it on first access when it is not given
+	screenshot_bytes: bytes | None = field(default=None, kw_only=True, repr=False)
+	screenshot_mime_type: str = field(default='image/png', kw_only=True)
 
 
 @dataclass
@@ -34,7 +34,7 @@ except ImportError:
 	# readline not available on Windows by default
 	READLINE_AVAILABLE = False
 
-from browser_use import Agent, Browser, BrowserConfig, BrowserContextConfig, Controller
+from browser_use import Agent, Browser, BrowserConfig, BrowserContextConfig, BrowserDaemon, Controller
 from browser_use.agent.views import AgentSettings
 from browser_use.logging_config import addLoggingLevel
 
@@ -154,6 +154,8 @@ def update_config_with_click_args(config: dict[str, Any], ctx: click.Context) ->
 		config['model']['name'] = ctx.params['model']
 	if ctx.params.get('headless') is not None:
 		config['browser']['headless'] = ctx.params['headless']
+	if ctx.params.get('daemon') is not None:
+		config['browser']['use_daemon'] = ctx.params['daemon']
 	if ctx.params.get('window_width'):
 		config['browser']['window_width'] = ctx.params['window_width']
 		if 'viewport_width' in config['browser_context']:
@@ -1299,6 +1301,12 @@ async def textual_interface(config: dict[str, Any]):
 @click.option('--headless', is_flag=True, help='Run browser in headless mode', default=None)
 @click.option('--window-width', type=int, help='Browser window width')
 @click.option('--window-height', type=int, help='Browser window height')
+@click.option(
+	'--daemon/--no-daemon',
+	default=None,
+	help='Attach to a long-lived background browser shared by all runs (started on first use) instead of launching one',
+)
+@click.option('--stop-daemon', is_flag=True, help='Stop the background browser started by --daemon and exit')
 @click.pass_context
 def main(ctx: click.Context, debug: bool = False, **kwargs):
 	"""Browser-Use Interactive TUI"""
@@ -1309,6 +1317,11 @@ def main(ctx: click.Context, debug: bool = False, **kwargs):
 		print(version('browser-use'))
 		sys.exit(0)
 
+	if kwargs['stop_daemon']:
+		stopped = asyncio.run(BrowserDaemon().stop())
+		print('Browser daemon stopped' if stopped else 'No browser daemon running')
+		sys.exit(0)
+
 	# Configure console logging
 	console_handler = logging.StreamHandler(sys.stdout)
 	console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%H:%M:%S'))
@@ -0,0 +1,158 @@
+import math
+
+from browser_use.dom.views import DOMBaseNode, DOMBudget, DOMElementNode, DOMTextNode, DOMTruncationReport, SelectorMap
+
+# Interactive elements kept first among elements at the same distance from the viewport
+PRIORITY_TAGS = {'a', 'button', 'input', 'select', 'textarea'}
+
+
+class BudgetProcessor:
+	"""
+	Cuts an extracted tree down to a DOMBudget.
+
+	The tree is split into units: every highlighted element with the nodes up to the next highlighted element
+	(what clickable_elements_to_string prints as its line), and every text node outside of highlighted elements.
+	Units are kept by priority - in the viewport first, then by distance from the viewport and by interactivity,
+	then in document order - together with the units and ancestors enclosing them, as long as the budget allows.
+	"""
+
+	@staticmethod
+	def apply_budget(
+		root: DOMElementNode, selector_map: SelectorMap, budget: DOMBudget
+	) -> tuple[SelectorMap, DOMTruncationReport]:
+		"""Prune `root` in place and return the selector map of the elements that were kept."""
+		# unit: [anchor node, enclosing unit or -1, nodes, text chars, kept]
+		units: list[list] = []
+		unit_of_anchor: dict[int, int] = {}
+		total_nodes = 0
+		total_text_chars = 0
+
+		stack: list[tuple[DOMBaseNode, int]] = [(root, -1)]
+		while stack:
+			node, owner = stack.pop()
+			total_nodes += 1
+
+			if isinstance(node, DOMTextNode):
+				text_chars = len(node.text)
+				total_text_chars += text_chars
+				if owner >= 0:
+					units[owner][2] += 1
+					units[owner][3] += text_chars
+				else:
+					unit_of_anchor[id(node)] = len(units)
+					units.append([node, -1, 1, text_chars, False])
+				continue
+
+			if node.highlight_index is not None and node is not root:
+				unit_of_anchor[id(node)] = len(units)
+				units.append([node, owner, 1, 0, False])
+				owner = len(units) - 1
+			elif owner >= 0:
+				units[owner][2] += 1
+
+			for child in reversed(node.children):
+				stack.append((child, owner))
+
+		# keep units by priority while the budget allows
+		kept_elements = 0
+		kept_nodes = 1
+		kept_text_chars = 0
+		kept_ancestors = {id(root)}
+		for unit_index in sorted(range(len(units)), key=lambda index: BudgetProcessor._priority(units[index], index)):
+			if units[unit_index][4]:
+				continue
+
+			# the unit with its enclosing units that are not kept yet
+			chain = []
+			index = unit_index
+			while index >= 0 and not units[index][4]:
+				chain.append(units[index])
+				index = units[index][1]
+
+			# below a kept unit the ancestors are part of that unit already
+			new_ancestors = []
+			ancestor = chain[-1][0].parent if chain[-1][1] < 0 else None
+			while ancestor is not None and id(ancestor) not in kept_ancestors:
+				new_ancestors.append(ancestor)
+				ancestor = ancestor.parent
+
+			elements = sum(1 for unit in chain if isinstance(unit[0], DOMElementNode))
+			nodes = sum(unit[2] for unit in chain) + len(new_ancestors)
+			text_chars = sum(unit[3] for unit in chain)
+			if (
+				(budget.max_elements is not None and kept_elements + elements > budget.max_elements)
+				or (budget.max_nodes is not None and kept_nodes + nodes > budget.max_nodes)
+				or (budget.max_text_chars is not None and kept_text_chars + text_chars > budget.max_text_chars)
+			):
+				continue
+
+			for unit in chain:
+				unit[4] = True
+				kept_ancestors.add(id(unit[0]))
+			kept_ancestors.update(id(ancestor) for ancestor in new_ancestors)
+			kept_elements += elements
+			kept_nodes += nodes
+			kept_text_chars += text_chars
+
+		report = DOMTruncationReport(
+			total_elements=sum(1 for unit in units if isinstance(unit[0], DOMElementNode)),
+			kept_elements=kept_elements,
+			total_nodes=total_nodes,
+			kept_nodes=kept_nodes,
+			total_text_chars=total_text_chars,
+			kept_text_chars=kept_text_chars,
+		)
+		if not report.is_truncated:
+			return selector_map, report
+
+		# (element, whether it is inside a kept unit)
+		prune_stack: list[tuple[DOMElementNode, bool]] = [(root, False)]
+		while prune_stack:
+			node, inside_kept_unit = prune_stack.pop()
+			children = []
+			for child in node.children:
+				unit_index = unit_of_anchor.get(id(child))
+				if unit_index is not None:
+					if not units[unit_index][4]:
+						continue
+					child_inside_kept_unit = isinstance(child, DOMElementNode)
+				elif inside_kept_unit or id(child) in kept_ancestors:
+					child_inside_kept_unit = inside_kept_unit
+				else:
+					continue
+
+				children.append(child)
+				if isinstance(child, DOMElementNode):
+					prune_stack.append((child, child_inside_kept_unit))
+			node.children = children
+
+		kept_selector_map = {
+			highlight_index: element_node
+			for highlight_index, element_node in selector_map.items()
+			if element_node is root or id(element_node) in kept_ancestors
+		}
+		return kept_selector_map, report
+
+	@staticmethod
+	def _priority(unit: list, index: int) -> tuple[int, float, int, int]:
+		"""(outside of the viewport, distance from the viewport, interactivity, document order), lowest first"""
+		node = unit[0]
+		if isinstance(node, DOMTextNode):
+			# text nodes are only visible inside the (expanded) viewport
+			return (0, 0, 2, index) if node.is_visible else (1, math.inf, 2, index)
+
+		interactivity = 0 if node.tag_name in PRIORITY_TAGS or 'role' in node.attributes else 1
+		distance = BudgetProcessor._distance_from_viewport(node)
+		if distance is None:
+			return (0, 0, interactivity, index) if node.is_in_viewport else (1, math.inf, interactivity, index)
+		return (0 if distance == 0 else 1, distance, interactivity, index)
+
+	@staticmethod
+	def _distance_from_viewport(element: DOMElementNode) -> float | None:
+		coordinates = element.viewport_coordinates
+		viewport = element.viewport_info
+		if coordinates is None or viewport is None:
+			return None
+		dx = max(0, -coordinates.bottom_right.x, coordinates.top_left.x - viewport.width)
+		dy = max(0, -coordinates.bottom_right.y, coordinates.top_left.y - viewport.height)
+		return math.hypot(dx, dy)
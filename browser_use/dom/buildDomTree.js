@@ -4,10 +4,26 @@
     focusHighlightIndex: -1,
     viewportExpansion: 0,
     debugMode: false,
+    incremental: false,
+    incrementalToken: null,
+    columnar: false,
+    returnHighlightRects: false,
+    maxNodes: null,
+    maxElements: null,
   }
 ) => {
   const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode } = args;
+  const incremental = args.incremental || false;
+  const incrementalToken = args.incrementalToken || null;
+  const columnar = args.columnar || false;
+  const returnHighlightRects = args.returnHighlightRects || false;
+  // DOMBudget of the caller: once the walk holds maxNodes nodes or maxElements highlighted elements, elements
+  // outside of the viewport are skipped with their subtree. The budget itself is applied in Python.
+  const maxNodes = args.maxNodes ?? null;
+  const maxElements = args.maxElements ?? null;
   let highlightIndex = 0; // Reset highlight index
+  let walkedNodes = 0;
+  let walkStopped = false;
 
   // Add timing stack to handle recursion
   const TIMING_STACK = {
@@ -214,8 +230,8 @@
 
   const HIGHLIGHT_CONTAINER_ID = "playwright-highlight-container";
 
-  // Add a WeakMap cache for XPath strings
-  const xpathCache = new WeakMap();
+  // Viewport boxes of the highlighted elements, drawn onto the screenshot by the caller instead of into the page
+  const HIGHLIGHT_RECTS = {};
 
   // Initialize once and reuse
   const viewportObserver = new IntersectionObserver(
@@ -227,6 +243,107 @@
     { rootMargin: `${viewportExpansion}px` }
   );
 
+  /**
+   * Resident state for incremental extraction.
+   *
+   * Lives on the window between calls (and disappears with it on navigation). It assigns
+   * persistent ids to DOM nodes, remembers the serialized data of every node returned by the
+   * last call, and is marked dirty by a MutationObserver and by scroll/resize events.
+   * The token lets the caller detect that the state was recreated and a full tree is needed.
+   */
+  let INCREMENTAL_STATE = null;
+
+  function isOwnHighlightMutation(record) {
+    const isHighlightNode = (n) => n && (n.id === HIGHLIGHT_CONTAINER_ID || n.className === "playwright-highlight-label");
+    if (record.type === "attributes" && record.attributeName === "browser-user-highlight-id") return true;
+
+    const container = document.getElementById(HIGHLIGHT_CONTAINER_ID);
+    if (container && (record.target === container || container.contains(record.target))) return true;
+
+    if (record.type === "childList") {
+      const touched = [...record.addedNodes, ...record.removedNodes];
+      return touched.length > 0 && touched.every(isHighlightNode);
+    }
+    return false;
+  }
+
+  function observeRootForChanges(root) {
+    if (!INCREMENTAL_STATE || INCREMENTAL_STATE.observedRoots.has(root)) return;
+    INCREMENTAL_STATE.observedRoots.add(root);
+    try {
+      INCREMENTAL_STATE.observer.observe(root, {
+        subtree: true,
+        childList: true,
+        attributes: true,
+        characterData: true,
+      });
+    } catch (e) {
+      // Cross-realm roots we cannot observe simply force a full walk every call
+      INCREMENTAL_STATE.alwaysDirty = true;
+    }
+  }
+
+  function getIncrementalState() {
+    let state = window._browserUseIncrementalState;
+    if (state) return state;
+
+    state = {
+      token: `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`,
+      nodeIds: new WeakMap(),
+      nextId: 0,
+      signatures: new Map(),
+      rootId: null,
+      highlightTargets: [],
+      dirty: true,
+      alwaysDirty: false,
+      lastCallKey: null,
+      observedRoots: new WeakSet(),
+      observer: null,
+    };
+    state.observer = new MutationObserver((records) => {
+      if (records.some((record) => !isOwnHighlightMutation(record))) {
+        state.dirty = true;
+      }
+    });
+    const markDirty = () => { state.dirty = true; };
+    window.addEventListener("scroll", markDirty, { capture: true, passive: true });
+    window.addEventListener("resize", markDirty, { passive: true });
+
+    window._browserUseIncrementalState = state;
+    return state;
+  }
+
+  function getPersistentNodeId(node) {
+    let id = INCREMENTAL_STATE.nodeIds.get(node);
+    if (id === undefined) {
+      id = `${INCREMENTAL_STATE.nextId++}`;
+      INCREMENTAL_STATE.nodeIds.set(node, id);
+    }
+    return id;
+  }
+
+  if (incremental) {
+    INCREMENTAL_STATE = getIncrementalState();
+    observeRootForChanges(document);
+
+    // Flush records that are queued but not yet delivered to the observer callback
+    if (INCREMENTAL_STATE.observer.takeRecords().some((record) => !isOwnHighlightMutation(record))) {
+      INCREMENTAL_STATE.dirty = true;
+    }
+
+    const callKey = JSON.stringify([
+      viewportExpansion,
+      window.innerWidth,
+      window.innerHeight,
+      window.scrollX,
+      window.scrollY,
+    ]);
+    if (callKey !== INCREMENTAL_STATE.lastCallKey) {
+      INCREMENTAL_STATE.dirty = true;
+      INCREMENTAL_STATE.lastCallKey = callKey;
+    }
+  }
+
   /**
    * Highlights an element in the DOM and returns the index of the next element.
    */
@@ -487,11 +604,10 @@
   }
 
   /**
-   * Returns an XPath tree string for an element.
+   * Returns an XPath tree string for an element by walking up to its root.
+   * The traversal only uses it for its starting point, it passes xpaths down with getChildXPaths.
    */
   function getXPathTree(element, stopAtBoundary = true) {
-    if (xpathCache.has(element)) return xpathCache.get(element);
-    
     const segments = [];
     let currentElement = element;
 
@@ -513,9 +629,46 @@
       currentElement = currentElement.parentNode;
     }
 
-    const result = segments.join("/");
-    xpathCache.set(element, result);
-    return result;
+    return segments.join("/");
+  }
+
+  /**
+   * Returns the XPaths of the element children of a parent (element, shadow root or document) from the XPath
+   * of the parent, numbered like getElementPosition, in one pass over the children.
+   */
+  function getChildXPaths(parent, parentXPath) {
+    const childXPaths = new Map();
+    const children = parent.children;
+    if (!children || children.length === 0) return childXPaths;
+
+    // getXPathTree stops below a shadow root, its children have an empty XPath
+    if (parent instanceof ShadowRoot) {
+      for (const child of children) childXPaths.set(child, "");
+      return childXPaths;
+    }
+
+    // children of documents have no parentElement, so no position (see getElementPosition)
+    const isElementParent = parent.nodeType === Node.ELEMENT_NODE;
+    const tagCounts = new Map();
+    if (isElementParent) {
+      for (const child of children) {
+        const tagName = child.nodeName.toLowerCase();
+        tagCounts.set(tagName, (tagCounts.get(tagName) || 0) + 1);
+      }
+    }
+
+    const tagPositions = new Map();
+    for (const child of children) {
+      const tagName = child.nodeName.toLowerCase();
+      let segment = tagName;
+      if (isElementParent && tagCounts.get(tagName) > 1) {
+        const position = (tagPositions.get(tagName) || 0) + 1;
+        tagPositions.set(tagName, position);
+        segment = `${tagName}[${position}]`;
+      }
+      childXPaths.set(child, parentXPath ? `${parentXPath}/${segment}` : segment);
+    }
+    return childXPaths;
   }
 
   /**
@@ -1100,6 +1253,33 @@
   }
   // --- End distinct interaction check ---
 
+  function getViewportInfo() {
+    return { scrollX: window.scrollX, scrollY: window.scrollY, width: window.innerWidth, height: window.innerHeight };
+  }
+
+  /**
+   * Records the viewport box (union of the client rects) of a highlighted element, like highlightElement would draw it.
+   */
+  function collectHighlightRect(element, index, parentIframe) {
+    let left = Infinity, top = Infinity, right = -Infinity, bottom = -Infinity;
+    for (const rect of element.getClientRects()) {
+      if (rect.width === 0 || rect.height === 0) continue;
+      left = Math.min(left, rect.left);
+      top = Math.min(top, rect.top);
+      right = Math.max(right, rect.right);
+      bottom = Math.max(bottom, rect.bottom);
+    }
+    if (left === Infinity) return;
+
+    let offsetX = 0, offsetY = 0;
+    if (parentIframe) {
+      const iframeRect = parentIframe.getBoundingClientRect();
+      offsetX = iframeRect.left;
+      offsetY = iframeRect.top;
+    }
+    HIGHLIGHT_RECTS[index] = [left + offsetX, top + offsetY, right - left, bottom - top];
+  }
+
   /**
    * Handles the logic for deciding whether to highlight an element and performing the highlight.
    */
@@ -1128,6 +1308,12 @@
       // regardless of viewport status
       if (nodeData.isInViewport || viewportExpansion === -1) {
         nodeData.highlightIndex = highlightIndex++;
+        if (INCREMENTAL_STATE) {
+          INCREMENTAL_STATE.highlightTargets.push([node, nodeData.highlightIndex, parentIframe]);
+        }
+        if (returnHighlightRects) {
+          collectHighlightRect(node, nodeData.highlightIndex, parentIframe);
+        }
 
         if (doHighlightElements) {
           if (focusHighlightIndex >= 0) {
@@ -1147,10 +1333,23 @@
     return false; // Did not highlight
   }
 
+  /**
+   * Whether the walk already holds the nodes or elements of the budget and `element` lies outside of the
+   * viewport. Elements without a box (e.g. display: contents) are walked, their children may be anywhere.
+   */
+  function isOverBudget(element) {
+    if ((maxNodes === null || walkedNodes < maxNodes) && (maxElements === null || highlightIndex < maxElements)) {
+      return false;
+    }
+    const rect = getCachedBoundingRect(element);
+    if (!rect || (rect.width === 0 && rect.height === 0)) return false;
+    return rect.bottom < 0 || rect.top > window.innerHeight || rect.right < 0 || rect.left > window.innerWidth;
+  }
+
   /**
    * Creates a node data object for a given node and its descendants.
    */
-  function buildDomTree(node, parentIframe = null, isParentHighlighted = false) {
+  function buildDomTree(node, parentIframe = null, isParentHighlighted = false, xpath = null) {
     // Fast rejection checks first
     if (!node || node.id === HIGHLIGHT_CONTAINER_ID || 
         (node.nodeType !== Node.ELEMENT_NODE && node.nodeType !== Node.TEXT_NODE)) {
@@ -1175,12 +1374,13 @@
       };
 
       // Process children of body
+      const childXPaths = getChildXPaths(node, getXPathTree(node, true));
       for (const child of node.childNodes) {
-        const domElement = buildDomTree(child, parentIframe, false); // Body's children have no highlighted parent initially
+        const domElement = buildDomTree(child, parentIframe, false, childXPaths.get(child)); // Body's children have no highlighted parent initially
         if (domElement) nodeData.children.push(domElement);
       }
 
-      const id = `${ID.current++}`;
+      const id = INCREMENTAL_STATE ? getPersistentNodeId(node) : `${ID.current++}`;
       DOM_HASH_MAP[id] = nodeData;
       if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
       return id;
@@ -1207,7 +1407,8 @@
         return null;
       }
 
-      const id = `${ID.current++}`;
+      walkedNodes++;
+      const id = INCREMENTAL_STATE ? getPersistentNodeId(node) : `${ID.current++}`;
       DOM_HASH_MAP[id] = {
         type: "TEXT_NODE",
         text: textContent,
@@ -1223,10 +1424,17 @@
       return null;
     }
 
+    // display:none hides the whole subtree, nothing below can be visible or highlighted (collapsed menus, closed
+    // dialogs...). Subtrees with a file input are kept, the upload actions find hidden inputs behind styled labels.
+    const style = getCachedComputedStyle(node);
+    if (style && style.display === 'none' && !node.matches('input[type=file]') && !node.querySelector('input[type=file]')) {
+      if (debugMode) PERF_METRICS.nodeMetrics.skippedNodes++;
+      return null;
+    }
+
     // Early viewport check - only filter out elements clearly outside viewport
     if (viewportExpansion !== -1) {
       const rect = getCachedBoundingRect(node); // Keep for initial quick check
-      const style = getCachedComputedStyle(node);
 
       // Skip viewport check for fixed/sticky elements as they may appear anywhere
       const isFixedOrSticky = style && (style.position === 'fixed' || style.position === 'sticky');
@@ -1248,11 +1456,18 @@
       }
     }
 
+    if (isOverBudget(node)) {
+      walkStopped = true;
+      if (debugMode) PERF_METRICS.nodeMetrics.skippedNodes++;
+      return null;
+    }
+    walkedNodes++;
+
     // Process element node
     const nodeData = {
       tagName: node.tagName.toLowerCase(),
       attributes: {},
-      xpath: getXPathTree(node, true),
+      xpath: xpath ?? getXPathTree(node, true),
       children: [],
     };
 
@@ -1287,8 +1502,10 @@
         try {
           const iframeDoc = node.contentDocument || node.contentWindow?.document;
           if (iframeDoc) {
+            observeRootForChanges(iframeDoc);
+            const childXPaths = getChildXPaths(iframeDoc, "");
             for (const child of iframeDoc.childNodes) {
-              const domElement = buildDomTree(child, node, false);
+              const domElement = buildDomTree(child, node, false, childXPaths.get(child));
               if (domElement) nodeData.children.push(domElement);
             }
           }
@@ -1305,8 +1522,9 @@
         (tagName === "body" && node.getAttribute("data-id")?.startsWith("mce_"))
       ) {
         // Process all child nodes to capture formatted text
+        const childXPaths = getChildXPaths(node, nodeData.xpath);
         for (const child of node.childNodes) {
-          const domElement = buildDomTree(child, parentIframe, nodeWasHighlighted);
+          const domElement = buildDomTree(child, parentIframe, nodeWasHighlighted, childXPaths.get(child));
           if (domElement) nodeData.children.push(domElement);
         }
       }
@@ -1314,16 +1532,19 @@
         // Handle shadow DOM
         if (node.shadowRoot) {
           nodeData.shadowRoot = true;
+          observeRootForChanges(node.shadowRoot);
+          const shadowXPaths = getChildXPaths(node.shadowRoot, nodeData.xpath);
           for (const child of node.shadowRoot.childNodes) {
-            const domElement = buildDomTree(child, parentIframe, nodeWasHighlighted);
+            const domElement = buildDomTree(child, parentIframe, nodeWasHighlighted, shadowXPaths.get(child));
             if (domElement) nodeData.children.push(domElement);
           }
         }
         // Handle regular elements
+        const childXPaths = getChildXPaths(node, nodeData.xpath);
         for (const child of node.childNodes) {
           // Pass the highlighted status of the *current* node to its children
           const passHighlightStatusToChild = nodeWasHighlighted || isParentHighlighted;
-          const domElement = buildDomTree(child, parentIframe, passHighlightStatusToChild);
+          const domElement = buildDomTree(child, parentIframe, passHighlightStatusToChild, childXPaths.get(child));
           if (domElement) nodeData.children.push(domElement);
         }
       }
@@ -1335,7 +1556,7 @@
       return null;
     }
 
-    const id = `${ID.current++}`;
+    const id = INCREMENTAL_STATE ? getPersistentNodeId(node) : `${ID.current++}`;
     DOM_HASH_MAP[id] = nodeData;
     if (debugMode) PERF_METRICS.nodeMetrics.processedNodes++;
     return id;
@@ -1351,11 +1572,147 @@
   isTextNodeVisible = measureTime(isTextNodeVisible);
   getEffectiveScroll = measureTime(getEffectiveScroll);
 
+  // Bits of the `flags` column of the columnar encoding (mirrored in DomService)
+  const COLUMNAR_FLAGS = {
+    isVisible: 1,
+    isInteractive: 2,
+    isTopElement: 4,
+    isInViewport: 8,
+    shadowRoot: 16,
+  };
+
+  /**
+   * Encodes DOM_HASH_MAP as parallel arrays with an interned string table, serialized to a
+   * single JSON string so it crosses the Playwright channel as one value.
+   *
+   * Node ids are dense and assigned in post-order, so the array index is the node id and
+   * children sorted by index are in document order. Only the parent index is sent per node.
+   */
+  function encodeColumnar(rootId) {
+    const strings = [];
+    const stringIndex = new Map();
+    const intern = (value) => {
+      let index = stringIndex.get(value);
+      if (index === undefined) {
+        index = strings.length;
+        strings.push(value);
+        stringIndex.set(value, index);
+      }
+      return index;
+    };
+
+    const count = ID.current;
+    const tags = new Array(count).fill(-1);
+    const texts = new Array(count).fill(-1);
+    const xpaths = new Array(count).fill(null);
+    const parents = new Array(count).fill(-1);
+    const flags = new Array(count).fill(0);
+    const highlightIndices = new Array(count).fill(-1);
+    const attributes = []; // flat [nodeIndex, keyString, valueString, ...]
+
+    for (let id = 0; id < count; id++) {
+      const nodeData = DOM_HASH_MAP[id];
+      if (nodeData.type === "TEXT_NODE") {
+        texts[id] = intern(nodeData.text);
+        flags[id] = nodeData.isVisible ? COLUMNAR_FLAGS.isVisible : 0;
+        continue;
+      }
+
+      tags[id] = intern(nodeData.tagName);
+      xpaths[id] = nodeData.xpath;
+      flags[id] =
+        (nodeData.isVisible ? COLUMNAR_FLAGS.isVisible : 0) |
+        (nodeData.isInteractive ? COLUMNAR_FLAGS.isInteractive : 0) |
+        (nodeData.isTopElement ? COLUMNAR_FLAGS.isTopElement : 0) |
+        (nodeData.isInViewport ? COLUMNAR_FLAGS.isInViewport : 0) |
+        (nodeData.shadowRoot ? COLUMNAR_FLAGS.shadowRoot : 0);
+      if (typeof nodeData.highlightIndex === "number") {
+        highlightIndices[id] = nodeData.highlightIndex;
+      }
+      for (const name in nodeData.attributes) {
+        attributes.push(id, intern(name), intern(nodeData.attributes[name]));
+      }
+      for (const childId of nodeData.children) {
+        parents[Number(childId)] = id;
+      }
+    }
+
+    return JSON.stringify({
+      rootId: Number(rootId),
+      strings,
+      tags,
+      texts,
+      xpaths,
+      parents,
+      flags,
+      highlightIndices,
+      attributes,
+    });
+  }
+
+  // Incremental fast path: nothing relevant happened since the caller's last tree,
+  // so only redraw the highlights (they are removed before every extraction)
+  if (
+    INCREMENTAL_STATE &&
+    incrementalToken === INCREMENTAL_STATE.token &&
+    !INCREMENTAL_STATE.dirty &&
+    !INCREMENTAL_STATE.alwaysDirty
+  ) {
+    if (doHighlightElements) {
+      for (const [element, index, parentIframe] of INCREMENTAL_STATE.highlightTargets) {
+        if (focusHighlightIndex < 0 || focusHighlightIndex === index) {
+          highlightElement(element, index, parentIframe);
+        }
+      }
+      INCREMENTAL_STATE.observer.takeRecords();
+    }
+    const result = { rootId: INCREMENTAL_STATE.rootId, map: {}, token: INCREMENTAL_STATE.token, unchanged: true };
+    if (INCREMENTAL_STATE.walkStopped) {
+      result.walkStopped = true;
+    }
+    if (returnHighlightRects) {
+      for (const [element, index, parentIframe] of INCREMENTAL_STATE.highlightTargets) {
+        collectHighlightRect(element, index, parentIframe);
+      }
+      result.highlightRects = HIGHLIGHT_RECTS;
+      result.viewport = getViewportInfo();
+    }
+    return result;
+  }
+  if (INCREMENTAL_STATE) {
+    INCREMENTAL_STATE.highlightTargets = [];
+  }
+
   const rootId = buildDomTree(document.body);
 
   // Clear the cache before starting
   DOM_CACHE.clearCache();
 
+  // Incremental mode: only ship the nodes whose serialized data changed since the last call
+  let incrementalResult = null;
+  if (INCREMENTAL_STATE) {
+    const isFullTree = incrementalToken !== INCREMENTAL_STATE.token;
+    const signatures = new Map();
+    const changedNodes = {};
+    for (const [id, nodeData] of Object.entries(DOM_HASH_MAP)) {
+      const signature = JSON.stringify(nodeData);
+      signatures.set(id, signature);
+      if (isFullTree || INCREMENTAL_STATE.signatures.get(id) !== signature) {
+        changedNodes[id] = nodeData;
+      }
+    }
+    const removed = isFullTree ? [] : [...INCREMENTAL_STATE.signatures.keys()].filter((id) => !signatures.has(id));
+
+    INCREMENTAL_STATE.signatures = signatures;
+    INCREMENTAL_STATE.rootId = rootId;
+    INCREMENTAL_STATE.walkStopped = walkStopped;
+    INCREMENTAL_STATE.dirty = false;
+    // Our own highlight overlays must not mark the state dirty for the next call
+    INCREMENTAL_STATE.observer.takeRecords();
+
+    incrementalResult = { rootId, map: changedNodes, token: INCREMENTAL_STATE.token, full: isFullTree, removed };
+  }
+
   // Only process metrics in debug mode
   if (debugMode && PERF_METRICS) {
     // Convert timings to seconds and add useful derived metrics
@@ -1406,7 +1763,20 @@
     }
   }
 
-  return debugMode ?
-    { rootId, map: DOM_HASH_MAP, perfMetrics: PERF_METRICS } :
-    { rootId, map: DOM_HASH_MAP };
+  let result;
+  if (incrementalResult) {
+    result = incrementalResult;
+  } else if (columnar) {
+    result = { rootId, columnar: encodeColumnar(rootId) };
+  } else {
+    result = { rootId, map: DOM_HASH_MAP };
+  }
+  if (returnHighlightRects) {
+    result.highlightRects = HIGHLIGHT_RECTS;
+    result.viewport = getViewportInfo();
+  }
+  if (walkStopped) {
+    result.walkStopped = true;
+  }
+  return debugMode ? { ...result, perfMetrics: PERF_METRICS } : result;
 };
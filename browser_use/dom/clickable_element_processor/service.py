@@ -1,5 +1,6 @@
-import hashlib
+from collections.abc import Iterator
 
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
 from browser_use.dom.views import DOMElementNode
 
 
@@ -7,64 +8,32 @@ class ClickableElementProcessor:
 	@staticmethod
 	def get_clickable_elements_hashes(dom_element: DOMElementNode) -> set[str]:
 		"""Get all clickable elements in the DOM tree"""
-		clickable_elements = ClickableElementProcessor.get_clickable_elements(dom_element)
-		return {ClickableElementProcessor.hash_dom_element(element) for element in clickable_elements}
+		return {
+			ClickableElementProcessor.hash_dom_element(element)
+			for element in ClickableElementProcessor.iter_clickable_elements(dom_element)
+		}
 
 	@staticmethod
 	def get_clickable_elements(dom_element: DOMElementNode) -> list[DOMElementNode]:
 		"""Get all clickable elements in the DOM tree"""
-		clickable_elements = list()
-		for child in dom_element.children:
-			if isinstance(child, DOMElementNode):
-				if child.highlight_index:
-					clickable_elements.append(child)
+		return list(ClickableElementProcessor.iter_clickable_elements(dom_element))
 
-				clickable_elements.extend(ClickableElementProcessor.get_clickable_elements(child))
+	@staticmethod
+	def iter_clickable_elements(dom_element: DOMElementNode) -> Iterator[DOMElementNode]:
+		"""Yield the clickable elements below `dom_element` in document order, in a single iterative pass"""
+		stack = [child for child in reversed(dom_element.children) if isinstance(child, DOMElementNode)]
+		while stack:
+			element = stack.pop()
+			if element.highlight_index:
+				yield element
 
-		return list(clickable_elements)
+			stack.extend(child for child in reversed(element.children) if isinstance(child, DOMElementNode))
 
 	@staticmethod
 	def hash_dom_element(dom_element: DOMElementNode) -> str:
-		parent_branch_path = ClickableElementProcessor._get_parent_branch_path(dom_element)
-		branch_path_hash = ClickableElementProcessor._parent_branch_path_hash(parent_branch_path)
-		attributes_hash = ClickableElementProcessor._attributes_hash(dom_element.attributes)
-		xpath_hash = ClickableElementProcessor._xpath_hash(dom_element.xpath)
+		hashed_dom_element = dom_element.hash
 		# text_hash = DomTreeProcessor._text_hash(dom_element)
 
-		return ClickableElementProcessor._hash_string(f'{branch_path_hash}-{attributes_hash}-{xpath_hash}')
-
-	@staticmethod
-	def _get_parent_branch_path(dom_element: DOMElementNode) -> list[str]:
-		parents: list[DOMElementNode] = []
-		current_element: DOMElementNode = dom_element
-		while current_element.parent is not None:
-			parents.append(current_element)
-			current_element = current_element.parent
-
-		parents.reverse()
-
-		return [parent.tag_name for parent in parents]
-
-	@staticmethod
-	def _parent_branch_path_hash(parent_branch_path: list[str]) -> str:
-		parent_branch_path_string = '/'.join(parent_branch_path)
-		return hashlib.sha256(parent_branch_path_string.encode()).hexdigest()
-
-	@staticmethod
-	def _attributes_hash(attributes: dict[str, str]) -> str:
-		attributes_string = ''.join(f'{key}={value}' for key, value in attributes.items())
-		return ClickableElementProcessor._hash_string(attributes_string)
-
-	@staticmethod
-	def _xpath_hash(xpath: str) -> str:
-		return ClickableElementProcessor._hash_string(xpath)
-
-	@staticmethod
-	def _text_hash(dom_element: DOMElementNode) -> str:
-		""" """
-		text_string = dom_element.get_all_text_till_next_clickable_element()
-		return ClickableElementProcessor._hash_string(text_string)
-
-	@staticmethod
-	def _hash_string(string: str) -> str:
-		return hashlib.sha256(string.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(
+			f'{hashed_dom_element.branch_path_hash}-{hashed_dom_element.attributes_hash}-{hashed_dom_element.xpath_hash}'
+		)
@@ -1,7 +1,22 @@
-import hashlib
+from dataclasses import dataclass, field
 
 from browser_use.dom.history_tree_processor.view import DOMHistoryElement, HashedDomElement
-from browser_use.dom.views import DOMElementNode
+from browser_use.dom.views import DOMElementNode, DOMState
+
+# Branch path hash of a root element (empty path), see HistoryTreeProcessor._extend_branch_path_hash
+ROOT_BRANCH_PATH_HASH = 0
+
+
+@dataclass
+class DOMElementIndex:
+	"""
+	Highlighted elements of a tree indexed by their hash, built once per state so that looking up
+	history elements (e.g. for every action of a replayed step) does not walk and hash the tree again.
+	"""
+
+	by_hash: dict[HashedDomElement, DOMElementNode] = field(default_factory=dict)
+	by_xpath: dict[str, list[DOMElementNode]] = field(default_factory=dict)
+	by_attributes_hash: dict[str, list[DOMElementNode]] = field(default_factory=dict)
 
 
 class HistoryTreeProcessor:
@@ -9,6 +24,7 @@ class HistoryTreeProcessor:
 	Operations on the DOM elements
 
 	@dev be careful - text nodes can change even if elements stay the same
+	@dev hashes use the builtin (non-cryptographic, per-process salted) hash, only compare hashes computed in the same process
 	"""
 
 	@staticmethod
@@ -32,28 +48,66 @@ class HistoryTreeProcessor:
 
 	@staticmethod
 	def find_history_element_in_tree(dom_history_element: DOMHistoryElement, tree: DOMElementNode) -> DOMElementNode | None:
-		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
+		return HistoryTreeProcessor.find_history_element_in_index(
+			dom_history_element, HistoryTreeProcessor.build_element_index(tree)
+		)
 
-		def process_node(node: DOMElementNode):
+	@staticmethod
+	def find_history_element_in_state(
+		dom_history_element: DOMHistoryElement, state: DOMState, fuzzy: bool = False
+	) -> DOMElementNode | None:
+		"""Like find_history_element_in_tree, but the index of the state's tree is built once and kept on the state."""
+		if state.element_index is None:
+			state.element_index = HistoryTreeProcessor.build_element_index(state.element_tree)
+		return HistoryTreeProcessor.find_history_element_in_index(dom_history_element, state.element_index, fuzzy=fuzzy)
+
+	@staticmethod
+	def build_element_index(tree: DOMElementNode) -> DOMElementIndex:
+		index = DOMElementIndex()
+		stack = [tree]
+		while stack:
+			node = stack.pop()
 			if node.highlight_index is not None:
-				hashed_node = HistoryTreeProcessor._hash_dom_element(node)
-				if hashed_node == hashed_dom_history_element:
-					return node
-			for child in node.children:
-				if isinstance(child, DOMElementNode):
-					result = process_node(child)
-					if result is not None:
-						return result
-			return None
+				hashed_node = node.hash
+				# first element in document order wins, like a walk of the tree would
+				index.by_hash.setdefault(hashed_node, node)
+				index.by_xpath.setdefault(node.xpath, []).append(node)
+				index.by_attributes_hash.setdefault(hashed_node.attributes_hash, []).append(node)
+			stack.extend(child for child in reversed(node.children) if isinstance(child, DOMElementNode))
+		return index
 
-		return process_node(tree)
+	@staticmethod
+	def find_history_element_in_index(
+		dom_history_element: DOMHistoryElement, index: DOMElementIndex, fuzzy: bool = False
+	) -> DOMElementNode | None:
+		"""
+		Exact lookup by hash. With `fuzzy`, fall back to the only element that still matches two of
+		branch path, attributes and xpath (e.g. a changed class name or an element moved to another container).
+		"""
+		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
+		node = index.by_hash.get(hashed_dom_history_element)
+		if node is not None or not fuzzy:
+			return node
+
+		candidates = {
+			id(candidate): candidate
+			for candidate in index.by_xpath.get(dom_history_element.xpath, [])
+			+ index.by_attributes_hash.get(hashed_dom_history_element.attributes_hash, [])
+		}
+		matches = [
+			candidate
+			for candidate in candidates.values()
+			if (candidate.hash.branch_path_hash == hashed_dom_history_element.branch_path_hash)
+			+ (candidate.hash.attributes_hash == hashed_dom_history_element.attributes_hash)
+			+ (candidate.hash.xpath_hash == hashed_dom_history_element.xpath_hash)
+			>= 2
+		]
+		return matches[0] if len(matches) == 1 else None
 
 	@staticmethod
 	def compare_history_element_and_dom_element(dom_history_element: DOMHistoryElement, dom_element: DOMElementNode) -> bool:
 		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
-		hashed_dom_element = HistoryTreeProcessor._hash_dom_element(dom_element)
-
-		return hashed_dom_history_element == hashed_dom_element
+		return hashed_dom_history_element == dom_element.hash
 
 	@staticmethod
 	def _hash_dom_history_element(dom_history_element: DOMHistoryElement) -> HashedDomElement:
@@ -65,8 +119,8 @@ class HistoryTreeProcessor:
 
 	@staticmethod
 	def _hash_dom_element(dom_element: DOMElementNode) -> HashedDomElement:
-		parent_branch_path = HistoryTreeProcessor._get_parent_branch_path(dom_element)
-		branch_path_hash = HistoryTreeProcessor._parent_branch_path_hash(parent_branch_path)
+		"""Use `dom_element.hash` instead, it is cached on the element."""
+		branch_path_hash = HistoryTreeProcessor._format_hash(dom_element.branch_path_hash)
 		attributes_hash = HistoryTreeProcessor._attributes_hash(dom_element.attributes)
 		xpath_hash = HistoryTreeProcessor._xpath_hash(dom_element.xpath)
 		# text_hash = DomTreeProcessor._text_hash(dom_element)
@@ -87,20 +141,34 @@ class HistoryTreeProcessor:
 
 	@staticmethod
 	def _parent_branch_path_hash(parent_branch_path: list[str]) -> str:
-		parent_branch_path_string = '/'.join(parent_branch_path)
-		return hashlib.sha256(parent_branch_path_string.encode()).hexdigest()
+		branch_path_hash = ROOT_BRANCH_PATH_HASH
+		for tag_name in parent_branch_path:
+			branch_path_hash = HistoryTreeProcessor._extend_branch_path_hash(branch_path_hash, tag_name)
+		return HistoryTreeProcessor._format_hash(branch_path_hash)
+
+	@staticmethod
+	def _extend_branch_path_hash(parent_branch_path_hash: int, tag_name: str) -> int:
+		"""Branch path hash of a child, computed from its parent's so that a tree can be hashed top-down in O(n)."""
+		return hash((parent_branch_path_hash, tag_name))
 
 	@staticmethod
 	def _attributes_hash(attributes: dict[str, str]) -> str:
-		attributes_string = ''.join(f'{key}={value}' for key, value in attributes.items())
-		return hashlib.sha256(attributes_string.encode()).hexdigest()
+		return HistoryTreeProcessor._format_hash(hash(tuple(attributes.items())))
 
 	@staticmethod
 	def _xpath_hash(xpath: str) -> str:
-		return hashlib.sha256(xpath.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(xpath)
 
 	@staticmethod
 	def _text_hash(dom_element: DOMElementNode) -> str:
 		""" """
 		text_string = dom_element.get_all_text_till_next_clickable_element()
-		return hashlib.sha256(text_string.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(text_string)
+
+	@staticmethod
+	def _hash_string(string: str) -> str:
+		return HistoryTreeProcessor._format_hash(hash(string))
+
+	@staticmethod
+	def _format_hash(value: int) -> str:
+		return f'{value & 0xFFFFFFFFFFFFFFFF:016x}'
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from pydantic import BaseModel
 
 
-@dataclass
+@dataclass(frozen=True)
 class HashedDomElement:
 	"""
 	Hash of the dom element to be used as a unique identifier
@@ -29,6 +29,19 @@ class CoordinateSet(BaseModel):
 	width: int
 	height: int
 
+	@classmethod
+	def from_rect(cls, x: float, y: float, width: float, height: float) -> 'CoordinateSet':
+		left, top, right, bottom = round(x), round(y), round(x + width), round(y + height)
+		return cls(
+			top_left=Coordinates(x=left, y=top),
+			top_right=Coordinates(x=right, y=top),
+			bottom_left=Coordinates(x=left, y=bottom),
+			bottom_right=Coordinates(x=right, y=bottom),
+			center=Coordinates(x=round(x + width / 2), y=round(y + height / 2)),
+			width=right - left,
+			height=bottom - top,
+		)
+
 
 class ViewportInfo(BaseModel):
 	scroll_x: int
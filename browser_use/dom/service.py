@@ -1,24 +1,74 @@
+import asyncio
+import hashlib
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from importlib import resources
 from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 if TYPE_CHECKING:
-	from playwright.async_api import Page
+	from playwright.async_api import Frame, Page
 
+from browser_use.dom.budget_processor.service import BudgetProcessor
+from browser_use.dom.history_tree_processor.service import ROOT_BRANCH_PATH_HASH, HistoryTreeProcessor
+from browser_use.dom.history_tree_processor.view import CoordinateSet
+from browser_use.dom.history_tree_processor.view import ViewportInfo as PageViewportInfo
+from browser_use.dom.snapshot_processor.service import SNAPSHOT_COMPUTED_STYLES, SnapshotProcessor
 from browser_use.dom.views import (
 	DOMBaseNode,
+	DOMBudget,
 	DOMElementNode,
+	DOMExtractionEngine,
 	DOMState,
 	DOMTextNode,
+	IncrementalDOMCache,
 	SelectorMap,
 )
 from browser_use.utils import time_execution_async
 
 logger = logging.getLogger(__name__)
 
+# buildDomTree.js is read once per process and installed once per document under a versioned global,
+# each call then only ships the arguments and a tiny call expression instead of the whole source.
+BUILD_DOM_TREE_JS = resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
+BUILD_DOM_TREE_VERSION = hashlib.sha1(BUILD_DOM_TREE_JS.encode()).hexdigest()[:12]
+BUILD_DOM_TREE_GLOBAL = '_browserUseBuildDomTree'
+
+INSTALL_BUILD_DOM_TREE_JS = """() => {
+	window.%s = { version: '%s', run: %s };
+}""" % (BUILD_DOM_TREE_GLOBAL, BUILD_DOM_TREE_VERSION, BUILD_DOM_TREE_JS.strip().rstrip(';'))
+
+# Returns null if the document does not have the current version of buildDomTree.js installed (yet)
+CALL_BUILD_DOM_TREE_JS = """(args) => {
+	const buildDomTree = window.%s;
+	if (!buildDomTree || buildDomTree.version !== '%s') return null;
+	return buildDomTree.run(args);
+}""" % (BUILD_DOM_TREE_GLOBAL, BUILD_DOM_TREE_VERSION)
+
+# XPath of an <iframe> element in its own document, computed like getXPathTree in buildDomTree.js
+FRAME_ELEMENT_XPATH_JS = """(element) => {
+	const segments = [];
+	let current = element;
+	while (current && current.nodeType === Node.ELEMENT_NODE) {
+		if (current.parentNode instanceof ShadowRoot) break;
+		const tagName = current.nodeName.toLowerCase();
+		const siblings = current.parentElement
+			? Array.from(current.parentElement.children).filter((sibling) => sibling.nodeName.toLowerCase() === tagName)
+			: [current];
+		segments.unshift(siblings.length > 1 ? `${tagName}[${siblings.indexOf(current) + 1}]` : tagName);
+		current = current.parentNode;
+	}
+	return segments.join('/');
+}"""
+
+# Bits of the `flags` column of the columnar buildDomTree.js result (mirrors COLUMNAR_FLAGS in the JS)
+COLUMNAR_FLAG_VISIBLE = 1
+COLUMNAR_FLAG_INTERACTIVE = 2
+COLUMNAR_FLAG_TOP_ELEMENT = 4
+COLUMNAR_FLAG_IN_VIEWPORT = 8
+COLUMNAR_FLAG_SHADOW_ROOT = 16
+
 
 @dataclass
 class ViewportInfo:
@@ -27,11 +77,21 @@ class ViewportInfo:
 
 
 class DomService:
-	def __init__(self, page: 'Page'):
+	def __init__(
+		self,
+		page: 'Page',
+		incremental_cache: IncrementalDOMCache | None = None,
+		engine: DOMExtractionEngine = 'js',
+	):
 		self.page = page
 		self.xpath_cache = {}
+		# when set, buildDomTree.js keeps a resident agent in the page and only sends changed nodes
+		self.incremental_cache = incremental_cache
+		self.engine = engine
+		# set when buildDomTree.js skipped parts of the page to stay within the budget, see get_clickable_elements
+		self.walk_stopped = False
 
-		self.js_code = resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
+		self.js_code = BUILD_DOM_TREE_JS
 
 	# region - Clickable elements
 	@time_execution_async('--get_clickable_elements')
@@ -40,9 +100,45 @@ class DomService:
 		highlight_elements: bool = True,
 		focus_element: int = -1,
 		viewport_expansion: int = 0,
+		columnar: bool = False,
+		return_highlight_rects: bool = False,
+		include_cross_origin_iframes: bool = False,
+		budget: DOMBudget | None = None,
 	) -> DOMState:
-		element_tree, selector_map = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
-		return DOMState(element_tree=element_tree, selector_map=selector_map)
+		"""
+		return_highlight_rects: set the viewport_coordinates and viewport_info of the highlighted elements,
+		so that highlights can be drawn onto the screenshot instead of into the page (see highlight_elements).
+
+		include_cross_origin_iframes: also extract the frames buildDomTree.js cannot descend into, see _build_frame_trees.
+
+		budget: cut the tree down to these bounds by priority (see BudgetProcessor), the state reports what was left out.
+		buildDomTree.js stops walking the elements outside of the viewport once it holds the nodes or elements of the budget.
+		"""
+		element_tree, selector_map = await self._build_dom_tree(
+			highlight_elements,
+			focus_element,
+			viewport_expansion,
+			columnar,
+			# the boxes of the elements rank them by distance from the viewport
+			return_highlight_rects or budget is not None,
+			include_cross_origin_iframes,
+			budget,
+		)
+		if budget is None:
+			return DOMState(element_tree=element_tree, selector_map=selector_map)
+
+		if self.incremental_cache is not None:
+			# the budget prunes the tree in place, the cached nodes are shared with the earlier and next states
+			element_tree, selector_map = self._copy_tree(element_tree)
+		selector_map, truncation = BudgetProcessor.apply_budget(element_tree, selector_map, budget)
+		truncation.walk_stopped = self.walk_stopped
+		if truncation.is_truncated:
+			logger.debug(
+				f'✂️  DOM budget kept {truncation.kept_elements}/{truncation.total_elements} elements '
+				f'and {truncation.kept_nodes}/{truncation.total_nodes} nodes of {self.page.url}'
+				+ (', elements outside of the viewport were skipped while walking the page' if truncation.walk_stopped else '')
+			)
+		return DOMState(element_tree=element_tree, selector_map=selector_map, truncation=truncation)
 
 	@time_execution_async('--get_cross_origin_iframes')
 	async def get_cross_origin_iframes(self) -> list[str]:
@@ -68,7 +164,12 @@ class DomService:
 		highlight_elements: bool,
 		focus_element: int,
 		viewport_expansion: int,
+		columnar: bool = False,
+		return_highlight_rects: bool = False,
+		include_cross_origin_iframes: bool = False,
+		budget: DOMBudget | None = None,
 	) -> tuple[DOMElementNode, SelectorMap]:
+		self.walk_stopped = False
 		if await self.page.evaluate('1+1') != 2:
 			raise ValueError('The page cannot evaluate javascript code properly')
 
@@ -86,6 +187,9 @@ class DomService:
 				{},
 			)
 
+		if self.engine == 'cdp_snapshot':
+			return await self._build_dom_tree_from_snapshot(viewport_expansion)
+
 		# NOTE: We execute JS code in the browser to extract important DOM information.
 		#       The returned hash map contains information about the DOM tree and the
 		#       relationship between the DOM elements.
@@ -95,29 +199,245 @@ class DomService:
 			'focusHighlightIndex': focus_element,
 			'viewportExpansion': viewport_expansion,
 			'debugMode': debug_mode,
+			'incremental': self.incremental_cache is not None,
+			'incrementalToken': self.incremental_cache.token if self.incremental_cache else None,
+			'columnar': columnar,
+			'returnHighlightRects': return_highlight_rects,
+			'maxNodes': budget.max_nodes if budget else None,
+			'maxElements': budget.max_elements if budget else None,
 		}
 
+		if include_cross_origin_iframes:
+			return await self._build_frame_trees(args)
+
+		eval_page = await self._evaluate_build_dom_tree(self.page, args)
+		root, selector_map = await self._construct_dom_tree(eval_page)
+		if 'highlightRects' in eval_page:
+			self._apply_highlight_rects(selector_map, eval_page['highlightRects'], eval_page['viewport'])
+		return root, selector_map
+
+	async def _evaluate_build_dom_tree(self, frame: 'Page | Frame', args: dict) -> dict:
 		try:
-			eval_page: dict = await self.page.evaluate(self.js_code, args)
+			eval_page: dict | None = await frame.evaluate(CALL_BUILD_DOM_TREE_JS, args)
+			if eval_page is None:
+				# first call in this document (new page, navigation, reload) or outdated version
+				await frame.evaluate(INSTALL_BUILD_DOM_TREE_JS)
+				eval_page = await frame.evaluate(CALL_BUILD_DOM_TREE_JS, args)
 		except Exception as e:
 			logger.error('Error evaluating JavaScript: %s', e)
 			raise
 
+		if eval_page.get('walkStopped'):
+			self.walk_stopped = True
+
 		# Only log performance metrics in debug mode
-		if debug_mode and 'perfMetrics' in eval_page:
+		if args['debugMode'] and 'perfMetrics' in eval_page:
 			logger.debug(
 				'DOM Tree Building Performance Metrics for: %s\n%s',
-				self.page.url,
+				frame.url,
 				json.dumps(eval_page['perfMetrics'], indent=2),
 			)
 
-		return await self._construct_dom_tree(eval_page)
+		return eval_page
+
+	@time_execution_async('--build_frame_trees')
+	async def _build_frame_trees(self, args: dict) -> tuple[DOMElementNode, SelectorMap]:
+		"""
+		Run buildDomTree.js in the page and in every cross-origin iframe concurrently, then stitch the frame trees
+		under their <iframe> nodes. Xpaths stay relative to their frame (like for same-origin iframes), highlight
+		indices of the frames continue after the ones of their parent document.
+
+		Frames are not highlighted in the page, their indices are only known after all frames are extracted
+		(use composite highlights to see them on the screenshot).
+		"""
+		main_frame = self.page.main_frame
+		frames = [frame for frame in self.page.frames if self._is_cross_origin_frame(frame)]
+		frame_args = {
+			**args,
+			'doHighlightElements': False,
+			'focusHighlightIndex': -1,
+			'incremental': False,
+			'incrementalToken': None,
+		}
+
+		main_result, *frame_results = await asyncio.gather(
+			self._evaluate_build_dom_tree(self.page, args),
+			*(self._extract_frame(frame, frame_args) for frame in frames),
+		)
+
+		root, selector_map = await self._construct_dom_tree(main_result)
+		if 'highlightRects' in main_result:
+			self._apply_highlight_rects(selector_map, main_result['highlightRects'], main_result['viewport'])
+
+		# page.frames lists parent frames before their children
+		frame_roots = {main_frame: root}
+		for frame, frame_result in zip(frames, frame_results):
+			if frame_result is None:
+				continue
+			eval_page, iframe_xpath, iframe_box = frame_result
+
+			# same-origin frames are part of their parent's tree, look in the closest extracted ancestor
+			ancestor = frame.parent_frame
+			while ancestor is not None and ancestor not in frame_roots:
+				ancestor = ancestor.parent_frame
+			iframe_node = self._find_iframe_node(frame_roots[ancestor], iframe_xpath) if ancestor is not None else None
+			if iframe_node is None or not iframe_node.is_visible or iframe_box is None:
+				continue
+
+			frame_root, frame_selector_map = await self._construct_dom_tree(eval_page)
+			# <iframe> nodes of a cached tree are copied for every state, the frame is not stitched into earlier states
+			frame_root.parent = iframe_node
+			iframe_node.children = [frame_root]
+			frame_roots[frame] = frame_root
+
+			if 'highlightRects' in eval_page:
+				# frame rects are relative to the frame viewport, composited onto the screenshot of the page
+				self._apply_highlight_rects(
+					frame_selector_map, eval_page['highlightRects'], main_result['viewport'], iframe_box['x'], iframe_box['y']
+				)
+
+			offset = max(selector_map, default=-1) + 1
+			for highlight_index, element_node in frame_selector_map.items():
+				element_node.highlight_index = highlight_index + offset
+				selector_map[element_node.highlight_index] = element_node
+
+		self._hash_branch_paths(root)
+		return root, selector_map
+
+	async def _extract_frame(self, frame: 'Frame', args: dict) -> tuple[dict, str, dict | None] | None:
+		"""buildDomTree.js result of a frame, with the xpath and viewport box of its <iframe> element."""
+		try:
+			iframe_element = await frame.frame_element()
+			return await asyncio.gather(
+				self._evaluate_build_dom_tree(frame, args),
+				iframe_element.evaluate(FRAME_ELEMENT_XPATH_JS),
+				iframe_element.bounding_box(),
+			)
+		except Exception as e:
+			# detached while extracting, navigated, crashed...
+			logger.debug(f'⚠  Failed to extract iframe {frame.url}: {str(e)}')
+			return None
+
+	@staticmethod
+	def _is_cross_origin_frame(frame: 'Frame') -> bool:
+		"""Whether buildDomTree.js cannot access the content document of the frame from its parent."""
+		parent_frame = frame.parent_frame
+		if parent_frame is None or frame.url.startswith('about:'):
+			# about:blank and about:srcdoc frames inherit the origin of their parent
+			return False
+		while parent_frame.parent_frame is not None and parent_frame.url.startswith('about:'):
+			parent_frame = parent_frame.parent_frame
+		frame_url = urlparse(frame.url)
+		parent_url = urlparse(parent_frame.url)
+		return (frame_url.scheme, frame_url.netloc) != (parent_url.scheme, parent_url.netloc)
+
+	@staticmethod
+	def _find_iframe_node(root: DOMElementNode, xpath: str) -> DOMElementNode | None:
+		stack = [root]
+		while stack:
+			node = stack.pop()
+			if node.tag_name == 'iframe' and node.xpath == xpath:
+				# a same-origin frame has its <html> in the tree already, a body is a frame stitched by this call
+				if all(isinstance(child, DOMElementNode) and child.tag_name == 'body' for child in node.children):
+					return node
+			stack.extend(child for child in reversed(node.children) if isinstance(child, DOMElementNode))
+		return None
+
+	@staticmethod
+	def _apply_highlight_rects(
+		selector_map: SelectorMap,
+		highlight_rects: dict[str, list[float]],
+		viewport: dict,
+		offset_x: float = 0,
+		offset_y: float = 0,
+	) -> None:
+		viewport_info = PageViewportInfo(
+			scroll_x=round(viewport['scrollX']),
+			scroll_y=round(viewport['scrollY']),
+			width=viewport['width'],
+			height=viewport['height'],
+		)
+		for highlight_index, element_node in selector_map.items():
+			rect = highlight_rects.get(str(highlight_index))
+			element_node.viewport_coordinates = (
+				CoordinateSet.from_rect(rect[0] + offset_x, rect[1] + offset_y, rect[2], rect[3]) if rect else None
+			)
+			element_node.viewport_info = viewport_info
+
+	@time_execution_async('--build_dom_tree_from_snapshot')
+	async def _build_dom_tree_from_snapshot(self, viewport_expansion: int) -> tuple[DOMElementNode, SelectorMap]:
+		"""
+		Build the tree from one native DOMSnapshot.captureSnapshot call (no highlights are drawn in the page,
+		the boxes of the highlighted elements are always returned).
+		"""
+		cdp_session = await self.page.context.new_cdp_session(self.page)
+		try:
+			snapshot, layout_metrics = await asyncio.gather(
+				cdp_session.send(
+					'DOMSnapshot.captureSnapshot',
+					{'computedStyles': SNAPSHOT_COMPUTED_STYLES, 'includePaintOrder': True, 'includeDOMRects': True},
+				),
+				cdp_session.send('Page.getLayoutMetrics'),
+			)
+		finally:
+			await cdp_session.detach()
+
+		viewport = layout_metrics['cssLayoutViewport']
+		root, selector_map = SnapshotProcessor.build_dom_tree(
+			snapshot, viewport['clientWidth'], viewport['clientHeight'], viewport_expansion
+		)
+		# the boxes of the highlighted elements are set by the SnapshotProcessor, e.g. for compositing the highlights
+		viewport_info = PageViewportInfo(
+			scroll_x=round(viewport['pageX']),
+			scroll_y=round(viewport['pageY']),
+			width=viewport['clientWidth'],
+			height=viewport['clientHeight'],
+		)
+		for element_node in selector_map.values():
+			element_node.viewport_info = viewport_info
+		self._hash_branch_paths(root)
+		return root, selector_map
 
 	@time_execution_async('--construct_dom_tree')
 	async def _construct_dom_tree(
 		self,
 		eval_page: dict,
 	) -> tuple[DOMElementNode, SelectorMap]:
+		if self.incremental_cache is not None and 'token' in eval_page:
+			root, selector_map = self._patch_dom_tree(eval_page, self.incremental_cache)
+		elif 'columnar' in eval_page:
+			root, selector_map = self._decode_columnar_dom_tree(eval_page['columnar'])
+		else:
+			root, selector_map = self._decode_dom_tree_map(eval_page)
+
+		self._hash_branch_paths(root)
+		return root, selector_map
+
+	@staticmethod
+	def _hash_branch_paths(root: DOMElementNode) -> None:
+		"""Compute the branch path hash of every element top-down, invalidating cached hashes of moved elements."""
+		if root._branch_path_hash != ROOT_BRANCH_PATH_HASH:
+			root._branch_path_hash = ROOT_BRANCH_PATH_HASH
+			root._hash = None
+
+		stack = [root]
+		while stack:
+			node = stack.pop()
+			for child in node.children:
+				if not isinstance(child, DOMElementNode):
+					continue
+
+				branch_path_hash = HistoryTreeProcessor._extend_branch_path_hash(node._branch_path_hash, child.tag_name)
+				if child._branch_path_hash != branch_path_hash:
+					child._branch_path_hash = branch_path_hash
+					child._hash = None
+				stack.append(child)
+
+	def _decode_dom_tree_map(
+		self,
+		eval_page: dict,
+	) -> tuple[DOMElementNode, SelectorMap]:
+
 		js_node_map = eval_page['map']
 		js_root_id = eval_page['rootId']
 
@@ -157,6 +477,174 @@ class DomService:
 
 		return html_to_dict, selector_map
 
+	def _decode_columnar_dom_tree(
+		self,
+		payload: str,
+	) -> tuple[DOMElementNode, SelectorMap]:
+		"""Bulk-decode the columnar buildDomTree.js result (parallel arrays + interned string table)."""
+		data = json.loads(payload)
+		strings = data['strings']
+
+		node_attributes: dict[int, dict[str, str]] = {}
+		flat_attributes = data['attributes']
+		for i in range(0, len(flat_attributes), 3):
+			index, key, value = flat_attributes[i : i + 3]
+			node_attributes.setdefault(index, {})[strings[key]] = strings[value]
+
+		selector_map = {}
+		nodes: list[DOMBaseNode] = []
+		for index, (tag, text, xpath, flags, highlight_index) in enumerate(
+			zip(data['tags'], data['texts'], data['xpaths'], data['flags'], data['highlightIndices'])
+		):
+			if tag < 0:
+				nodes.append(
+					DOMTextNode(
+						text=strings[text],
+						is_visible=bool(flags & COLUMNAR_FLAG_VISIBLE),
+						parent=None,
+					)
+				)
+				continue
+
+			element_node = DOMElementNode(
+				tag_name=strings[tag],
+				xpath=xpath,
+				attributes=node_attributes.get(index, {}),
+				children=[],
+				is_visible=bool(flags & COLUMNAR_FLAG_VISIBLE),
+				is_interactive=bool(flags & COLUMNAR_FLAG_INTERACTIVE),
+				is_top_element=bool(flags & COLUMNAR_FLAG_TOP_ELEMENT),
+				is_in_viewport=bool(flags & COLUMNAR_FLAG_IN_VIEWPORT),
+				highlight_index=highlight_index if highlight_index >= 0 else None,
+				shadow_root=bool(flags & COLUMNAR_FLAG_SHADOW_ROOT),
+				parent=None,
+			)
+			nodes.append(element_node)
+			if element_node.highlight_index is not None:
+				selector_map[element_node.highlight_index] = element_node
+
+		# NOTE: Children have lower indices than their parent and are sorted by document order.
+		for child_node, parent_index in zip(nodes, data['parents']):
+			if parent_index < 0:
+				continue
+			parent_node = nodes[parent_index]
+			child_node.parent = parent_node
+			parent_node.children.append(child_node)
+
+		root = nodes[data['rootId']]
+		if not isinstance(root, DOMElementNode):
+			raise ValueError('Failed to parse HTML to dictionary')
+
+		return root, selector_map
+
+	def _patch_dom_tree(
+		self,
+		eval_page: dict,
+		cache: IncrementalDOMCache,
+	) -> tuple[DOMElementNode, SelectorMap]:
+		"""
+		Apply an incremental buildDomTree.js result to the cached tree without touching the trees of earlier states.
+
+		Changed nodes are new objects and their ancestors are copied up to the root, unchanged subtrees are shared
+		with the earlier states and must be treated as read-only. Highlighted elements and iframes are always copied,
+		they get per-state fields (is_new, highlight boxes, stitched frame trees). Shared nodes only get their parent
+		pointed to the copy of their parent in the latest tree.
+		"""
+		if eval_page.get('full') or cache.token != eval_page['token']:
+			cache.reset()
+			cache.token = eval_page['token']
+
+		cache.root_id = str(eval_page['rootId'])
+
+		# ids of the nodes that are new objects in this tree
+		copied_ids = set()
+		if not eval_page.get('unchanged'):
+			for id in eval_page.get('removed', []):
+				cache.node_map.pop(id, None)
+				cache.children_ids.pop(id, None)
+				cache.parent_ids.pop(id, None)
+
+			# NOTE: Persistent ids are not in bottom-up order, so nodes are linked in a second pass.
+			for id, node_data in eval_page['map'].items():
+				node, children_ids = self._parse_node(node_data)
+				if node is None:
+					continue
+
+				cache.node_map[id] = node
+				cache.children_ids[id] = [str(child_id) for child_id in children_ids]
+				for child_id in cache.children_ids[id]:
+					cache.parent_ids[child_id] = id
+				copied_ids.add(id)
+
+		for id, node in cache.node_map.items():
+			if id in copied_ids or not isinstance(node, DOMElementNode):
+				continue
+			if node.highlight_index is not None or node.tag_name == 'iframe':
+				cache.node_map[id] = self._copy_node(node)
+				copied_ids.add(id)
+
+		for id in list(copied_ids):
+			parent_id = cache.parent_ids.get(id)
+			while parent_id is not None and parent_id not in copied_ids and parent_id in cache.node_map:
+				cache.node_map[parent_id] = self._copy_node(cache.node_map[parent_id])
+				copied_ids.add(parent_id)
+				parent_id = cache.parent_ids.get(parent_id)
+
+		for id in copied_ids:
+			node = cache.node_map[id]
+			if not isinstance(node, DOMElementNode):
+				continue
+
+			for child_id in cache.children_ids[id]:
+				child_node = cache.node_map.get(child_id)
+				if child_node is None:
+					continue
+
+				child_node.parent = node
+				node.children.append(child_node)
+
+		root = cache.node_map.get(cache.root_id)
+		if root is None or not isinstance(root, DOMElementNode):
+			cache.reset()
+			raise ValueError('Failed to patch cached DOM tree')
+		root.parent = None
+
+		selector_map = {}
+		for node in cache.node_map.values():
+			if isinstance(node, DOMElementNode) and node.highlight_index is not None:
+				selector_map[node.highlight_index] = node
+
+		return root, selector_map
+
+	@staticmethod
+	def _copy_node(node: DOMBaseNode) -> DOMBaseNode:
+		"""Copy of a node without its children, parent and per-state fields (the hashes are still valid)."""
+		if not isinstance(node, DOMElementNode):
+			return replace(node, parent=None)
+
+		node_copy = replace(node, parent=None, children=[], is_new=None)
+		node_copy._hash = node._hash
+		node_copy._branch_path_hash = node._branch_path_hash
+		return node_copy
+
+	def _copy_tree(self, root: DOMElementNode) -> tuple[DOMElementNode, SelectorMap]:
+		"""Copy of a whole tree, e.g. to prune it without touching the nodes it shares with earlier states."""
+		root_copy = self._copy_node(root)
+		selector_map = {}
+		stack = [(root, root_copy)]
+		while stack:
+			node, node_copy = stack.pop()
+			if node_copy.highlight_index is not None:
+				selector_map[node_copy.highlight_index] = node_copy
+			for child in node.children:
+				child_copy = self._copy_node(child)
+				child_copy.parent = node_copy
+				node_copy.children.append(child_copy)
+				if isinstance(child, DOMElementNode):
+					stack.append((child, child_copy))
+
+		return root_copy, selector_map
+
 	def _parse_node(
 		self,
 		node_data: dict,
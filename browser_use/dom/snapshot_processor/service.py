@@ -0,0 +1,450 @@
+from browser_use.dom.history_tree_processor.view import CoordinateSet
+from browser_use.dom.views import DOMElementNode, DOMTextNode, SelectorMap
+
+# Computed styles requested from DOMSnapshot.captureSnapshot, in this order
+SNAPSHOT_COMPUTED_STYLES = ['display', 'visibility', 'cursor', 'pointer-events']
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+DOCUMENT_FRAGMENT_NODE = 11
+
+# The rules below mirror buildDomTree.js, keep them in sync
+DENIED_TAGS = {'svg', 'script', 'style', 'link', 'meta', 'noscript', 'template'}
+ATTRIBUTE_CANDIDATE_TAGS = {'a', 'button', 'input', 'select', 'textarea', 'details', 'summary'}
+INTERACTIVE_TAGS = {
+	'a',
+	'button',
+	'input',
+	'select',
+	'textarea',
+	'details',
+	'summary',
+	'label',
+	'option',
+	'optgroup',
+	'fieldset',
+	'legend',
+}
+INTERACTIVE_ROLES = {
+	'button',
+	'menuitemradio',
+	'menuitemcheckbox',
+	'radio',
+	'checkbox',
+	'tab',
+	'switch',
+	'slider',
+	'spinbutton',
+	'combobox',
+	'searchbox',
+	'textbox',
+	'option',
+	'scrollbar',
+}
+DISTINCT_INTERACTIVE_TAGS = {'a', 'button', 'input', 'select', 'textarea', 'summary', 'details', 'label', 'option', 'iframe'}
+DISTINCT_INTERACTIVE_ROLES = INTERACTIVE_ROLES | {'link', 'menuitem', 'listbox'}
+INTERACTIVE_CURSORS = {
+	'pointer',
+	'move',
+	'text',
+	'grab',
+	'grabbing',
+	'cell',
+	'copy',
+	'alias',
+	'all-scroll',
+	'col-resize',
+	'context-menu',
+	'crosshair',
+	'e-resize',
+	'ew-resize',
+	'help',
+	'n-resize',
+	'ne-resize',
+	'nesw-resize',
+	'ns-resize',
+	'nw-resize',
+	'nwse-resize',
+	'row-resize',
+	's-resize',
+	'se-resize',
+	'sw-resize',
+	'vertical-text',
+	'w-resize',
+	'zoom-in',
+	'zoom-out',
+}
+NON_INTERACTIVE_CURSORS = {'not-allowed', 'no-drop', 'wait', 'progress', 'initial', 'inherit'}
+DISTINCT_EVENT_ATTRIBUTES = (
+	'onclick',
+	'onmousedown',
+	'onmouseup',
+	'onkeydown',
+	'onkeyup',
+	'onsubmit',
+	'onchange',
+	'oninput',
+	'onfocus',
+	'onblur',
+)
+
+# Size of the cells of the grid used to hit-test the paint order
+HIT_TEST_CELL_SIZE = 128
+
+
+class SnapshotDocument:
+	"""One document (main frame, iframe) of a DOMSnapshot.captureSnapshot result, with its boxes in viewport coordinates."""
+
+	def __init__(self, document: dict, strings: list[str], offset_x: float, offset_y: float, is_main_document: bool):
+		self.strings = strings
+		self.is_main_document = is_main_document
+
+		nodes = document['nodes']
+		self.parent_indices: list[int] = nodes['parentIndex']
+		self.node_types: list[int] = nodes['nodeType']
+		self.node_names: list[str] = [strings[index].lower() if index >= 0 else '' for index in nodes['nodeName']]
+		self.node_values: list[int] = nodes['nodeValue']
+		self.raw_attributes: list[list[int]] = nodes.get('attributes', [])
+		self.clickable: set[int] = set(nodes.get('isClickable', {}).get('index', []))
+		content_documents = nodes.get('contentDocumentIndex', {'index': [], 'value': []})
+		self.content_documents: dict[int, int] = dict(zip(content_documents['index'], content_documents['value']))
+
+		self.children: list[list[int]] = [[] for _ in self.parent_indices]
+		for index, parent_index in enumerate(self.parent_indices):
+			if parent_index >= 0:
+				self.children[parent_index].append(index)
+
+		# Document coordinates -> viewport coordinates
+		self.shift_x = offset_x - document.get('scrollOffsetX', 0)
+		self.shift_y = offset_y - document.get('scrollOffsetY', 0)
+
+		layout = document['layout']
+		self.layout_styles: list[list[int]] = layout['styles']
+		self.layout_bounds: list[list[float]] = layout['bounds']
+		self.layout_node_indices: list[int] = layout['nodeIndex']
+		self.paint_orders: list[int] = layout.get('paintOrders', [])
+		self.layout_of: dict[int, int] = {}
+		for layout_index, node_index in enumerate(self.layout_node_indices):
+			self.layout_of.setdefault(node_index, layout_index)
+
+		self._attributes: dict[int, dict[str, str]] = {}
+		self._xpath_indices: dict[int, dict[int, str]] = {}
+		self._hit_test_grid: dict[tuple[int, int], list[tuple[int, int, float, float, float, float]]] | None = None
+
+	def attributes(self, index: int) -> dict[str, str]:
+		if index not in self._attributes:
+			raw = self.raw_attributes[index] if index < len(self.raw_attributes) else []
+			self._attributes[index] = {self.strings[raw[i]]: self.strings[raw[i + 1]] for i in range(0, len(raw) - 1, 2)}
+		return self._attributes[index]
+
+	def style(self, index: int, style_index: int) -> str:
+		"""Computed style of a node, `style_index` is the position of the property in SNAPSHOT_COMPUTED_STYLES."""
+		layout_index = self.layout_of.get(index)
+		if layout_index is None:
+			return ''
+		return self._style(layout_index, style_index)
+
+	def _style(self, layout_index: int, style_index: int) -> str:
+		styles = self.layout_styles[layout_index]
+		if style_index >= len(styles) or styles[style_index] < 0:
+			return ''
+		return self.strings[styles[style_index]]
+
+	def xpath_index(self, index: int) -> str:
+		"""`[n]` position of an element among the siblings with the same tag, empty if it is the only one."""
+		parent_index = self.parent_indices[index]
+		if parent_index < 0 or self.node_types[parent_index] != ELEMENT_NODE:
+			return ''
+
+		if parent_index not in self._xpath_indices:
+			siblings_by_tag: dict[str, list[int]] = {}
+			for sibling in self.children[parent_index]:
+				if self.node_types[sibling] == ELEMENT_NODE:
+					siblings_by_tag.setdefault(self.node_names[sibling], []).append(sibling)
+			self._xpath_indices[parent_index] = {
+				sibling: f'[{position}]'
+				for siblings in siblings_by_tag.values()
+				if len(siblings) > 1
+				for position, sibling in enumerate(siblings, start=1)
+			}
+		return self._xpath_indices[parent_index].get(index, '')
+
+	def box(self, index: int) -> tuple[float, float, float, float] | None:
+		"""Layout box of a node in viewport coordinates as (left, top, width, height), None if it is not rendered."""
+		layout_index = self.layout_of.get(index)
+		if layout_index is None:
+			return None
+		x, y, width, height = self.layout_bounds[layout_index][:4]
+		return x + self.shift_x, y + self.shift_y, width, height
+
+	def is_top_element(
+		self, index: int, box: tuple[float, float, float, float], viewport_width: float, viewport_height: float
+	) -> bool:
+		"""Paint-order equivalent of `document.elementFromPoint` at the center of the element."""
+		center_x = box[0] + box[2] / 2
+		center_y = box[1] + box[3] / 2
+		if not (0 <= center_x < viewport_width and 0 <= center_y < viewport_height):
+			return False
+
+		grid = self._get_hit_test_grid(viewport_width, viewport_height)
+		top = None
+		for hit in grid.get((int(center_x // HIT_TEST_CELL_SIZE), int(center_y // HIT_TEST_CELL_SIZE)), []):
+			paint_order, layout_index, left, top_y, right, bottom = hit
+			if left <= center_x < right and top_y <= center_y < bottom and (top is None or (paint_order, layout_index) > top[:2]):
+				top = hit
+		if top is None:
+			return False
+
+		current = self.layout_node_indices[top[1]]
+		while current >= 0:
+			if current == index:
+				return True
+			current = self.parent_indices[current]
+		return False
+
+	def _get_hit_test_grid(self, viewport_width: float, viewport_height: float):
+		if self._hit_test_grid is not None:
+			return self._hit_test_grid
+
+		grid: dict[tuple[int, int], list[tuple[int, int, float, float, float, float]]] = {}
+		if self.paint_orders:
+			for layout_index in range(len(self.layout_node_indices)):
+				if self._style(layout_index, 1) == 'hidden' or self._style(layout_index, 3) == 'none':
+					continue  # not a hit-test target
+
+				x, y, width, height = self.layout_bounds[layout_index][:4]
+				left, top = x + self.shift_x, y + self.shift_y
+				right, bottom = left + width, top + height
+				if width <= 0 or height <= 0 or right <= 0 or bottom <= 0 or left >= viewport_width or top >= viewport_height:
+					continue
+
+				hit = (self.paint_orders[layout_index], layout_index, left, top, right, bottom)
+				for cell_x in range(
+					int(max(left, 0) // HIT_TEST_CELL_SIZE), int(min(right, viewport_width - 1) // HIT_TEST_CELL_SIZE) + 1
+				):
+					for cell_y in range(
+						int(max(top, 0) // HIT_TEST_CELL_SIZE), int(min(bottom, viewport_height - 1) // HIT_TEST_CELL_SIZE) + 1
+					):
+						grid.setdefault((cell_x, cell_y), []).append(hit)
+
+		self._hit_test_grid = grid
+		return grid
+
+
+class SnapshotProcessor:
+	"""
+	Builds the DOMElementNode tree from a Chrome DevTools `DOMSnapshot.captureSnapshot` result.
+
+	Same rules as buildDomTree.js (visibility, interactivity, top element, highlight indices, xpaths),
+	but computed from the layout bounds, computed styles and paint order of the snapshot instead of querying
+	every element in the page. The snapshot also contains cross-origin iframes and closed shadow roots.
+	"""
+
+	@staticmethod
+	def build_dom_tree(
+		snapshot: dict,
+		viewport_width: float,
+		viewport_height: float,
+		viewport_expansion: int,
+	) -> tuple[DOMElementNode, SelectorMap]:
+		strings = snapshot['strings']
+		raw_documents = snapshot['documents']
+		main_document = SnapshotDocument(raw_documents[0], strings, 0, 0, is_main_document=True)
+
+		body_index = next(
+			(
+				index
+				for index, name in enumerate(main_document.node_names)
+				if name == 'body' and main_document.node_types[index] == ELEMENT_NODE
+			),
+			None,
+		)
+		root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=False, parent=None)
+		if body_index is None:
+			return root, {}
+
+		selector_map: SelectorMap = {}
+		elements: list[DOMElementNode] = []
+
+		def in_viewport(box: tuple[float, float, float, float] | None) -> bool:
+			if viewport_expansion == -1:
+				return True
+			if box is None or box[2] <= 0 or box[3] <= 0:
+				return False
+			left, top, width, height = box
+			return not (
+				top + height < -viewport_expansion
+				or top > viewport_height + viewport_expansion
+				or left + width < -viewport_expansion
+				or left > viewport_width + viewport_expansion
+			)
+
+		# (document, node index, parent node, xpath of the parent or '' at a shadow root / document boundary,
+		#  whether an ancestor was highlighted)
+		stack: list[tuple[SnapshotDocument, int, DOMElementNode, str, bool]] = []
+
+		def push_children(
+			document: SnapshotDocument, index: int, node: DOMElementNode, xpath: str, highlighted: bool, was_highlighted: bool
+		) -> None:
+			light_children = []
+			shadow_children = []
+			for child_index in document.children[index]:
+				if document.node_types[child_index] == DOCUMENT_FRAGMENT_NODE:
+					node.shadow_root = True
+					shadow_children.extend(document.children[child_index])
+				else:
+					light_children.append(child_index)
+
+			# the stack is LIFO: push light children first so that shadow children come first in the tree
+			for child_index in reversed(light_children):
+				stack.append((document, child_index, node, xpath, highlighted or was_highlighted))
+			for child_index in reversed(shadow_children):
+				stack.append((document, child_index, node, '', was_highlighted))
+
+		push_children(main_document, body_index, root, 'html/body', False, False)
+		documents: dict[int, SnapshotDocument] = {0: main_document}
+
+		while stack:
+			document, index, parent_node, parent_xpath, parent_highlighted = stack.pop()
+			node_type = document.node_types[index]
+
+			if node_type == TEXT_NODE:
+				value_index = document.node_values[index]
+				text = document.strings[value_index].strip() if value_index >= 0 else ''
+				if not text:
+					continue
+				box = document.box(index)
+				is_visible = parent_node.is_visible and (
+					viewport_expansion == -1 or (box is not None and box[2] > 0 and box[3] > 0 and in_viewport(box))
+				)
+				text_node = DOMTextNode(text=text, is_visible=is_visible, parent=parent_node)
+				parent_node.children.append(text_node)
+				continue
+
+			if node_type != ELEMENT_NODE:
+				continue
+
+			tag_name = document.node_names[index]
+			if tag_name in DENIED_TAGS:
+				continue
+
+			attributes = document.attributes(index)
+			segment = tag_name + document.xpath_index(index)
+			xpath = f'{parent_xpath}/{segment}' if parent_xpath else segment
+
+			is_candidate = (
+				tag_name in ATTRIBUTE_CANDIDATE_TAGS
+				or tag_name in ('iframe', 'body')
+				or any(key in attributes for key in ('onclick', 'role', 'tabindex', 'data-action'))
+				or attributes.get('contenteditable') == 'true'
+			)
+			element_node = DOMElementNode(
+				tag_name=tag_name,
+				xpath=xpath,
+				attributes=attributes if is_candidate else {},
+				children=[],
+				is_visible=False,
+				parent=parent_node,
+			)
+			parent_node.children.append(element_node)
+			elements.append(element_node)
+
+			box = document.box(index)
+			display = document.style(index, 0)
+			element_node.is_visible = (
+				box is not None and box[2] > 0 and box[3] > 0 and display != 'none' and document.style(index, 1) != 'hidden'
+			)
+
+			was_highlighted = False
+			if element_node.is_visible:
+				if viewport_expansion == -1 or not document.is_main_document:
+					element_node.is_top_element = in_viewport(box)
+				else:
+					element_node.is_top_element = in_viewport(box) and document.is_top_element(
+						index, box, viewport_width, viewport_height
+					)
+
+				if element_node.is_top_element:
+					element_node.is_interactive = SnapshotProcessor._is_interactive(document, index, tag_name, attributes)
+					if element_node.is_interactive and (
+						not parent_highlighted
+						or SnapshotProcessor._is_distinct_interaction(document, index, tag_name, attributes)
+					):
+						element_node.is_in_viewport = in_viewport(box)
+						if element_node.is_in_viewport:
+							element_node.highlight_index = len(selector_map)
+							element_node.viewport_coordinates = CoordinateSet.from_rect(*box)
+							selector_map[element_node.highlight_index] = element_node
+							was_highlighted = True
+
+			if tag_name == 'iframe':
+				document_index = document.content_documents.get(index)
+				if document_index is not None and document_index < len(raw_documents):
+					if document_index not in documents:
+						documents[document_index] = SnapshotDocument(
+							raw_documents[document_index],
+							strings,
+							box[0] if box else 0,
+							box[1] if box else 0,
+							is_main_document=False,
+						)
+					content_document = documents[document_index]
+					document_node = next(
+						(i for i, parent_index in enumerate(content_document.parent_indices) if parent_index < 0), None
+					)
+					if document_node is not None:
+						for child_index in reversed(content_document.children[document_node]):
+							stack.append((content_document, child_index, element_node, '', False))
+				continue
+
+			push_children(document, index, element_node, xpath, parent_highlighted, was_highlighted)
+
+		# Skip empty anchor tags (children come after their parent in `elements`, so nested ones are removed first)
+		for element_node in reversed(elements):
+			if element_node.tag_name == 'a' and not element_node.children and not element_node.attributes.get('href'):
+				parent = element_node.parent
+				if parent is not None:
+					parent.children.remove(element_node)
+
+		return root, selector_map
+
+	@staticmethod
+	def _is_interactive(document: SnapshotDocument, index: int, tag_name: str, attributes: dict[str, str]) -> bool:
+		cursor = document.style(index, 2)
+		if tag_name != 'html' and cursor in INTERACTIVE_CURSORS:
+			return True
+
+		if tag_name in INTERACTIVE_TAGS:
+			if cursor in NON_INTERACTIVE_CURSORS:
+				return False
+			return not any(key in attributes for key in ('disabled', 'readonly', 'inert'))
+
+		if attributes.get('contenteditable') == 'true':
+			return True
+
+		if (
+			'button' in attributes.get('class', '').split()
+			or 'dropdown-toggle' in attributes.get('class', '').split()
+			or attributes.get('data-index')
+			or attributes.get('data-toggle') == 'dropdown'
+			or attributes.get('aria-haspopup') == 'true'
+		):
+			return True
+
+		if attributes.get('role') in INTERACTIVE_ROLES or attributes.get('aria-role') in INTERACTIVE_ROLES:
+			return True
+
+		# isClickable is set by the browser for elements with mouse event listeners
+		return index in document.clickable or any(
+			key in attributes for key in ('onclick', 'onmousedown', 'onmouseup', 'ondblclick')
+		)
+
+	@staticmethod
+	def _is_distinct_interaction(document: SnapshotDocument, index: int, tag_name: str, attributes: dict[str, str]) -> bool:
+		return (
+			tag_name in DISTINCT_INTERACTIVE_TAGS
+			or attributes.get('role') in DISTINCT_INTERACTIVE_ROLES
+			or attributes.get('contenteditable') == 'true'
+			or any(key in attributes for key in ('data-testid', 'data-cy', 'data-test'))
+			or any(key in attributes for key in DISTINCT_EVENT_ATTRIBUTES)
+		)
@@ -1,26 +1,54 @@
-from dataclasses import dataclass
-from functools import cached_property
-from typing import TYPE_CHECKING, Optional
+import sys
+import weakref
+from collections import OrderedDict
+from dataclasses import InitVar, dataclass, field
+from typing import TYPE_CHECKING, Literal, Optional
 
 from browser_use.dom.history_tree_processor.view import CoordinateSet, HashedDomElement, ViewportInfo
 from browser_use.utils import time_execution_sync
 
 # Avoid circular import issues
 if TYPE_CHECKING:
+	from browser_use.dom.history_tree_processor.service import DOMElementIndex
+
 	from .views import DOMElementNode
 
 
-@dataclass(frozen=False)
+# Shared by all elements without attributes (most of the tree), never mutate it
+EMPTY_ATTRIBUTES: dict[str, str] = {}
+
+
+@dataclass(frozen=False, slots=True)
 class DOMBaseNode:
+	"""
+	Nodes are slotted and only hold a weak reference to their parent: the tree is owned top-down through
+	`children`, so a dropped tree is freed by reference counting instead of leaving cycles to the cyclic GC.
+	Keep a reference to the root (e.g. the `DOMState`) as long as you need to walk up from a node.
+	"""
+
 	is_visible: bool
 	# Use None as default and set parent later to avoid circular reference issues
-	parent: Optional['DOMElementNode']
+	parent: InitVar[Optional['DOMElementNode']]
+	_parent_ref: 'weakref.ReferenceType[DOMElementNode] | None' = field(default=None, init=False, repr=False, compare=False)
+
+	def __post_init__(self, parent: Optional['DOMElementNode']) -> None:
+		self.parent = parent
+
+	def _get_parent(self) -> Optional['DOMElementNode']:
+		return self._parent_ref() if self._parent_ref is not None else None
+
+	def _set_parent(self, parent: Optional['DOMElementNode']) -> None:
+		self._parent_ref = weakref.ref(parent) if parent is not None else None
 
 	def __json__(self) -> dict:
 		raise NotImplementedError('DOMBaseNode is an abstract class')
 
 
-@dataclass(frozen=False)
+# NOTE: assigned after the class body, a property in the body would become the default of the `parent` InitVar
+DOMBaseNode.parent = property(DOMBaseNode._get_parent, DOMBaseNode._set_parent)  # type: ignore[assignment]
+
+
+@dataclass(frozen=False, slots=True)
 class DOMTextNode(DOMBaseNode):
 	text: str
 	type: str = 'TEXT_NODE'
@@ -52,7 +80,7 @@ class DOMTextNode(DOMBaseNode):
 		}
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True, weakref_slot=True)
 class DOMElementNode(DOMBaseNode):
 	"""
 	xpath: the xpath of the element from the last root node (shadow root or iframe OR document if no shadow root or iframe).
@@ -79,6 +107,18 @@ class DOMElementNode(DOMBaseNode):
 	"""
 	is_new: bool | None = None
 
+	_hash: HashedDomElement | None = field(default=None, init=False, repr=False, compare=False)
+	_branch_path_hash: int | None = field(default=None, init=False, repr=False, compare=False)
+
+	def __post_init__(self, parent: Optional['DOMElementNode']) -> None:
+		self.parent = parent
+		# tag names and attribute keys come from a small vocabulary, share them across nodes and states
+		self.tag_name = sys.intern(self.tag_name)
+		if self.attributes:
+			self.attributes = {sys.intern(key): value for key, value in self.attributes.items()}
+		else:
+			self.attributes = EMPTY_ATTRIBUTES
+
 	def __json__(self) -> dict:
 		return {
 			'tag_name': self.tag_name,
@@ -121,13 +161,41 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
-	@cached_property
+	@property
 	def hash(self) -> HashedDomElement:
-		from browser_use.dom.history_tree_processor.service import (
-			HistoryTreeProcessor,
-		)
-
-		return HistoryTreeProcessor._hash_dom_element(self)
+		if self._hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				HistoryTreeProcessor,
+			)
+
+			self._hash = HistoryTreeProcessor._hash_dom_element(self)
+		return self._hash
+
+	@property
+	def branch_path_hash(self) -> int:
+		"""Hash of the tag names from the root (excluded) down to this element, set top-down by DomService."""
+		if self._branch_path_hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				ROOT_BRANCH_PATH_HASH,
+				HistoryTreeProcessor,
+			)
+
+			# Walk up to the closest ancestor with a known hash, then fill in the hashes on the way back down
+			missing: list[DOMElementNode] = []
+			node: DOMElementNode | None = self
+			while node is not None and node._branch_path_hash is None:
+				missing.append(node)
+				node = node.parent
+
+			parent_hash = node._branch_path_hash if node is not None else None
+			for node in reversed(missing):
+				if parent_hash is None:
+					node._branch_path_hash = ROOT_BRANCH_PATH_HASH
+				else:
+					node._branch_path_hash = HistoryTreeProcessor._extend_branch_path_hash(parent_hash, node.tag_name)
+				parent_hash = node._branch_path_hash
+
+		return self._branch_path_hash
 
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
@@ -152,87 +220,97 @@ class DOMElementNode(DOMBaseNode):
 	@time_execution_sync('--clickable_elements_to_string')
 	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
 		"""Convert the processed DOM content to HTML."""
-		formatted_text = []
-
-		def process_node(node: DOMBaseNode, depth: int) -> None:
-			next_depth = int(depth)
-			depth_str = depth * '\t'
+		# NOTE: Single iterative pass. The text of a highlighted element is collected while its subtree is walked
+		#       (each text node goes to its nearest highlighted ancestor), so its line is formatted once the walk is done.
+		formatted_text: list[str] = []
+		highlighted: list[tuple[int, DOMElementNode, str, list[str]]] = []
+
+		# Text below a highlighted element is never printed on its own, even if that element is above `self`
+		outside_text_parts: list[str] | None = None
+		ancestor = self.parent
+		while ancestor is not None:
+			if ancestor.highlight_index is not None:
+				outside_text_parts = []
+				break
+			ancestor = ancestor.parent
+
+		# (node, parent in the walk, depth, text of the nearest highlighted ancestor or None if there is none)
+		stack: list[tuple[DOMBaseNode, DOMElementNode | None, int, list[str] | None]] = [
+			(self, self.parent, 0, outside_text_parts)
+		]
+		while stack:
+			node, parent, depth, text_parts = stack.pop()
 
 			if isinstance(node, DOMElementNode):
-				# Add element with highlight_index
 				if node.highlight_index is not None:
-					next_depth += 1
-
-					text = node.get_all_text_till_next_clickable_element()
-					attributes_html_str = ''
-					if include_attributes:
-						attributes_to_include = {
-							key: str(value) for key, value in node.attributes.items() if key in include_attributes
-						}
-
-						# Easy LLM optimizations
-						# if tag == role attribute, don't include it
-						if node.tag_name == attributes_to_include.get('role'):
-							del attributes_to_include['role']
-
-						# if aria-label == text of the node, don't include it
-						if (
-							attributes_to_include.get('aria-label')
-							and attributes_to_include.get('aria-label', '').strip() == text.strip()
-						):
-							del attributes_to_include['aria-label']
-
-						# if placeholder == text of the node, don't include it
-						if (
-							attributes_to_include.get('placeholder')
-							and attributes_to_include.get('placeholder', '').strip() == text.strip()
-						):
-							del attributes_to_include['placeholder']
-
-						if attributes_to_include:
-							# Format as key1='value1' key2='value2'
-							attributes_html_str = ' '.join(f"{key}='{value}'" for key, value in attributes_to_include.items())
-
-					# Build the line
-					if node.is_new:
-						highlight_indicator = f'*[{node.highlight_index}]*'
-					else:
-						highlight_indicator = f'[{node.highlight_index}]'
-
-					line = f'{depth_str}{highlight_indicator}<{node.tag_name}'
-
-					if attributes_html_str:
-						line += f' {attributes_html_str}'
-
-					if text:
-						# Add space before >text only if there were NO attributes added before
-						if not attributes_html_str:
-							line += ' '
-						line += f'>{text}'
-					# Add space before /> only if neither attributes NOR text were added
-					elif not attributes_html_str:
-						line += ' '
-
-					line += ' />'  # 1 token
-					formatted_text.append(line)
+					text_parts = []
+					highlighted.append((len(formatted_text), node, depth * '\t', text_parts))
+					formatted_text.append('')
+					depth += 1
 
 				# Process children regardless
-				for child in node.children:
-					process_node(child, next_depth)
+				for child in reversed(node.children):
+					stack.append((child, node, depth, text_parts))
 
 			elif isinstance(node, DOMTextNode):
+				if text_parts is not None:
+					text_parts.append(node.text)
 				# Add text only if it doesn't have a highlighted parent
-				if (
-					not node.has_parent_with_highlight_index()
-					and node.parent
-					and node.parent.is_visible
-					and node.parent.is_top_element
-				):  # and node.is_parent_top_element()
-					formatted_text.append(f'{depth_str}{node.text}')
-
-		process_node(self, 0)
+				elif parent and parent.is_visible and parent.is_top_element:
+					formatted_text.append(depth * '\t' + node.text)
+
+		for line_index, node, depth_str, text_parts in highlighted:
+			formatted_text[line_index] = node._format_highlighted_line(
+				depth_str, '\n'.join(text_parts).strip(), include_attributes
+			)
+
 		return '\n'.join(formatted_text)
 
+	def _format_highlighted_line(self, depth_str: str, text: str, include_attributes: list[str] | None) -> str:
+		attributes_html_str = ''
+		if include_attributes:
+			attributes_to_include = {key: str(value) for key, value in self.attributes.items() if key in include_attributes}
+
+			# Easy LLM optimizations
+			# if tag == role attribute, don't include it
+			if self.tag_name == attributes_to_include.get('role'):
+				del attributes_to_include['role']
+
+			# if aria-label == text of the node, don't include it
+			if attributes_to_include.get('aria-label') and attributes_to_include.get('aria-label', '').strip() == text.strip():
+				del attributes_to_include['aria-label']
+
+			# if placeholder == text of the node, don't include it
+			if attributes_to_include.get('placeholder') and attributes_to_include.get('placeholder', '').strip() == text.strip():
+				del attributes_to_include['placeholder']
+
+			if attributes_to_include:
+				# Format as key1='value1' key2='value2'
+				attributes_html_str = ' '.join(f"{key}='{value}'" for key, value in attributes_to_include.items())
+
+		# Build the line
+		if self.is_new:
+			highlight_indicator = f'*[{self.highlight_index}]*'
+		else:
+			highlight_indicator = f'[{self.highlight_index}]'
+
+		line = f'{depth_str}{highlight_indicator}<{self.tag_name}'
+
+		if attributes_html_str:
+			line += f' {attributes_html_str}'
+
+		if text:
+			# Add space before >text only if there were NO attributes added before
+			if not attributes_html_str:
+				line += ' '
+			line += f'>{text}'
+		# Add space before /> only if neither attributes NOR text were added
+		elif not attributes_html_str:
+			line += ' '
+
+		line += ' />'  # 1 token
+		return line
+
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
 		# Check if current element is a file input
 		if self.tag_name == 'input' and self.attributes.get('type') == 'file':
@@ -258,8 +336,138 @@ class DOMElementNode(DOMBaseNode):
 
 SelectorMap = dict[int, DOMElementNode]
 
+# 'js': buildDomTree.js evaluated in the page, 'cdp_snapshot': Chrome DevTools DOMSnapshot.captureSnapshot (Chromium only)
+DOMExtractionEngine = Literal['js', 'cdp_snapshot']
+
+
+@dataclass
+class DOMBudget:
+	"""
+	Upper bounds for an extracted tree, None means unbounded. When a bound is hit the tree is filled by priority:
+	elements in the viewport first, then by distance from the viewport and by interactivity (see BudgetProcessor).
+	"""
+
+	max_elements: int | None = None  # interactive (highlighted) elements
+	max_nodes: int | None = None  # element and text nodes
+	max_text_chars: int | None = None  # characters of text nodes
+
+
+@dataclass
+class DOMTruncationReport:
+	"""What a DOMBudget left out of a tree."""
+
+	total_elements: int
+	kept_elements: int
+	total_nodes: int
+	kept_nodes: int
+	total_text_chars: int
+	kept_text_chars: int
+	# buildDomTree.js skipped elements outside of the viewport, the totals only count what it walked
+	walk_stopped: bool = False
+
+	@property
+	def is_truncated(self) -> bool:
+		return self.walk_stopped or self.kept_nodes < self.total_nodes
+
+	@property
+	def dropped_elements(self) -> int:
+		return self.total_elements - self.kept_elements
+
 
 @dataclass
 class DOMState:
 	element_tree: DOMElementNode
 	selector_map: SelectorMap
+	# built on first use by HistoryTreeProcessor.find_history_element_in_state
+	element_index: Optional['DOMElementIndex'] = field(default=None, init=False, repr=False, compare=False)
+	# set when the tree was cut down to a DOMBudget
+	truncation: DOMTruncationReport | None = field(default=None, kw_only=True)
+	# set by the browser session the state belongs to, see clickable_elements_to_string
+	serialization_cache: Optional['DOMSerializationCache'] = field(default=None, init=False, repr=False, compare=False)
+	_fingerprint: int | None = field(default=None, init=False, repr=False, compare=False)
+
+	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
+		"""element_tree.clickable_elements_to_string, serialized once per identical tree when the state has a cache."""
+		if self.serialization_cache is None:
+			return self.element_tree.clickable_elements_to_string(include_attributes=include_attributes)
+		return self.serialization_cache.get_or_serialize(self, include_attributes)
+
+	@property
+	def fingerprint(self) -> int:
+		"""
+		Hash of everything clickable_elements_to_string prints, equal for trees that serialize the same.
+		Computed once per state: mutate the tree before it is first used (e.g. is_new).
+		"""
+		if self._fingerprint is None:
+			parts = []
+			stack: list[DOMBaseNode] = [self.element_tree]
+			while stack:
+				node = stack.pop()
+				if not isinstance(node, DOMElementNode):
+					parts.append(node.text if isinstance(node, DOMTextNode) else None)
+					continue
+				# the pre-order sequence of nodes with their number of children determines the tree
+				parts.append(
+					(
+						node.tag_name,
+						len(node.children),
+						node.is_visible,
+						node.is_top_element,
+						node.highlight_index,
+						node.is_new,
+						tuple(node.attributes.items()) if node.highlight_index is not None else None,
+					)
+				)
+				stack.extend(reversed(node.children))
+			self._fingerprint = hash(tuple(parts))
+		return self._fingerprint
+
+
+@dataclass
+class DOMSerializationCache:
+	"""
+	clickable_elements_to_string results by tree fingerprint and include_attributes, least recently used evicted first.
+
+	Kept per browser session, so that a page is serialized once however often the same or an identical
+	state is put in a prompt (main LLM, planner, validator, page unchanged between steps).
+	"""
+
+	max_size: int = 16
+	entries: OrderedDict[tuple[int, tuple[str, ...]], str] = field(default_factory=OrderedDict)
+
+	def get_or_serialize(self, state: DOMState, include_attributes: list[str] | None = None) -> str:
+		key = (state.fingerprint, tuple(include_attributes or ()))
+		text = self.entries.get(key)
+		if text is not None:
+			self.entries.move_to_end(key)
+			return text
+
+		text = state.element_tree.clickable_elements_to_string(include_attributes=include_attributes)
+		self.entries[key] = text
+		if len(self.entries) > self.max_size:
+			self.entries.popitem(last=False)
+		return text
+
+
+@dataclass
+class IncrementalDOMCache:
+	"""
+	Python side of the incremental extraction protocol of buildDomTree.js.
+
+	Keeps the last tree returned by the in-page agent, indexed by the persistent node ids it assigned,
+	so that the next call only has to send the nodes that changed and the tree can be patched.
+	The token identifies the in-page state the tree belongs to (it changes on navigation / new tab).
+	"""
+
+	token: str | None = None
+	root_id: str | None = None
+	node_map: dict[str, DOMBaseNode] = field(default_factory=dict)
+	children_ids: dict[str, list[str]] = field(default_factory=dict)
+	parent_ids: dict[str, str] = field(default_factory=dict)
+
+	def reset(self) -> None:
+		self.token = None
+		self.root_id = None
+		self.node_map = {}
+		self.children_ids = {}
+		self.parent_ids = {}
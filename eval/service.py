@@ -299,7 +299,8 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from pydantic.types import SecretStr
 
-from browser_use import Agent, Browser, BrowserConfig
+from browser_use import Agent, Browser, BrowserConfig, BrowserContextPool
+from browser_use.browser.context import BrowserContext
 
 SUPPORTED_MODELS = {
 	# Anthropic
@@ -535,7 +536,13 @@ class TaskTracker:
 
 
 async def run_agent_with_tracing(
-	task: Task, llm: BaseChatModel, run_id: str, browser: Browser | None = None, max_steps: int = 25, use_vision: bool = True
+	task: Task,
+	llm: BaseChatModel,
+	run_id: str,
+	browser: Browser | None = None,
+	max_steps: int = 25,
+	use_vision: bool = True,
+	browser_context: BrowserContext | None = None,
 ):
 	try:
 		# Create task tracker
@@ -547,6 +554,7 @@ async def run_agent_with_tracing(
 			task=task.confirmed_task,
 			llm=llm,
 			browser=browser,
+			browser_context=browser_context,
 			use_vision=use_vision,
 			source='eval_platform',  # Override source detection
 		)
@@ -718,6 +726,7 @@ async def run_task_with_semaphore(
 	headless: bool,
 	use_vision: bool,
 	semaphore_runs: asyncio.Semaphore,  # Pass semaphore as argument
+	context_pool: BrowserContextPool | None = None,
 ) -> dict:
 	"""Run a single task with semaphore, sequential execution, and robust error handling"""
 	# Acquire semaphore before starting any task-specific logic
@@ -802,14 +811,20 @@ async def run_task_with_semaphore(
 			if execution_needed:
 				logger.info(f'Task {task.task_id}: Starting execution.')
 				browser = None  # Ensure browser is defined for finally block
+				browser_context = None
 				try:
-					browserConfig = BrowserConfig(headless=headless)
-					browser = Browser(config=browserConfig)
+					if context_pool:
+						# warm context of the shared browser, reset and given back to the pool below
+						browser_context = await context_pool.acquire()
+					else:
+						browserConfig = BrowserConfig(headless=headless)
+						browser = Browser(config=browserConfig)
 					# Pass the llm to run_agent_with_tracing
 					result = await run_agent_with_tracing(
 						task=task,
 						llm=llm,
-						browser=browser,
+						browser=context_pool.browser if context_pool else browser,
+						browser_context=browser_context,
 						max_steps=max_steps_per_task,
 						use_vision=use_vision,
 						run_id=run_id,  # run_agent_with_tracing handles saving result.json
@@ -847,6 +862,8 @@ async def run_task_with_semaphore(
 					server_payload['onlineMind2WebEvaluationJudgement'] = 'Execution Failed'
 					server_payload['onlineMind2WebEvaluationError'] = f'Execution Error: {type(e).__name__}'
 				finally:
+					if context_pool and browser_context:
+						await context_pool.release(browser_context)
 					if browser:
 						try:
 							await browser.close()
@@ -957,31 +974,46 @@ async def run_multiple_tasks(
 	headless: bool = False,
 	use_vision: bool = True,
 	fresh_start: bool = True,
+	reuse_browser: bool = False,
 ) -> dict:
 	"""
 	Run multiple tasks in parallel and evaluate results.
+
+	With reuse_browser, all tasks share one browser and get a warm context from a BrowserContextPool
+	instead of launching a new browser each.
 	"""
 	semaphore_runs = asyncio.Semaphore(max_parallel_runs)
 	tasks_to_run = tasks[start_index:end_index] if end_index else tasks[start_index:]
 
+	context_pool = None
+	if reuse_browser:
+		context_pool = BrowserContextPool(Browser(config=BrowserConfig(headless=headless)), size=max_parallel_runs)
+		await context_pool.start()
+
 	# Run all tasks in parallel with additional parameters
-	task_results = await asyncio.gather(
-		*(
-			run_task_with_semaphore(
-				task=task,
-				run_id=run_id,
-				convex_url=convex_url,
-				secret_key=secret_key,
-				eval_model=eval_model,
-				llm=llm,  # Pass the agent LLM
-				max_steps_per_task=max_steps_per_task,
-				headless=headless,
-				use_vision=use_vision,
-				semaphore_runs=semaphore_runs,  # Pass the semaphore
+	try:
+		task_results = await asyncio.gather(
+			*(
+				run_task_with_semaphore(
+					task=task,
+					run_id=run_id,
+					convex_url=convex_url,
+					secret_key=secret_key,
+					eval_model=eval_model,
+					llm=llm,  # Pass the agent LLM
+					max_steps_per_task=max_steps_per_task,
+					headless=headless,
+					use_vision=use_vision,
+					semaphore_runs=semaphore_runs,  # Pass the semaphore
+					context_pool=context_pool,
+				)
+				for task in tasks_to_run
 			)
-			for task in tasks_to_run
 		)
-	)
+	finally:
+		if context_pool:
+			await context_pool.close()
+			await context_pool.browser.close()
 
 	# After all tasks are complete, calculate a local summary
 	logger.info('All tasks completed. Calculating result summary...')
@@ -1188,6 +1220,9 @@ if __name__ == '__main__':
 		help='Clear saved_trajectories before starting. Set to False to keep existing trajectories (default: True)',
 	)
 	parser.add_argument('--user-message', type=str, default='', help='User message to include in the run')
+	parser.add_argument(
+		'--reuse-browser', action='store_true', help='Run all tasks in one browser with a pool of warm, reset contexts'
+	)
 	args = parser.parse_args()
 
 	# Set up logging - Make sure logger is configured before use in fetch function
@@ -1321,6 +1356,7 @@ if __name__ == '__main__':
 				headless=args.headless,
 				use_vision=not args.no_vision,
 				fresh_start=args.fresh_start,
+				reuse_browser=args.reuse_browser,
 			)
 		)
 
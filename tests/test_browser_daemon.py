@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from browser_use.browser.daemon import BrowserDaemon, fcntl
+
+
+class DummyProcess:
+	def __init__(self, pid, returncode=None):
+		self.pid = pid
+		self.returncode = returncode
+
+	def poll(self):
+		return self.returncode
+
+
+@pytest.mark.asyncio
+async def test_daemon_is_started_once_and_reused(tmp_path, monkeypatch):
+	"""
+	Test that BrowserDaemon launches a browser only when no daemon answers, reuses the running one
+	(through its state file) on later starts, and replaces a daemon that stopped answering.
+	"""
+	daemon = BrowserDaemon(state_dir=tmp_path, port=9999)
+	responding = set()
+	launches = []
+
+	async def is_responding(cdp_url):
+		return cdp_url in responding
+
+	async def get_builtin_executable_path():
+		return '/path/to/chromium'
+
+	def launch(command):
+		launches.append(command)
+		responding.add('http://localhost:9999')
+		return DummyProcess(pid=2**22 + len(launches))
+
+	monkeypatch.setattr(BrowserDaemon, '_is_responding', staticmethod(is_responding))
+	monkeypatch.setattr(daemon, '_get_builtin_executable_path', get_builtin_executable_path)
+	monkeypatch.setattr(daemon, '_launch', launch)
+
+	assert await daemon.get_cdp_url() is None
+	cdp_url = await daemon.start(headless=True)
+	assert cdp_url == 'http://localhost:9999'
+	assert len(launches) == 1
+	assert launches[0][0] == '/path/to/chromium'
+	assert '--remote-debugging-port=9999' in launches[0]
+	assert f'--user-data-dir={(tmp_path / "profile").resolve()}' in launches[0]
+	assert json.loads(daemon.state_file.read_text())['cdp_url'] == cdp_url
+
+	# another client (e.g. the next CLI run) attaches to the running daemon
+	assert await BrowserDaemon(state_dir=tmp_path, port=9999).get_cdp_url() == cdp_url
+	assert await daemon.start(headless=True) == cdp_url
+	assert len(launches) == 1
+
+	# the daemon died, the next start launches a new one
+	responding.clear()
+	assert await daemon.get_cdp_url() is None
+	assert await daemon.start(headless=True) == cdp_url
+	assert len(launches) == 2
+
+	# the pid in the state file does not belong to a daemon browser, nothing is killed but the state is cleared
+	assert not await daemon.stop()
+	assert not daemon.state_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_starts_launch_one_daemon(tmp_path, monkeypatch):
+	"""
+	Test that concurrent starts (e.g. two CLI runs) launch a single browser, and that a browser exiting during
+	startup because another one already answers on the port is not an error.
+	"""
+	responding = set()
+	launches = []
+
+	async def is_responding(cdp_url):
+		# answers like a real request, as of when it was sent
+		is_listening = cdp_url in responding
+		await asyncio.sleep(0.01)
+		return is_listening
+
+	async def get_builtin_executable_path():
+		return '/path/to/chromium'
+
+	def launch(command):
+		launches.append(command)
+		responding.add('http://localhost:9999')
+		return DummyProcess(pid=2**22 + len(launches))
+
+	monkeypatch.setattr(BrowserDaemon, '_is_responding', staticmethod(is_responding))
+	monkeypatch.setattr(BrowserDaemon, '_get_builtin_executable_path', staticmethod(get_builtin_executable_path))
+	monkeypatch.setattr(BrowserDaemon, '_launch', staticmethod(launch))
+
+	daemons = [BrowserDaemon(state_dir=tmp_path, port=9999) for _ in range(3)]
+	cdp_urls = await asyncio.gather(*(daemon.start(headless=True) for daemon in daemons))
+	assert cdp_urls == ['http://localhost:9999'] * 3
+	assert len(launches) == 1
+
+	# the launched browser exits right away, the one answering on the port is only found after that
+	checks = []
+
+	async def is_responding_after_exit(cdp_url):
+		checks.append(cdp_url)
+		return len(checks) > 3
+
+	def launch_and_exit(command):
+		launches.append(command)
+		return DummyProcess(pid=2**22 + len(launches), returncode=0)
+
+	monkeypatch.setattr(BrowserDaemon, '_is_responding', staticmethod(is_responding_after_exit))
+	monkeypatch.setattr(BrowserDaemon, '_launch', staticmethod(launch_and_exit))
+	assert await daemons[0].start(headless=True) == 'http://localhost:9999'
+	assert len(launches) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(fcntl is None, reason='starts are not serialized without fcntl')
+async def test_cancelled_lock_wait_keeps_the_lock_file_open_until_flock_returns(tmp_path, monkeypatch):
+	"""
+	Test that cancelling a start that waits for the lock of another process does not close the lock file
+	under the thread still blocked in flock, and that the lock is released once that thread returns.
+	"""
+	daemon = BrowserDaemon(state_dir=tmp_path, port=9999)
+	holder_fd = os.open(daemon.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+	fcntl.flock(holder_fd, fcntl.LOCK_EX)
+
+	closed = []
+	close = os.close
+
+	def record_close(fd):
+		closed.append(fd)
+		close(fd)
+
+	monkeypatch.setattr(os, 'close', record_close)
+
+	async def wait_for_lock():
+		async with daemon._lock():
+			pass
+
+	waiting = asyncio.create_task(wait_for_lock())
+	await asyncio.sleep(0.1)
+	waiting.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await waiting
+	assert closed == []
+
+	fcntl.flock(holder_fd, fcntl.LOCK_UN)
+	for _ in range(100):
+		if closed:
+			break
+		await asyncio.sleep(0.01)
+	assert len(closed) == 1
+
+	# the lock taken by the abandoned thread was released with its file
+	await asyncio.wait_for(wait_for_lock(), timeout=1)
+	close(holder_fd)
@@ -361,3 +361,399 @@ async def test_remove_highlights_failure():
 		await context.remove_highlights()
 	except Exception as e:
 		pytest.fail(f'remove_highlights raised an exception: {e}')
+
+
+@pytest.mark.asyncio
+async def test_get_state_reuses_unchanged_page_state():
+	"""
+	Test that get_state waits for the page and then returns the previous state without extracting it again
+	while the in-page change fingerprint is unchanged and no request is in flight, and extracts a new state
+	once it changes.
+	"""
+	from browser_use.browser.context import BrowserSession
+
+	class DummyFrame:
+		def __init__(self):
+			self.fingerprint = 'https://example.com/|Example|0'
+
+		async def evaluate(self, script):
+			return self.fingerprint
+
+	class DummyPage:
+		url = 'https://example.com/'
+
+		def __init__(self):
+			self.frames = [DummyFrame()]
+
+		def is_closed(self):
+			return False
+
+		def on(self, event, listener):
+			pass
+
+		def once(self, event, listener):
+			pass
+
+		def remove_listener(self, event, listener):
+			pass
+
+	page = DummyPage()
+	dummy_context = Mock()
+	dummy_context.pages = [page]
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(reuse_unchanged_state=True))
+	context.session = BrowserSession(dummy_context)
+	context.agent_current_page = page
+
+	body = DOMElementNode(tag_name='body', xpath='html/body', attributes={}, children=[], is_visible=True, parent=None)
+	button = DOMElementNode(tag_name='button', xpath='html/body/button', attributes={}, children=[], is_visible=True, parent=body)
+	button.highlight_index = 1
+	body.children.append(button)
+	extractions = []
+	waits = []
+
+	async def wait_for_page_and_frames_load():
+		waits.append(page.frames[0].fingerprint)
+
+	async def get_updated_state(focus_element=-1):
+		extractions.append(page.frames[0].fingerprint)
+		return BrowserState(element_tree=body, selector_map={1: button}, url=page.url, title='Example', tabs=[])
+
+	context._wait_for_page_and_frames_load = wait_for_page_and_frames_load
+	context._get_updated_state = get_updated_state
+
+	first_state = await context.get_state(cache_clickable_elements_hashes=True)
+	assert len(extractions) == 1
+
+	# nothing changed in the page: same tree, no extraction, no element is new
+	reused_state = await context.get_state(cache_clickable_elements_hashes=True)
+	assert len(extractions) == 1
+	assert reused_state is not first_state
+	assert reused_state.element_tree is first_state.element_tree
+	assert reused_state.selector_map[1].is_new is False
+	assert len(waits) == 2
+
+	# a request started by the last action is still in flight: the DOM may be about to change
+	tracker = await context._get_network_idle_tracker(page)
+	tracker.pending_requests[Mock()] = tracker._now()
+	await context.get_state(cache_clickable_elements_hashes=True)
+	assert len(extractions) == 2
+	tracker.pending_requests.clear()
+
+	# a mutation bumps the fingerprint and the page is extracted again
+	page.frames[0].fingerprint = 'https://example.com/|Example|1'
+	await context.get_state(cache_clickable_elements_hashes=True)
+	assert extractions == ['https://example.com/|Example|0', 'https://example.com/|Example|0', 'https://example.com/|Example|1']
+
+	context.config.reuse_unchanged_state = False
+	await context.get_state(cache_clickable_elements_hashes=True)
+	assert len(extractions) == 4
+
+
+@pytest.mark.asyncio
+async def test_network_idle_tracker_waits_for_requests_started_before_waiting():
+	"""
+	Test that the per-page NetworkIdleTracker sees requests started before anyone waits for the page,
+	resolves once the page has been idle for the idle time, and gives up on requests that hang past the timeout.
+	"""
+	import asyncio
+
+	from browser_use.browser.utils.network_idle import NetworkIdleTracker
+
+	class DummyPage:
+		def __init__(self):
+			self.listeners = {}
+
+		def on(self, event, listener):
+			self.listeners.setdefault(event, []).append(listener)
+
+		def remove_listener(self, event, listener):
+			self.listeners[event].remove(listener)
+
+		def emit(self, event, payload):
+			for listener in list(self.listeners.get(event, [])):
+				listener(payload)
+
+	class DummyRequest:
+		resource_type = 'script'
+		headers = {}
+
+		def __init__(self, url):
+			self.url = url
+
+	class DummyResponse:
+		headers = {'content-type': 'application/javascript'}
+
+		def __init__(self, request):
+			self.request = request
+
+	page = DummyPage()
+	tracker = NetworkIdleTracker(page).attach()
+	loop = asyncio.get_running_loop()
+
+	script = DummyRequest('https://example.com/app.js')
+	page.emit('request', script)
+	page.emit('request', DummyRequest('https://example.com/analytics.js'))  # ignored
+	assert list(tracker.pending_requests) == [script]
+
+	loop.call_later(0.05, page.emit, 'response', DummyResponse(script))
+	started = loop.time()
+	assert await tracker.wait_for_idle(idle_time=0.05, timeout=1) is True
+	assert 0.09 <= loop.time() - started < 0.5
+	assert not tracker.pending_requests
+
+	# a request that never finishes stops blocking once it is older than the timeout
+	page.emit('request', DummyRequest('https://example.com/hanging.js'))
+	started = loop.time()
+	await tracker.wait_for_idle(idle_time=0.01, timeout=0.05)
+	assert loop.time() - started >= 0.05
+	started = loop.time()
+	assert await tracker.wait_for_idle(idle_time=0.01, timeout=0.05) is True
+	assert loop.time() - started < 0.04
+
+	page.emit('close', page)
+	assert not any(page.listeners.values())
+
+
+def test_request_classifier_reports_fired_filters():
+	"""
+	Test that the RequestClassifier matches the built-in and configured URL patterns case-insensitively,
+	in the host (cached per host) as well as in the path, and reports which filter fired.
+	"""
+	from browser_use.browser.utils.network_idle import RequestClassifier
+
+	class DummyRequest:
+		def __init__(self, url, resource_type='script', headers=None):
+			self.url = url
+			self.resource_type = resource_type
+			self.headers = headers or {}
+
+	class DummyResponse:
+		def __init__(self, content_type):
+			self.headers = {'content-type': content_type}
+
+	classifier = RequestClassifier(extra_ignored_url_patterns=['/API/Poll'])
+
+	assert classifier.classify_request(DummyRequest('https://example.com/app.js')) is None
+	assert classifier.classify_request(DummyRequest('https://stats.DoubleClick.net/x.js')) == 'url:doubleclick'
+	assert classifier.classify_request(DummyRequest('https://stats.doubleclick.net/y.js')) == 'url:doubleclick'
+	assert classifier.classify_request(DummyRequest('https://www.facebook.com/plugins/like.php')) == 'url:facebook.com/plugins'
+	assert classifier.classify_request(DummyRequest('https://example.com/api/poll?id=1')) == 'url:/api/poll'
+	assert classifier.classify_request(DummyRequest('https://example.com/js/Analytics.js')) == 'url:analytics'
+	assert classifier.classify_request(DummyRequest('https://example.com/v2/api/poll')) == 'url:/api/poll'
+	assert classifier._host_verdicts['https://example.com'] is None
+	assert classifier.classify_request(DummyRequest('https://example.com/feed', resource_type='xhr')) == 'resource_type:xhr'
+	assert classifier.classify_request(DummyRequest('data:image/png;base64,AAAA', resource_type='image')) == 'data_url'
+	assert classifier.classify_request(DummyRequest('https://example.com/next', headers={'purpose': 'prefetch'})) == 'prefetch'
+
+	assert classifier.classify_response(DummyResponse('text/html; charset=utf-8')) is None
+	assert classifier.classify_response(DummyResponse('text/event-stream')) == 'streaming:event-stream'
+	assert classifier.classify_response(DummyResponse('application/octet-stream')) == 'content_type'
+
+
+@pytest.mark.asyncio
+async def test_adaptive_settle_timer_learns_per_domain(tmp_path):
+	"""
+	Test that the AdaptiveSettleTimer keeps the static waits for unknown domains, shortens the minimum and
+	network idle waits for domains that settle quickly (never the timeout), never exceeds them, persists what it
+	learned, and that the context only records waits that saw network or DOM activity.
+	"""
+	from browser_use.browser.utils.settle_timing import AdaptiveSettleTimer, SettleSample, SettleTimings
+
+	static = SettleTimings(minimum_wait=0.25, network_idle=0.5, maximum_wait=5)
+	timer = AdaptiveSettleTimer(percentile=0.9)
+	for _ in range(10):
+		timer.record('https://fast.example.com/app', SettleSample(settle_time=0.1, max_gap=0.04))
+		timer.record('https://slow.example.com/shop', SettleSample(settle_time=8, max_gap=2))
+
+	assert timer.timings_for('https://unknown.example.com/', static) == static
+	fast = timer.timings_for('https://FAST.example.com/other/page', static)
+	assert fast.minimum_wait == pytest.approx(0.1)
+	assert fast.network_idle == pytest.approx(0.1)
+	assert fast.maximum_wait == static.maximum_wait
+	assert timer.timings_for('https://slow.example.com/', static) == static
+
+	path = str(tmp_path / 'settle.json')
+	await timer.save(path)
+	loaded = AdaptiveSettleTimer(percentile=0.9)
+	await loaded.load(path)
+	assert loaded.timings_for('https://fast.example.com/', static) == fast
+
+	class DummyTracker:
+		last_settle = SettleSample(settle_time=0.0, max_gap=0.0)
+		last_wait_was_active = False
+
+	class DummyPage:
+		url = 'https://idle.example.com/'
+		quiet_time = 60_000
+
+		async def evaluate(self, script):
+			return self.quiet_time
+
+	page, tracker = DummyPage(), DummyTracker()
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(adaptive_settle_timing=True))
+	context.session = Mock()
+	context.session.network_idle_trackers = {page: tracker}
+
+	# nothing happened during the wait
+	await context._record_settle_sample(page, elapsed=0.3)
+	assert context.settle_timer.samples == {}
+
+	# the DOM changed 0.1s before the wait ended
+	page.quiet_time = 100
+	await context._record_settle_sample(page, elapsed=0.3)
+	assert list(context.settle_timer.samples['idle.example.com']) == [SettleSample(settle_time=pytest.approx(0.2), max_gap=0.0)]
+
+
+@pytest.mark.asyncio
+async def test_screenshot_pipeline_is_configurable():
+	"""
+	Test that state screenshots are taken in the configured format and scale, fall back to PNG when WebP
+	cannot be captured with CDP, and are only base64 encoded when the BrowserState.screenshot is read.
+	"""
+
+	class DummyPage:
+		def __init__(self):
+			self.calls = []
+			self.context = self
+
+		async def new_cdp_session(self, page):
+			raise Exception('not chromium')
+
+		async def screenshot(self, **kwargs):
+			self.calls.append(kwargs)
+			return b'image'
+
+	page = DummyPage()
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(
+		browser=dummy_browser,
+		config=BrowserContextConfig(screenshot_format='jpeg', screenshot_quality=60, screenshot_scale='css'),
+	)
+
+	screenshot, image_format = await context._capture_screenshot(page, 'jpeg')
+	assert (screenshot, image_format) == (b'image', 'jpeg')
+	assert page.calls[-1]['type'] == 'jpeg'
+	assert page.calls[-1]['quality'] == 60
+	assert page.calls[-1]['scale'] == 'css'
+
+	screenshot, image_format = await context._capture_screenshot(page, 'webp')
+	assert image_format == 'png'
+	assert page.calls[-1]['type'] == 'png'
+	assert page.calls[-1]['quality'] is None
+
+	state = BrowserState(
+		element_tree=None,
+		selector_map={},
+		url='',
+		title='',
+		tabs=[],
+		screenshot_bytes=b'image',
+		screenshot_mime_type='image/jpeg',
+	)
+	assert state.__dict__['_screenshot_base64'] is None
+	assert state.screenshot == base64.b64encode(b'image').decode('utf-8')
+
+
+@pytest.mark.asyncio
+async def test_get_tabs_info_fetches_titles_concurrently():
+	"""
+	Test that get_tabs_info asks all tabs for their title at once, so slow tabs do not add up.
+	"""
+	import asyncio
+	import time
+
+	from browser_use.browser.context import BrowserSession
+
+	class DummyPage:
+		def __init__(self, url):
+			self.url = url
+
+		async def title(self):
+			await asyncio.sleep(0.2)
+			return f'Title of {self.url}'
+
+	dummy_context = Mock()
+	dummy_context.pages = [DummyPage(f'https://example.com/{i}') for i in range(5)]
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig())
+	context.session = BrowserSession(dummy_context)
+
+	started = time.monotonic()
+	tabs = await context.get_tabs_info()
+	assert time.monotonic() - started < 0.6
+	assert [tab.page_id for tab in tabs] == [0, 1, 2, 3, 4]
+	assert tabs[3].title == 'Title of https://example.com/3'
+
+
+@pytest.mark.asyncio
+async def test_har_replay_routes_misses_after_the_har(tmp_path):
+	"""
+	Test that har_mode='replay' serves requests from the HAR, sends only the requests missing from it to the
+	miss handler (registered first, so that Playwright runs it last) and counts them, that
+	har_mode='record' records into the HAR without replaying it and cannot be combined with save_har_path.
+	"""
+	from browser_use.browser.context import BrowserSession
+
+	class DummyPlaywrightContext:
+		def __init__(self):
+			self.calls = []
+
+		async def route(self, url, handler):
+			self.calls.append(('route', url))
+
+		async def route_from_har(self, har, **kwargs):
+			self.calls.append(('route_from_har', kwargs))
+
+	class DummyRoute:
+		def __init__(self, url):
+			self.request = Mock(url=url, method='GET')
+			self.outcome = None
+
+		async def abort(self):
+			self.outcome = 'abort'
+
+		async def fallback(self):
+			self.outcome = 'fallback'
+
+	har_path = tmp_path / 'run.har'
+	dummy_browser = Mock()
+	dummy_browser.config = Mock()
+
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(har_mode='replay', har_path=str(har_path)))
+	with pytest.raises(FileNotFoundError):
+		await context._setup_har_routing(DummyPlaywrightContext())
+
+	har_path.write_text('{"log": {"entries": []}}')
+	playwright_context = DummyPlaywrightContext()
+	context.session = BrowserSession(playwright_context)
+	await context._setup_har_routing(playwright_context)
+	assert playwright_context.calls == [('route', '**/*'), ('route_from_har', {'not_found': 'fallback', 'url': None})]
+
+	route = DummyRoute('https://example.com/missing.js')
+	await context._handle_har_miss(route)
+	await context._handle_har_miss(DummyRoute('https://example.com/missing.js'))
+	assert route.outcome == 'abort'
+	assert context.session.har_misses == {'https://example.com/missing.js': 2}
+
+	context.config.har_not_found = 'fallback'
+	route = DummyRoute('https://example.com/live.json')
+	await context._handle_har_miss(route)
+	assert route.outcome == 'fallback'
+
+	context = BrowserContext(browser=dummy_browser, config=BrowserContextConfig(har_mode='record', har_path=str(har_path)))
+	playwright_context = DummyPlaywrightContext()
+	await context._setup_har_routing(playwright_context)
+	assert playwright_context.calls == [
+		('route_from_har', {'update': True, 'update_content': 'attach', 'update_mode': 'minimal', 'url': None})
+	]
+
+	# save_har_path records a HAR of its own
+	with pytest.raises(ValueError):
+		BrowserContextConfig(har_mode='record', har_path=str(har_path), save_har_path=str(tmp_path / 'full.har'))
+	assert BrowserContextConfig(har_mode='replay', har_path=str(har_path), save_har_path=str(tmp_path / 'full.har'))
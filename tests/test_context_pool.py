@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser.pool import BrowserContextPool
+
+
+class DummyContext:
+	reset_delay = 0
+
+	def __init__(self, context_id):
+		self.context_id = context_id
+		self.initialized = False
+		self.resets = 0
+		self.closed = False
+
+	async def get_session(self):
+		self.initialized = True
+
+	async def fast_reset(self):
+		await asyncio.sleep(self.reset_delay)
+		self.resets += 1
+
+	async def close(self):
+		self.closed = True
+
+
+class DummyBrowser:
+	def __init__(self):
+		self.contexts = []
+
+	async def new_context(self, config=None):
+		await asyncio.sleep(0.01)
+		context = DummyContext(f'context-{len(self.contexts)}')
+		self.contexts.append(context)
+		return context
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_out_warm_contexts_and_recycles_them():
+	"""
+	Test that the BrowserContextPool creates its contexts up front, resets released contexts for the next user,
+	replaces contexts that reached max_uses, and closes everything on close.
+	"""
+	browser = DummyBrowser()
+	pool = BrowserContextPool(browser, size=2, max_uses=2)
+	await pool.start()
+	assert len(pool.idle_contexts) == 2
+	assert all(context.initialized for context in browser.contexts)
+
+	async with pool.context() as first:
+		assert first.initialized
+		assert first.read_only_cookies_file
+	assert first.resets == 1
+	assert first in pool.idle_contexts
+
+	# the second use reaches max_uses, the context is closed and replaced in the background
+	first_again = await pool.acquire()
+	assert first_again is first
+	await pool.release(first_again)
+	assert first.closed
+	await asyncio.sleep(0.05)
+	assert len(pool.idle_contexts) == 2
+	assert first not in pool.idle_contexts
+
+	await pool.close()
+	assert all(context.closed for context in browser.contexts)
+	with pytest.raises(RuntimeError):
+		await pool.acquire()
+
+
+@pytest.mark.asyncio
+async def test_release_does_not_overfill_the_pool():
+	"""
+	Test that a context whose reset finishes after the pool was refilled in the meantime is closed
+	instead of growing the pool beyond its size.
+	"""
+	browser = DummyBrowser()
+	pool = BrowserContextPool(browser, size=1)
+	await pool.start()
+
+	context = await pool.acquire()
+	context.reset_delay = 0.05
+	# a replacement is warmed while the context is reset
+	await pool.release(context)
+	assert context.resets == 1
+	assert context.closed
+	assert len(pool.idle_contexts) == 1
+	assert context not in pool.idle_contexts
+
+	await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_contexts_do_not_write_the_cookies_file(tmp_path):
+	"""
+	Test that a context of the pool does not save the cookies of its user to cookies_file, neither while it is
+	used nor when it is closed, so that the next user does not load them.
+	"""
+	from unittest.mock import AsyncMock, Mock
+
+	from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+	cookies_file = tmp_path / 'cookies.json'
+	cookies_file.write_text('[]')
+	context = BrowserContext(browser=Mock(), config=BrowserContextConfig(cookies_file=str(cookies_file)))
+	context.session = Mock()
+	context.session.context.cookies = AsyncMock(return_value=[{'name': 'session', 'value': 'user-1'}])
+
+	context.read_only_cookies_file = True
+	await context.save_cookies()
+	assert cookies_file.read_text() == '[]'
+
+	context.read_only_cookies_file = False
+	await context.save_cookies()
+	assert 'user-1' in cookies_file.read_text()
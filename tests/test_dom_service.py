@@ -0,0 +1,1161 @@
+import gc
+import json
+import os
+import random
+import subprocess
+import timeit
+import weakref
+from pathlib import Path
+
+import pytest
+
+from browser_use.browser.views import BrowserState
+from browser_use.dom.budget_processor.service import BudgetProcessor
+from browser_use.dom.clickable_element_processor.service import ClickableElementProcessor
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.history_tree_processor.view import CoordinateSet, ViewportInfo
+from browser_use.dom.service import BUILD_DOM_TREE_JS, CALL_BUILD_DOM_TREE_JS, INSTALL_BUILD_DOM_TREE_JS, DomService
+from browser_use.dom.snapshot_processor.service import SnapshotProcessor
+from browser_use.dom.views import (
+	EMPTY_ATTRIBUTES,
+	DOMBaseNode,
+	DOMBudget,
+	DOMElementNode,
+	DOMSerializationCache,
+	DOMState,
+	DOMTextNode,
+	IncrementalDOMCache,
+)
+
+
+def _element(tag, xpath, children, highlight_index=None, attributes=None):
+	return {
+		'tagName': tag,
+		'xpath': xpath,
+		'attributes': attributes or {},
+		'children': children,
+		'isVisible': True,
+		'isTopElement': True,
+		'isInteractive': highlight_index is not None,
+		'highlightIndex': highlight_index,
+	}
+
+
+def _text(text):
+	return {'type': 'TEXT_NODE', 'text': text, 'isVisible': True}
+
+
+@pytest.mark.asyncio
+async def test_incremental_patch_shares_unchanged_nodes():
+	"""
+	Test that an incremental buildDomTree.js result is patched into the cached tree:
+	unchanged subtrees are shared with the previous tree, changed nodes and their ancestors are new
+	objects and removed nodes disappear from the tree and the selector map.
+	"""
+	cache = IncrementalDOMCache()
+	dom_service = DomService(page=None, incremental_cache=cache)
+
+	# Persistent ids are not in bottom-up order (the parent has the lowest id)
+	full = {
+		'rootId': '0',
+		'token': 'abc',
+		'full': True,
+		'removed': [],
+		'map': {
+			'0': _element('body', '/body', ['1', '3', '4']),
+			'1': _element('button', 'body/button', ['2'], highlight_index=0),
+			'2': _text('Submit'),
+			'3': _element('a', 'body/a', [], highlight_index=1, attributes={'href': '/x'}),
+			'4': _element('p', 'body/p', ['5']),
+			'5': _text('Intro'),
+		},
+	}
+	root, selector_map = await dom_service._construct_dom_tree(full)
+	button = selector_map[0]
+	paragraph = root.children[2]
+	assert [child.tag_name for child in root.children] == ['button', 'a', 'p']
+	assert isinstance(button.children[0], DOMTextNode) and button.children[0].parent is button
+
+	# Nothing changed: the highlighted elements and their ancestors are copied, the rest is shared
+	unchanged = {'rootId': '0', 'token': 'abc', 'unchanged': True, 'map': {}}
+	same_root, same_selector_map = await dom_service._construct_dom_tree(unchanged)
+	assert same_root is not root and same_selector_map[0] is not button
+	assert same_root.children[2] is paragraph
+	assert same_selector_map[0].children[0] is button.children[0]
+	assert same_root.clickable_elements_to_string() == root.clickable_elements_to_string()
+
+	# The link is removed and the button text changes
+	diff = {
+		'rootId': '0',
+		'token': 'abc',
+		'full': False,
+		'removed': ['3'],
+		'map': {
+			'0': _element('body', '/body', ['1', '4']),
+			'2': _text('Send'),
+		},
+	}
+	patched_root, patched_selector_map = await dom_service._construct_dom_tree(diff)
+	assert list(patched_selector_map) == [0]
+	assert [child.tag_name for child in patched_root.children] == ['button', 'p']
+	assert patched_selector_map[0].children[0].text == 'Send'
+	assert patched_root.children[1] is paragraph and paragraph.parent is patched_root
+	assert '3' not in cache.node_map
+	# the first tree is untouched
+	assert [child.tag_name for child in root.children] == ['button', 'a', 'p']
+	assert button.children[0].text == 'Submit'
+
+
+@pytest.mark.asyncio
+async def test_incremental_patch_keeps_earlier_states_intact():
+	"""
+	Test that patching the cached tree does not change the elements of a state that is kept (e.g. in the
+	agent history), so what was recorded for an action still describes the page the action ran on.
+	"""
+	cache = IncrementalDOMCache()
+	dom_service = DomService(page=None, incremental_cache=cache)
+	full = {
+		'rootId': '0',
+		'token': 'abc',
+		'full': True,
+		'removed': [],
+		'map': {
+			'0': _element('body', 'html/body', ['1', '3']),
+			'1': _element('div', 'html/body/div', ['2']),
+			'2': _element('button', 'html/body/div/button', [], highlight_index=0),
+			'3': _element('a', 'html/body/a', [], highlight_index=1),
+		},
+	}
+	root, selector_map = await dom_service._construct_dom_tree(full)
+	old_state = DOMState(element_tree=root, selector_map=selector_map)
+	old_state.selector_map[0].is_new = True
+
+	# the div gets a new child before the button, which moves to another xpath
+	diff = {
+		'rootId': '0',
+		'token': 'abc',
+		'full': False,
+		'removed': [],
+		'map': {
+			'1': _element('div', 'html/body/div', ['4', '2']),
+			'2': _element('button', 'html/body/div/button[2]', [], highlight_index=1),
+			'3': _element('a', 'html/body/a', [], highlight_index=2),
+			'4': _element('button', 'html/body/div/button[1]', [], highlight_index=0),
+		},
+	}
+	new_root, new_selector_map = await dom_service._construct_dom_tree(diff)
+	assert [new_selector_map[index].xpath for index in range(3)] == [
+		'html/body/div/button[1]',
+		'html/body/div/button[2]',
+		'html/body/a',
+	]
+	assert new_selector_map[1].is_new is None
+
+	assert old_state.selector_map[0].xpath == 'html/body/div/button'
+	assert old_state.selector_map[0].is_new is True
+	assert old_state.selector_map[1].xpath == 'html/body/a'
+	assert old_state.selector_map[0].parent.children == [old_state.selector_map[0]]
+	assert [child.tag_name for child in old_state.element_tree.children] == ['div', 'a']
+	assert old_state.element_tree.clickable_elements_to_string() == '*[0]*<button  />\n[1]<a  />'
+
+	# a second patch leaves both earlier states intact
+	await dom_service._construct_dom_tree({'rootId': '0', 'token': 'abc', 'full': False, 'removed': ['4'], 'map': {}})
+	assert new_selector_map[0].xpath == 'html/body/div/button[1]'
+	assert len(new_root.children[0].children) == 2
+	assert old_state.selector_map[0].parent.children == [old_state.selector_map[0]]
+
+
+@pytest.mark.asyncio
+async def test_incremental_patch_resets_on_new_token():
+	"""
+	Test that a result from a different in-page agent (e.g. after navigation) replaces the cached tree.
+	"""
+	cache = IncrementalDOMCache()
+	dom_service = DomService(page=None, incremental_cache=cache)
+
+	await dom_service._construct_dom_tree(
+		{
+			'rootId': '0',
+			'token': 'old',
+			'full': True,
+			'removed': [],
+			'map': {'0': _element('body', '/body', ['1']), '1': _text('a')},
+		}
+	)
+	root, selector_map = await dom_service._construct_dom_tree(
+		{'rootId': '5', 'token': 'new', 'full': True, 'removed': [], 'map': {'5': _element('body', '/body', [])}}
+	)
+	assert isinstance(root, DOMElementNode) and root.children == []
+	assert selector_map == {}
+	assert cache.token == 'new'
+	assert set(cache.node_map) == {'5'}
+
+
+@pytest.mark.asyncio
+async def test_columnar_result_matches_map_result():
+	"""
+	Test that the columnar encoding of buildDomTree.js decodes to the same tree as the per-node map encoding.
+	"""
+	dom_service = DomService(page=None)
+
+	node_map = {
+		'0': _text('Submit'),
+		'1': _element('button', 'body/button', ['0'], highlight_index=0, attributes={'type': 'submit', 'class': 'x'}),
+		'2': {'type': 'TEXT_NODE', 'text': 'Submit', 'isVisible': False},
+		'3': {**_element('div', 'body/div', ['2']), 'shadowRoot': True, 'isTopElement': False},
+		'4': {'tagName': 'body', 'xpath': '/body', 'attributes': {}, 'children': ['1', '3']},
+	}
+	node_map['1']['isInViewport'] = True
+	columnar = json.dumps(
+		{
+			'rootId': 4,
+			'strings': ['Submit', 'button', 'type', 'submit', 'class', 'x', 'div', 'body'],
+			'tags': [-1, 1, -1, 6, 7],
+			'texts': [0, -1, 0, -1, -1],
+			'xpaths': [None, 'body/button', None, 'body/div', '/body'],
+			'parents': [1, 4, 3, 4, -1],
+			'flags': [1, 15, 0, 17, 0],
+			'highlightIndices': [-1, 0, -1, -1, -1],
+			'attributes': [1, 2, 3, 1, 4, 5],
+		}
+	)
+
+	map_root, map_selector_map = await dom_service._construct_dom_tree({'rootId': 4, 'map': node_map})
+	columnar_root, columnar_selector_map = await dom_service._construct_dom_tree({'rootId': 4, 'columnar': columnar})
+
+	assert columnar_root.__json__() == map_root.__json__()
+	assert columnar_selector_map.keys() == map_selector_map.keys()
+	assert columnar_selector_map[0].parent is columnar_root
+	assert columnar_root.clickable_elements_to_string(['type']) == map_root.clickable_elements_to_string(['type'])
+
+
+@pytest.mark.asyncio
+async def test_dom_tree_is_freed_without_cyclic_gc():
+	"""
+	Test that nodes are slotted, share interned tag names / empty attributes and only weakly reference
+	their parent, so a dropped tree is freed by reference counting alone.
+	"""
+	dom_service = DomService(page=None)
+	node_map = {
+		'0': _text('Submit'),
+		'1': _element('button', 'body/button', ['0'], highlight_index=0, attributes={'type': 'submit'}),
+		'2': _element('body', '/body', ['1']),
+	}
+	root, selector_map = await dom_service._construct_dom_tree({'rootId': '2', 'map': node_map})
+	button = selector_map[0]
+
+	assert not hasattr(button, '__dict__') and not hasattr(button.children[0], '__dict__')
+	assert button.parent is root and button.children[0].parent is button
+	assert root.attributes is EMPTY_ATTRIBUTES
+	other_button = DOMElementNode(
+		tag_name=''.join(['but', 'ton']),
+		xpath='',
+		attributes={''.join(['ty', 'pe']): 'reset'},
+		children=[],
+		is_visible=True,
+		parent=None,
+	)
+	assert other_button.tag_name is button.tag_name
+	assert next(iter(other_button.attributes)) is next(iter(button.attributes))
+
+	root_ref, button_ref = weakref.ref(root), weakref.ref(button)
+	gc.disable()
+	try:
+		del root, button, selector_map
+		assert root_ref() is None
+		assert button_ref() is None
+	finally:
+		gc.enable()
+
+
+def _random_tree(node_count: int, seed: int) -> DOMElementNode:
+	rng = random.Random(seed)
+	words = ['Submit', 'Search', ' Next ', 'Home', '', 'Sign in', 'menu']
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	elements = [root]
+	highlight_index = 0
+	for i in range(node_count - 1):
+		parent = elements[rng.randrange(len(elements) // 2, len(elements))]
+		if rng.random() < 0.4:
+			node = DOMTextNode(text=rng.choice(words), is_visible=rng.random() < 0.9, parent=parent)
+		else:
+			attributes = {}
+			for key in rng.sample(['role', 'aria-label', 'placeholder', 'type', 'name'], rng.randint(0, 3)):
+				attributes[key] = rng.choice(words + ['button', 'div'])
+			node = DOMElementNode(
+				tag_name=rng.choice(['div', 'button', 'a', 'span', 'input']),
+				xpath=f'{parent.xpath}/x[{i}]',
+				attributes=attributes,
+				children=[],
+				is_visible=rng.random() < 0.9,
+				is_top_element=rng.random() < 0.8,
+				highlight_index=None,
+				parent=parent,
+			)
+			if rng.random() < 0.3:
+				node.highlight_index = highlight_index
+				node.is_new = rng.random() < 0.2
+				highlight_index += 1
+			elements.append(node)
+		parent.children.append(node)
+	return root
+
+
+def _recursive_clickable_elements_to_string(root: DOMElementNode, include_attributes: list[str] | None = None) -> str:
+	"""The original recursive serializer, kept as the reference output."""
+	formatted_text = []
+
+	def process_node(node: DOMBaseNode, depth: int) -> None:
+		next_depth = int(depth)
+		depth_str = depth * '\t'
+
+		if isinstance(node, DOMElementNode):
+			if node.highlight_index is not None:
+				next_depth += 1
+
+				text = node.get_all_text_till_next_clickable_element()
+				attributes_html_str = ''
+				if include_attributes:
+					attributes_to_include = {
+						key: str(value) for key, value in node.attributes.items() if key in include_attributes
+					}
+					if node.tag_name == attributes_to_include.get('role'):
+						del attributes_to_include['role']
+					if (
+						attributes_to_include.get('aria-label')
+						and attributes_to_include.get('aria-label', '').strip() == text.strip()
+					):
+						del attributes_to_include['aria-label']
+					if (
+						attributes_to_include.get('placeholder')
+						and attributes_to_include.get('placeholder', '').strip() == text.strip()
+					):
+						del attributes_to_include['placeholder']
+					if attributes_to_include:
+						attributes_html_str = ' '.join(f"{key}='{value}'" for key, value in attributes_to_include.items())
+
+				if node.is_new:
+					highlight_indicator = f'*[{node.highlight_index}]*'
+				else:
+					highlight_indicator = f'[{node.highlight_index}]'
+
+				line = f'{depth_str}{highlight_indicator}<{node.tag_name}'
+				if attributes_html_str:
+					line += f' {attributes_html_str}'
+				if text:
+					if not attributes_html_str:
+						line += ' '
+					line += f'>{text}'
+				elif not attributes_html_str:
+					line += ' '
+				line += ' />'
+				formatted_text.append(line)
+
+			for child in node.children:
+				process_node(child, next_depth)
+
+		elif isinstance(node, DOMTextNode):
+			if (
+				not node.has_parent_with_highlight_index()
+				and node.parent
+				and node.parent.is_visible
+				and node.parent.is_top_element
+			):
+				formatted_text.append(f'{depth_str}{node.text}')
+
+	process_node(root, 0)
+	return '\n'.join(formatted_text)
+
+
+def test_clickable_elements_to_string_matches_recursive_serializer():
+	"""
+	Test that the single-pass serializer produces byte-identical output to the recursive one,
+	for whole trees and for subtrees below a highlighted element.
+	"""
+	include_attributes = ['role', 'aria-label', 'placeholder', 'type']
+	for seed in range(20):
+		root = _random_tree(500, seed)
+		assert root.clickable_elements_to_string(include_attributes) == _recursive_clickable_elements_to_string(
+			root, include_attributes
+		)
+		assert root.clickable_elements_to_string() == _recursive_clickable_elements_to_string(root)
+
+		subtree = root.children[-1]
+		if isinstance(subtree, DOMElementNode):
+			assert subtree.clickable_elements_to_string(include_attributes) == _recursive_clickable_elements_to_string(
+				subtree, include_attributes
+			)
+
+
+def test_clickable_elements_to_string_handles_deep_trees():
+	"""
+	Test that trees deeper than the recursion limit can be serialized.
+	"""
+	root = node = DOMElementNode(tag_name='div', xpath='', attributes={}, children=[], is_visible=True, parent=None)
+	for _ in range(5000):
+		child = DOMElementNode(tag_name='div', xpath='', attributes={}, children=[], is_visible=True, parent=node)
+		node.children.append(child)
+		node = child
+	node.children.append(DOMTextNode(text='deep', is_visible=True, parent=node))
+	node.highlight_index = 0
+
+	assert root.clickable_elements_to_string() == '[0]<div >deep />'
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.getenv('BROWSER_USE_BENCHMARKS'), reason='set BROWSER_USE_BENCHMARKS=1 to run benchmarks')
+def test_clickable_elements_to_string_benchmark(record_property):
+	"""
+	Micro-benchmark of the serializer against the recursive reference on synthetic 50k-node trees,
+	the timings are recorded as properties of the test (e.g. in the --junitxml report).
+	"""
+	include_attributes = ['role', 'aria-label', 'placeholder', 'type']
+	for seed in range(3):
+		root = _random_tree(50_000, seed)
+
+		expected = _recursive_clickable_elements_to_string(root, include_attributes)
+		result = root.clickable_elements_to_string(include_attributes)
+		recursive_time = min(
+			timeit.repeat(lambda: _recursive_clickable_elements_to_string(root, include_attributes), number=1, repeat=3)
+		)
+		single_pass_time = min(timeit.repeat(lambda: root.clickable_elements_to_string(include_attributes), number=1, repeat=3))
+		record_property(f'recursive_time_{seed}', recursive_time)
+		record_property(f'single_pass_time_{seed}', single_pass_time)
+
+		assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_branch_path_hashes_are_computed_top_down():
+	"""
+	Test that branch path hashes set during tree construction match the history element hashes,
+	that hand-built trees compute them lazily, and that patched trees refresh them for moved elements.
+	"""
+	cache = IncrementalDOMCache()
+	dom_service = DomService(page=None, incremental_cache=cache)
+	root, selector_map = await dom_service._construct_dom_tree(
+		{
+			'rootId': '0',
+			'token': 'abc',
+			'full': True,
+			'removed': [],
+			'map': {
+				'0': _element('body', '/body', ['1', '3']),
+				'1': _element('div', 'body/div', ['2']),
+				'2': _element('button', 'body/div/button', [], highlight_index=1),
+				'3': _element('a', 'body/a', [], highlight_index=2),
+			},
+		}
+	)
+	button = selector_map[1]
+	assert button._branch_path_hash is not None
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(button)
+	assert HistoryTreeProcessor.compare_history_element_and_dom_element(history_element, button)
+	assert HistoryTreeProcessor.find_history_element_in_tree(history_element, root) is button
+	assert ClickableElementProcessor.get_clickable_elements(root) == [button, selector_map[2]]
+
+	# The button moves from the div to the body, its cached hash must follow
+	old_hash = button.hash
+	new_root, new_selector_map = await dom_service._construct_dom_tree(
+		{
+			'rootId': '0',
+			'token': 'abc',
+			'full': False,
+			'removed': [],
+			'map': {
+				'0': _element('body', '/body', ['1', '3', '2']),
+				'1': _element('div', 'body/div', []),
+			},
+		}
+	)
+	moved_button = new_selector_map[1]
+	assert moved_button.parent is new_root
+	assert moved_button.hash.branch_path_hash != old_hash.branch_path_hash
+	assert moved_button.hash == HistoryTreeProcessor._hash_dom_history_element(
+		HistoryTreeProcessor.convert_dom_element_to_history_element(moved_button)
+	)
+	# the button of the earlier tree keeps its position and hash
+	assert button.parent is root.children[0] and button.hash == old_hash
+
+	hand_built = DOMElementNode(tag_name='body', xpath='', attributes={}, children=[], is_visible=True, parent=None)
+	child = DOMElementNode(tag_name='button', xpath='', attributes={}, children=[], is_visible=True, parent=hand_built)
+	hand_built.children.append(child)
+	assert child.hash.branch_path_hash == moved_button.hash.branch_path_hash
+	assert child.branch_path_hash == HistoryTreeProcessor._extend_branch_path_hash(hand_built.branch_path_hash, 'button')
+
+
+class _DummyPage:
+	"""Page whose documents lose the installed buildDomTree.js on navigation, like a real page."""
+
+	url = 'https://example.com'
+
+	def __init__(self):
+		self.installed = False
+		self.evaluated = []
+
+	async def evaluate(self, expression, arg=None):
+		self.evaluated.append(expression)
+		if expression == '1+1':
+			return 2
+		if expression == INSTALL_BUILD_DOM_TREE_JS:
+			self.installed = True
+			return None
+		assert expression == CALL_BUILD_DOM_TREE_JS
+		if not self.installed:
+			return None
+		return {'rootId': '0', 'map': {'0': _element('body', '/body', [])}}
+
+	def navigate(self):
+		self.installed = False
+
+
+@pytest.mark.asyncio
+async def test_build_dom_tree_is_installed_once_per_document():
+	"""
+	Test that buildDomTree.js is only shipped to the page when the document does not have it installed yet.
+	"""
+	page = _DummyPage()
+
+	await DomService(page).get_clickable_elements()
+	assert page.evaluated.count(INSTALL_BUILD_DOM_TREE_JS) == 1
+
+	await DomService(page).get_clickable_elements()
+	await DomService(page).get_clickable_elements()
+	assert page.evaluated.count(INSTALL_BUILD_DOM_TREE_JS) == 1
+	assert page.evaluated.count(CALL_BUILD_DOM_TREE_JS) == 4
+
+	page.navigate()
+	state = await DomService(page).get_clickable_elements()
+	assert page.evaluated.count(INSTALL_BUILD_DOM_TREE_JS) == 2
+	assert state.element_tree.tag_name == 'body'
+
+
+@pytest.mark.asyncio
+async def test_budget_keeps_elements_by_priority():
+	"""
+	Test that a DOMBudget keeps the elements in the viewport first, then the ones closest to it, that the
+	pruned tree and selector map only contain what was kept and that the cached tree is not pruned.
+	"""
+	cache = IncrementalDOMCache()
+	dom_service = DomService(page=None, incremental_cache=cache)
+	full = {
+		'rootId': '0',
+		'token': 'abc',
+		'full': True,
+		'removed': [],
+		'map': {
+			'0': _element('body', 'html/body', ['1', '8', '10']),
+			'1': _element('div', 'html/body/div', ['2', '4', '6']),
+			'2': _element('a', 'html/body/div/a', ['3'], highlight_index=0, attributes={'href': '/'}),
+			'3': _text('Home'),
+			'4': _element('button', 'html/body/div/button', ['5'], highlight_index=1),
+			'5': _text('Far'),
+			'6': _element('div', 'html/body/div/div', ['7'], highlight_index=2),
+			'7': _text('Card'),
+			'8': _element('p', 'html/body/p', ['9']),
+			'9': _text('Intro'),
+			'10': _element('button', 'html/body/button', ['11'], highlight_index=3),
+			'11': _text('Near'),
+		},
+	}
+	root, selector_map = await dom_service._construct_dom_tree(full)
+	# (x, y) of the elements in a 1000x500 viewport, the buttons are 500 and 100 pixels below it
+	viewport_info = ViewportInfo(scroll_x=0, scroll_y=0, width=1000, height=500)
+	for highlight_index, (x, y) in {0: (0, 0), 1: (0, 1000), 2: (0, 100), 3: (0, 600)}.items():
+		selector_map[highlight_index].viewport_coordinates = CoordinateSet.from_rect(x, y, 100, 20)
+		selector_map[highlight_index].viewport_info = viewport_info
+
+	unbounded_selector_map, report = BudgetProcessor.apply_budget(root, selector_map, DOMBudget())
+	assert not report.is_truncated
+	assert unbounded_selector_map is selector_map
+	assert (report.total_elements, report.total_nodes, report.total_text_chars) == (4, 12, 20)
+
+	kept_selector_map, report = BudgetProcessor.apply_budget(root, dict(selector_map), DOMBudget(max_elements=3))
+	assert report.is_truncated
+	assert (report.kept_elements, report.dropped_elements, report.kept_nodes) == (3, 1, 10)
+	assert sorted(kept_selector_map) == [0, 2, 3]
+	assert root.clickable_elements_to_string() == '[0]<a >Home />\n[2]<div >Card />\nIntro\n[3]<button >Near />'
+
+	# the text in the viewport comes first, elements that do not fit are skipped for smaller ones further away
+	# (get_clickable_elements prunes a copy, the cached tree keeps all of its elements)
+	unchanged = {'rootId': '0', 'token': 'abc', 'unchanged': True, 'map': {}}
+	cached_root, _ = await dom_service._construct_dom_tree(unchanged)
+	root, selector_map = dom_service._copy_tree(cached_root)
+	kept_selector_map, report = BudgetProcessor.apply_budget(root, dict(selector_map), DOMBudget(max_text_chars=16))
+	assert sorted(kept_selector_map) == [0, 1, 2]
+	assert report.kept_text_chars == 16
+	assert 'Intro' in root.clickable_elements_to_string()
+	assert len(cached_root.children[0].children) == 3
+
+
+def test_serialization_cache_serializes_identical_trees_once():
+	"""
+	Test that states with identical trees share one serialization per include_attributes, that anything printed
+	changes the fingerprint and that the least recently used entry is evicted first.
+	"""
+	cache = DOMSerializationCache(max_size=2)
+
+	def state_for(tree):
+		state = DOMState(element_tree=tree, selector_map={})
+		state.serialization_cache = cache
+		return state
+
+	first = state_for(_random_tree(300, seed=3))
+	second = state_for(_random_tree(300, seed=3))
+	assert first.fingerprint == second.fingerprint
+	text = first.clickable_elements_to_string(include_attributes=['type'])
+	assert text == first.element_tree.clickable_elements_to_string(include_attributes=['type'])
+	assert second.clickable_elements_to_string(include_attributes=['type']) is text
+	assert len(cache.entries) == 1
+
+	second.clickable_elements_to_string(include_attributes=['type', 'name'])
+	assert len(cache.entries) == 2
+
+	# marking an element as new changes what is printed
+	changed_tree = _random_tree(300, seed=3)
+	stack = [changed_tree]
+	while stack:
+		node = stack.pop()
+		if node.highlight_index is not None and not node.is_new:
+			node.is_new = True
+			break
+		stack.extend(child for child in node.children if isinstance(child, DOMElementNode))
+	changed = state_for(changed_tree)
+	assert changed.fingerprint != first.fingerprint
+	assert changed.clickable_elements_to_string(include_attributes=['type']) != text
+
+	# the entry of `first` was used least recently
+	assert (first.fingerprint, ('type',)) not in cache.entries
+	assert (first.fingerprint, ('type', 'name')) in cache.entries
+
+
+class _HighlightRectsPage:
+	url = 'https://example.com'
+
+	def __init__(self):
+		self.args = None
+
+	async def evaluate(self, expression, arg=None):
+		if expression == '1+1':
+			return 2
+		self.args = arg
+		result = {
+			'rootId': '2',
+			'map': {
+				'0': _element('button', '/body/button[1]', [], highlight_index=0),
+				'1': _element('button', '/body/button[2]', [], highlight_index=1),
+				'2': _element('body', '/body', ['0', '1']),
+			},
+		}
+		if arg['returnHighlightRects']:
+			# the second button has no client rects
+			result['highlightRects'] = {'0': [10.4, 20, 30, 40.2]}
+			result['viewport'] = {'scrollX': 0, 'scrollY': 150.5, 'width': 1280, 'height': 720}
+		return result
+
+
+@pytest.mark.asyncio
+async def test_highlight_rects_are_returned_for_compositing():
+	"""
+	Test that with return_highlight_rects the viewport boxes of the highlighted elements are set on the
+	selector map, so that highlights can be drawn onto the screenshot without overlays in the page.
+	"""
+	page = _HighlightRectsPage()
+
+	state = await DomService(page).get_clickable_elements(highlight_elements=False, return_highlight_rects=True)
+	assert page.args['doHighlightElements'] is False
+
+	coordinates = state.selector_map[0].viewport_coordinates
+	assert (coordinates.top_left.x, coordinates.top_left.y) == (10, 20)
+	assert (coordinates.bottom_right.x, coordinates.bottom_right.y) == (40, 60)
+	assert (coordinates.center.x, coordinates.center.y) == (25, 40)
+	assert (coordinates.width, coordinates.height) == (30, 40)
+	assert state.selector_map[0].viewport_info.scroll_y == 150
+	assert state.selector_map[0].viewport_info.width == 1280
+	assert state.selector_map[1].viewport_coordinates is None
+
+	state = await DomService(page).get_clickable_elements()
+	assert state.selector_map[0].viewport_coordinates is None
+
+
+@pytest.mark.asyncio
+async def test_budget_is_passed_to_the_walk():
+	"""
+	Test that the node and element limits of a DOMBudget are passed to buildDomTree.js and that a walk it
+	stopped early is reported as truncated, even when everything it returned fits the budget.
+	"""
+
+	class BudgetPage(_HighlightRectsPage):
+		async def evaluate(self, expression, arg=None):
+			result = await super().evaluate(expression, arg)
+			if isinstance(result, dict) and arg['maxElements'] is not None:
+				result['walkStopped'] = True
+			return result
+
+	page = BudgetPage()
+	state = await DomService(page).get_clickable_elements(budget=DOMBudget(max_elements=2, max_nodes=100))
+	assert (page.args['maxElements'], page.args['maxNodes']) == (2, 100)
+	assert sorted(state.selector_map) == [0, 1]
+	assert state.truncation.walk_stopped and state.truncation.is_truncated
+	assert state.truncation.dropped_elements == 0
+
+	state = await DomService(page).get_clickable_elements(budget=DOMBudget(max_text_chars=100))
+	assert (page.args['maxElements'], page.args['maxNodes']) == (None, None)
+	assert not state.truncation.is_truncated
+
+
+def test_composite_highlights_fall_back_to_the_page_without_pillow(monkeypatch):
+	"""
+	Test that without Pillow composite_highlights is turned off once, so highlights are drawn in the page instead.
+	"""
+	from unittest.mock import Mock
+
+	from browser_use.browser import context as context_module
+	from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+	monkeypatch.setattr(context_module, 'can_draw_highlights', lambda: False)
+	context = BrowserContext(browser=Mock(), config=BrowserContextConfig(composite_highlights=True))
+	assert context.composite_highlights is False
+
+	monkeypatch.setattr(context_module, 'can_draw_highlights', lambda: True)
+	assert BrowserContext(browser=Mock(), config=BrowserContextConfig(composite_highlights=True)).composite_highlights
+	assert not BrowserContext(
+		browser=Mock(), config=BrowserContextConfig(highlight_elements=False, composite_highlights=True)
+	).composite_highlights
+
+
+def test_draw_highlights_composites_onto_screenshot():
+	"""
+	Test that highlight boxes are drawn onto the screenshot, scaled to its device pixels.
+	"""
+	image_module = pytest.importorskip('PIL.Image')
+	import io
+
+	from browser_use.browser.utils.highlights import draw_highlights
+
+	screenshot = io.BytesIO()
+	image_module.new('RGB', (200, 100), (255, 255, 255)).save(screenshot, format='PNG')
+
+	element = DOMElementNode(tag_name='button', xpath='/body/button', attributes={}, children=[], is_visible=True, parent=None)
+	element.highlight_index = 0
+	element.viewport_coordinates = CoordinateSet.from_rect(10, 10, 50, 30)
+	element.viewport_info = ViewportInfo(scroll_x=0, scroll_y=0, width=100, height=50)
+
+	composited = image_module.open(io.BytesIO(draw_highlights(screenshot.getvalue(), {0: element}))).convert('RGB')
+	assert composited.size == (200, 100)
+	# border of element 0 is red, at twice the css coordinates
+	assert composited.getpixel((21, 40)) == (255, 0, 0)
+	# outside of the box the screenshot is untouched
+	assert composited.getpixel((5, 5)) == (255, 255, 255)
+	assert composited.getpixel((150, 90)) == (255, 255, 255)
+
+
+class _FrameElement:
+	def __init__(self, xpath, box):
+		self.xpath = xpath
+		self.box = box
+
+	async def evaluate(self, expression):
+		return self.xpath
+
+	async def bounding_box(self):
+		return self.box
+
+
+class _Frame:
+	def __init__(self, url, parent_frame, result, frame_element=None):
+		self.url = url
+		self.parent_frame = parent_frame
+		self.result = result
+		self._frame_element = frame_element
+		self.args = None
+
+	async def evaluate(self, expression, arg=None):
+		if expression == '1+1':
+			return 2
+		if expression == INSTALL_BUILD_DOM_TREE_JS:
+			return None
+		self.args = arg
+		return self.result
+
+	async def frame_element(self):
+		return self._frame_element
+
+
+class _FramesPage(_Frame):
+	def __init__(self, result):
+		super().__init__('https://example.com', None, result)
+		self.main_frame = self
+		self.frames = [self]
+
+	def add_frame(self, url, parent_frame, result, xpath, box=None):
+		frame = _Frame(url, parent_frame, result, _FrameElement(xpath, box or {'x': 0, 'y': 0, 'width': 100, 'height': 100}))
+		self.frames.append(frame)
+		return frame
+
+
+@pytest.mark.asyncio
+async def test_cross_origin_iframes_are_stitched_under_their_iframe():
+	"""
+	Test that cross-origin frames are extracted separately and stitched under their <iframe> nodes, with
+	frame relative xpaths and highlight indices continuing after the ones of the page.
+	"""
+	page = _FramesPage(
+		{
+			'rootId': '4',
+			'map': {
+				'0': _element('button', 'html/body/button', [], highlight_index=0),
+				'1': _element('iframe', 'html/body/iframe[1]', []),
+				'2': _element('html', 'html', []),
+				'3': _element('iframe', 'html/body/iframe[2]', ['2']),
+				'4': _element('body', 'html/body', ['0', '1', '3']),
+			},
+		}
+	)
+	payment_frame = page.add_frame(
+		'https://pay.example.org/form',
+		page,
+		{
+			'rootId': '3',
+			'map': {
+				'0': _element('input', 'html/body/input[1]', [], highlight_index=0),
+				'1': _element('input', 'html/body/input[2]', [], highlight_index=1),
+				'2': _element('iframe', 'html/body/iframe', []),
+				'3': _element('body', 'html/body', ['0', '1', '2']),
+			},
+		},
+		'html/body/iframe[1]',
+	)
+	# same-origin frames are already part of the page's tree
+	same_origin_frame = page.add_frame('https://example.com/widget', page, None, 'html/body/iframe[2]')
+	page.add_frame(
+		'https://captcha.example.net/',
+		payment_frame,
+		{
+			'rootId': '1',
+			'map': {'0': _element('div', 'html/body/div', [], highlight_index=0), '1': _element('body', 'html/body', ['0'])},
+		},
+		'html/body/iframe',
+	)
+
+	state = await DomService(page).get_clickable_elements(include_cross_origin_iframes=True)
+	assert same_origin_frame.args is None
+	assert payment_frame.args['doHighlightElements'] is False
+
+	assert [(index, node.xpath) for index, node in state.selector_map.items()] == [
+		(0, 'html/body/button'),
+		(1, 'html/body/input[1]'),
+		(2, 'html/body/input[2]'),
+		(3, 'html/body/div'),
+	]
+
+	payment_iframe = state.element_tree.children[1]
+	assert [child.tag_name for child in payment_iframe.children] == ['body']
+	assert payment_iframe.children[0].parent is payment_iframe
+	assert state.selector_map[3].parent.parent.tag_name == 'iframe'
+	assert state.selector_map[3].parent.parent.parent is payment_iframe.children[0]
+	assert state.element_tree.children[2].children[0].tag_name == 'html'
+
+	# stitched elements are hashed from their position in the stitched tree
+	assert state.selector_map[1].branch_path_hash == HistoryTreeProcessor._extend_branch_path_hash(
+		payment_iframe.children[0].branch_path_hash, 'input'
+	)
+
+
+def _snapshot_document(tree, strings, box_of):
+	"""Flatten a (name, attributes, children) tree into a DOMSnapshot document, boxes are looked up by name."""
+	nodes = {'parentIndex': [], 'nodeType': [], 'nodeName': [], 'nodeValue': [], 'attributes': []}
+	layout = {'nodeIndex': [], 'styles': [], 'bounds': [], 'paintOrders': []}
+	content_documents = {'index': [], 'value': []}
+
+	def string(value):
+		if value not in strings:
+			strings.append(value)
+		return strings.index(value)
+
+	def add(node, parent_index):
+		index = len(nodes['parentIndex'])
+		name, attributes, children = node if isinstance(node, tuple) else ('#text', {}, [])
+		if 'content_document' in attributes:
+			content_documents['index'].append(index)
+			content_documents['value'].append(attributes.pop('content_document'))
+		nodes['parentIndex'].append(parent_index)
+		nodes['nodeType'].append({'#document': 9, '#document-fragment': 11, '#text': 3}.get(name, 1))
+		nodes['nodeName'].append(string(name.upper() if nodes['nodeType'][-1] == 1 else name))
+		nodes['nodeValue'].append(string(node) if isinstance(node, str) else -1)
+		nodes['attributes'].append([string(part) for item in attributes.items() for part in item])
+		box = box_of(node if isinstance(node, str) else attributes.get('id', name))
+		if box is not None:
+			layout['nodeIndex'].append(index)
+			layout['styles'].append(
+				[string('block'), string('visible'), string(attributes.get('cursor', 'auto')), string('auto')]
+			)
+			layout['bounds'].append(box)
+			layout['paintOrders'].append(len(layout['paintOrders']))
+		for child in children:
+			add(child, index)
+
+	add(('#document', {}, [tree]), -1)
+	nodes['contentDocumentIndex'] = content_documents
+	return {'nodes': nodes, 'layout': layout, 'scrollOffsetX': 0, 'scrollOffsetY': 0}
+
+
+def test_snapshot_engine_builds_tree():
+	"""
+	Test that a DOMSnapshot.captureSnapshot result is turned into the same kind of tree buildDomTree.js returns,
+	including the content of (cross-origin) iframes and shadow roots.
+	"""
+	boxes = {
+		'html': [0, 0, 800, 600],
+		'body': [0, 0, 800, 600],
+		'intro': [0, 0, 800, 50],
+		'Hello': [0, 0, 40, 20],
+		'go': [0, 60, 100, 30],
+		'Go': [0, 60, 20, 20],
+		'hidden-by-overlay': [0, 100, 100, 30],
+		'overlay': [0, 90, 800, 100],
+		'below': [0, 1000, 100, 30],
+		'frame': [0, 300, 400, 200],
+		'frame-input': [10, 10, 100, 20],
+		'host': [0, 200, 100, 30],
+		'shadow-button': [0, 200, 100, 30],
+	}
+	strings = []
+	main = _snapshot_document(
+		(
+			'html',
+			{},
+			[
+				('head', {}, [('script', {}, ['ignored'])]),
+				(
+					'body',
+					{},
+					[
+						('div', {'id': 'intro'}, ['Hello']),
+						('button', {'id': 'go'}, ['Go']),
+						('a', {}, []),
+						('button', {'id': 'hidden-by-overlay'}, []),
+						('div', {'id': 'overlay'}, []),
+						('button', {'id': 'below'}, []),
+						('iframe', {'id': 'frame', 'content_document': 1}, []),
+						('div', {'id': 'host'}, [('#document-fragment', {}, [('button', {'id': 'shadow-button'}, [])])]),
+					],
+				),
+			],
+		),
+		strings,
+		lambda key: boxes.get(key),
+	)
+	frame = _snapshot_document(
+		('html', {}, [('body', {'id': 'frame-body'}, [('input', {'id': 'frame-input'}, [])])]),
+		strings,
+		lambda key: {'html': [0, 0, 400, 200], 'frame-body': [0, 0, 400, 200]}.get(key, boxes.get(key)),
+	)
+	snapshot = {'documents': [main, frame], 'strings': strings}
+
+	root, selector_map = SnapshotProcessor.build_dom_tree(snapshot, 800, 600, viewport_expansion=0)
+
+	assert [element.attributes.get('id') for element in selector_map.values()] == ['go', 'frame-input', 'shadow-button']
+	assert [child.tag_name for child in root.children] == ['div', 'button', 'button', 'div', 'button', 'iframe', 'div']
+	assert selector_map[0].xpath == 'html/body/button[1]'
+	assert selector_map[1].xpath == 'html/body/input' and selector_map[1].parent.parent.parent is root.children[5]
+	assert selector_map[2].xpath == 'button' and selector_map[2].parent.shadow_root
+	assert root.children[2].is_visible and not root.children[2].is_top_element  # covered by the overlay
+	assert root.children[4].is_visible and not root.children[4].is_in_viewport
+	assert root.clickable_elements_to_string() == '\n'.join(['Hello', '[0]<button >Go />', '[1]<input  />', '[2]<button  />'])
+	# boxes of the highlighted elements in viewport coordinates, frame content shifted by the iframe
+	assert (selector_map[0].viewport_coordinates.top_left.y, selector_map[0].viewport_coordinates.height) == (60, 30)
+	assert (selector_map[1].viewport_coordinates.top_left.x, selector_map[1].viewport_coordinates.top_left.y) == (10, 310)
+
+
+@pytest.mark.asyncio
+async def test_history_element_index():
+	"""
+	Test that history elements are found through the per-state index, exactly and with the fuzzy fallback.
+	"""
+	dom_service = DomService(page=None)
+	node_map = {
+		'0': _element('button', 'html/body/div/button', [], highlight_index=0, attributes={'class': 'primary'}),
+		'1': _element('div', 'html/body/div', ['0']),
+		'2': _element('a', 'html/body/a', [], highlight_index=1, attributes={'href': '/x'}),
+		'3': _element('body', '/body', ['1', '2']),
+	}
+	root, selector_map = await dom_service._construct_dom_tree({'rootId': '3', 'map': node_map})
+	state = BrowserState(element_tree=root, selector_map=selector_map, url='', title='', tabs=[])
+	button = HistoryTreeProcessor.convert_dom_element_to_history_element(selector_map[0])
+
+	assert HistoryTreeProcessor.find_history_element_in_state(button, state) is selector_map[0]
+	index = state.element_index
+	assert HistoryTreeProcessor.find_history_element_in_state(button, state) is selector_map[0]
+	assert state.element_index is index  # built once per state
+	assert HistoryTreeProcessor.find_history_element_in_tree(button, root) is selector_map[0]
+
+	# The class of the button changed: only found with the fuzzy fallback (same branch path and xpath)
+	button.attributes = {'class': 'secondary'}
+	assert HistoryTreeProcessor.find_history_element_in_state(button, state) is None
+	assert HistoryTreeProcessor.find_history_element_in_state(button, state, fuzzy=True) is selector_map[0]
+
+	# Nothing but the tag matches
+	button.xpath = 'html/body/form/button'
+	assert HistoryTreeProcessor.find_history_element_in_state(button, state, fuzzy=True) is None
+
+
+# buildDomTree.js before the single-pass traversal, the output of the current script must not differ from it
+REFERENCE_BUILD_DOM_TREE_COMMIT = 'de2e96b'
+
+DOM_PARITY_FIXTURE_HTML = """
+<html><body style="margin: 0">
+	<nav>
+		<a href="/a">First</a><a href="/b">Second</a><a href="/c">Third</a>
+		<ul style="display: none"><li><a href="/hidden">Collapsed menu item</a></li></ul>
+	</nav>
+	<label for="upload"><span class="button">Upload a file</span></label>
+	<input id="upload" type="file" style="display: none">
+	<div id="carousel" style="position: relative; overflow: hidden; width: 400px; height: 100px">
+		<div style="position: absolute; left: -5000px"><button>Offscreen slide</button></div>
+		<div><button>Current slide</button></div>
+	</div>
+	<div id="offscreen-parent" style="position: absolute; top: 5000px; width: 10px; height: 10px">
+		<div style="position: fixed; bottom: 0; left: 0"><button>Accept cookies</button></div>
+		<div style="position: absolute; top: -4900px; left: 20px"><a href="/menu">Dropdown item</a></div>
+		<button>Far below</button>
+	</div>
+	<div id="empty-parent" style="position: absolute; top: 3000px">
+		<div style="position: absolute; top: -2950px; left: 300px"><button>Pulled up</button></div>
+	</div>
+	<div id="host"></div>
+	<form><input type="text" placeholder="Search"><input type="text"><select><option>One</option></select></form>
+	<div style="height: 3000px"></div>
+	<script>
+		document.getElementById('host').attachShadow({ mode: 'open' }).innerHTML = '<button>In shadow</button><p>text</p>';
+	</script>
+</body></html>
+"""
+
+
+def _is_hidden_subtree(node: DOMBaseNode) -> bool:
+	"""Nothing in the subtree is visible and there is no file input (display:none subtrees are pruned in the page)."""
+	if node.is_visible:
+		return False
+	if isinstance(node, DOMTextNode):
+		return True
+	if node.tag_name == 'input' and node.attributes.get('type') == 'file':
+		return False
+	return all(_is_hidden_subtree(child) for child in node.children)
+
+
+def _describe_tree(node: DOMBaseNode):
+	if isinstance(node, DOMTextNode):
+		return ('text', node.text, node.is_visible)
+	return (
+		node.tag_name,
+		node.xpath,
+		node.attributes,
+		node.is_visible,
+		node.is_interactive,
+		node.is_top_element,
+		node.is_in_viewport,
+		node.highlight_index,
+		[_describe_tree(child) for child in node.children if not _is_hidden_subtree(child)],
+	)
+
+
+def _reference_build_dom_tree_js() -> str | None:
+	"""buildDomTree.js before the optimizations, read from the git history."""
+	try:
+		return subprocess.run(
+			['git', 'show', f'{REFERENCE_BUILD_DOM_TREE_COMMIT}:browser_use/dom/buildDomTree.js'],
+			cwd=Path(__file__).parent,
+			capture_output=True,
+			text=True,
+			check=True,
+		).stdout
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+@pytest.mark.parametrize('viewport_expansion', [0, 500, -1])
+async def test_build_dom_tree_matches_reference_output(viewport_expansion):
+	"""
+	Test that buildDomTree.js builds the element tree and selector map of the reference script on a fixture page
+	with hidden file inputs, collapsed menus, offscreen slides, positioned descendants of offscreen parents,
+	shadow DOM and repeated sibling tags. Only the subtrees hidden with display:none are left out.
+	"""
+	from playwright.async_api import async_playwright
+
+	reference_js = _reference_build_dom_tree_js()
+	if reference_js is None:
+		pytest.skip('the reference buildDomTree.js is read from the git history')
+
+	args = {
+		'doHighlightElements': False,
+		'focusHighlightIndex': -1,
+		'viewportExpansion': viewport_expansion,
+		'debugMode': False,
+	}
+	async with async_playwright() as playwright:
+		browser = await playwright.chromium.launch(headless=True)
+		try:
+			page = await browser.new_page(viewport={'width': 1280, 'height': 800})
+			await page.set_content(DOM_PARITY_FIXTURE_HTML)
+			reference = await page.evaluate(reference_js, args)
+			current = await page.evaluate(BUILD_DOM_TREE_JS, args)
+		finally:
+			await browser.close()
+
+	dom_service = DomService(page=None)
+	reference_root, reference_selector_map = await dom_service._construct_dom_tree(reference)
+	root, selector_map = await dom_service._construct_dom_tree(current)
+
+	assert _describe_tree(root) == _describe_tree(reference_root)
+	assert {index: _describe_tree(node) for index, node in selector_map.items()} == {
+		index: _describe_tree(node) for index, node in reference_selector_map.items()
+	}
+	assert root.clickable_elements_to_string() == reference_root.clickable_elements_to_string()
+	# the hidden file input behind the styled label stays in the tree for the file upload actions
+	assert root.get_file_upload_element() is not None
+	assert '/hidden' not in json.dumps(root.__json__())
+	assert '/hidden' in json.dumps(reference_root.__json__())
+
+
+@pytest.mark.asyncio
+async def test_stitched_frames_are_not_kept_by_the_incremental_cache():
+	"""
+	Test that a cross-origin frame stitched into the cached tree by one call is gone from the tree and its
+	string on the next call when the frame disappeared, even though the page itself did not change.
+	"""
+	page = _FramesPage(
+		{
+			'rootId': '2',
+			'token': 'abc',
+			'full': True,
+			'map': {
+				'0': _element('button', 'html/body/button', [], highlight_index=0),
+				'1': _element('iframe', 'html/body/iframe', []),
+				'2': _element('body', 'html/body', ['0', '1']),
+			},
+		}
+	)
+	page.add_frame(
+		'https://pay.example.org/form',
+		page,
+		{
+			'rootId': '1',
+			'map': {'0': _element('input', 'html/body/input', [], highlight_index=0), '1': _element('body', 'html/body', ['0'])},
+		},
+		'html/body/iframe',
+	)
+	dom_service = DomService(page, incremental_cache=IncrementalDOMCache())
+
+	state = await dom_service.get_clickable_elements(include_cross_origin_iframes=True)
+	assert [node.xpath for node in state.selector_map.values()] == ['html/body/button', 'html/body/input']
+
+	# the page is unchanged, the frame was removed
+	page.result = {'rootId': '2', 'token': 'abc', 'unchanged': True, 'map': {}}
+	page.frames = [page]
+	state = await dom_service.get_clickable_elements(include_cross_origin_iframes=True)
+	assert [node.xpath for node in state.selector_map.values()] == ['html/body/button']
+	assert state.element_tree.children[1].children == []
+	assert state.element_tree.clickable_elements_to_string() == '[0]<button  />'
@@ -0,0 +1,90 @@
+import pytest
+
+from browser_use.browser.context import BrowserContextConfig
+from browser_use.browser.utils.resource_blocking import ResourceBlocker
+
+
+class DummyPage:
+	pass
+
+
+class DummyFrame:
+	def __init__(self, page, parent_frame=None):
+		self.page = page
+		self.parent_frame = parent_frame
+
+
+class DummyRequest:
+	def __init__(self, url, resource_type, frame, navigation=False):
+		self.url = url
+		self.resource_type = resource_type
+		self.frame = frame
+		self.navigation = navigation
+
+	def is_navigation_request(self):
+		return self.navigation
+
+
+class DummyRoute:
+	def __init__(self, request):
+		self.request = request
+		self.outcome = None
+
+	async def fallback(self):
+		self.outcome = 'fallback'
+
+	async def fulfill(self, status, content_type, body):
+		self.outcome = f'fulfill:{status}:{content_type}'
+
+	async def abort(self, error_code):
+		self.outcome = f'abort:{error_code}'
+
+
+@pytest.mark.asyncio
+async def test_resource_blocker_blocks_stubs_and_counts_per_page():
+	"""
+	Test that the ResourceBlocker blocks by resource type, domain (with subdomains) and URL pattern, stubs the
+	types it should, never blocks allowed domains or top level navigations, and keeps stats per page.
+	"""
+	config = BrowserContextConfig(
+		resource_blocking={
+			'blocked_resource_types': ['image', 'font'],
+			'blocked_domains': ['doubleclick.net'],
+			'blocked_url_patterns': ['/pixel.gif'],
+			'allowed_domains': ['cdn.example.com'],
+		}
+	)
+	blocker = ResourceBlocker.from_config(config.resource_blocking)
+	page, other_page = DummyPage(), DummyPage()
+	main_frame = DummyFrame(page)
+	iframe = DummyFrame(page, parent_frame=main_frame)
+
+	async def handle(url, resource_type, frame=main_frame, navigation=False):
+		route = DummyRoute(DummyRequest(url, resource_type, frame, navigation))
+		await blocker.handle_route(route)
+		return route.outcome
+
+	assert await handle('https://example.com/', 'document', navigation=True) == 'fallback'
+	assert await handle('https://example.com/logo.png', 'image') == 'fulfill:200:image/gif'
+	assert await handle('https://example.com/font.woff2', 'font') == 'abort:blockedbyclient'
+	assert await handle('https://cdn.example.com/logo.png', 'image') == 'fallback'
+	assert await handle('https://stats.g.doubleclick.net/ads.js', 'script') == 'fulfill:200:application/javascript'
+	assert await handle('https://ad.doubleclick.net/frame', 'document', frame=iframe, navigation=True) == 'abort:blockedbyclient'
+	assert await handle('https://example.com/track/PIXEL.gif?id=1', 'other') == 'abort:blockedbyclient'
+	assert await handle('https://ad.doubleclick.net/', 'document', navigation=True) == 'fallback'
+	assert await handle('data:image/png;base64,AAAA', 'image') == 'fallback'
+	assert await handle('https://example.com/ad.png', 'image', frame=DummyFrame(other_page)) == 'fulfill:200:image/gif'
+
+	stats = blocker.get_stats(page)
+	assert stats.blocked_requests == 5
+	assert stats.reasons == {'resource_type:image': 1, 'resource_type:font': 1, 'domain:doubleclick.net': 2, 'url:/pixel.gif': 1}
+	assert stats.blocked_bytes > 0
+	assert blocker.get_stats(other_page).blocked_requests == 1
+	assert blocker.get_stats(DummyPage()).blocked_requests == 0
+
+	assert (
+		ResourceBlocker.from_config('vision-safe').classify(DummyRequest('https://example.com/a.png', 'image', main_frame))
+		is None
+	)
+	with pytest.raises(ValueError):
+		ResourceBlocker.from_config('unknown-preset')
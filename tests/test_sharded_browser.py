@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserSession
+from browser_use.browser.shards import ShardedBrowser
+
+
+class DummyPlaywrightBrowser:
+	def __init__(self, open_contexts=0):
+		self.contexts = [object() for _ in range(open_contexts)]
+		self.connected = True
+		self.listeners = {}
+
+	def is_connected(self):
+		return self.connected
+
+	def on(self, event, listener):
+		self.listeners.setdefault(event, []).append(listener)
+
+	async def close(self):
+		self.connected = False
+
+
+class DummyPlaywrightContext:
+	async def close(self):
+		raise RuntimeError('Target page, context or browser has been closed')
+
+
+def make_sharded_browser(shards, placement='least_loaded'):
+	sharded_browser = ShardedBrowser(config=BrowserConfig(headless=True), shards=shards, placement=placement)
+	launches = []
+	for shard_index, shard in enumerate(sharded_browser.shards):
+
+		async def get_playwright_browser(shard=shard, shard_index=shard_index):
+			if shard.playwright_browser is None:
+				launches.append(shard_index)
+				await asyncio.sleep(0)  # launching takes a while
+				shard.playwright_browser = DummyPlaywrightBrowser()
+			return shard.playwright_browser
+
+		shard.get_playwright_browser = get_playwright_browser
+	return sharded_browser, launches
+
+
+def test_shards_get_their_own_debugging_port():
+	sharded_browser = ShardedBrowser(config=BrowserConfig(chrome_remote_debugging_port=9300), shards=3)
+	assert [shard.config.chrome_remote_debugging_port for shard in sharded_browser.shards] == [9300, 9301, 9302]
+
+	remote = ShardedBrowser(cdp_urls=['http://a:9222', 'http://b:9222'])
+	assert [shard.config.cdp_url for shard in remote.shards] == ['http://a:9222', 'http://b:9222']
+
+
+@pytest.mark.asyncio
+async def test_contexts_are_placed_on_the_least_loaded_shard():
+	sharded_browser, launches = make_sharded_browser(3)
+	await sharded_browser.start()
+	sharded_browser.shards[0].playwright_browser.contexts = [object(), object()]
+	sharded_browser.shards[1].playwright_browser.contexts = [object()]
+
+	# contexts that did not initialize yet count as load too
+	first = await sharded_browser.new_context()
+	second = await sharded_browser.new_context()
+	third = await sharded_browser.new_context()
+	assert first.browser is sharded_browser.shards[2]
+	assert second.browser is sharded_browser.shards[1]
+	assert third.browser is sharded_browser.shards[2]
+	assert [sharded_browser.get_load(i) for i in range(3)] == [2, 2, 2]
+	assert launches == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_contexts_start_each_shard_once():
+	sharded_browser, launches = make_sharded_browser(3)
+
+	contexts = await asyncio.gather(*(sharded_browser.new_context() for _ in range(6)))
+	assert [sharded_browser.shards.index(context.browser) for context in contexts] == [0, 1, 2, 0, 1, 2]
+	assert sorted(launches) == [0, 1, 2]
+
+	hashed_browser, hashed_launches = make_sharded_browser(2, placement='consistent_hash')
+	await asyncio.gather(*(hashed_browser.new_context(key='user-1') for _ in range(3)))
+	assert hashed_launches == [hashed_browser.get_shard_index('user-1')]
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_placement_and_dead_shard_restart():
+	sharded_browser, launches = make_sharded_browser(4, placement='consistent_hash')
+
+	shard_indexes = {key: sharded_browser.get_shard_index(key) for key in (f'user-{i}' for i in range(200))}
+	assert len(set(shard_indexes.values())) == 4
+	assert all(sharded_browser.get_shard_index(key) == shard_index for key, shard_index in shard_indexes.items())
+	with pytest.raises(ValueError):
+		sharded_browser.get_shard_index()
+
+	context = await sharded_browser.new_context(key='user-1')
+	shard_index = shard_indexes['user-1']
+	assert context.browser is sharded_browser.shards[shard_index]
+
+	# the browser process died: the shard is relaunched before the next context is placed on it
+	context.session = BrowserSession(context=DummyPlaywrightContext())
+	context._page_event_handler = None
+	sharded_browser.shards[shard_index].playwright_browser.connected = False
+	new_context = await sharded_browser.new_context(key='user-1')
+	assert launches == [shard_index, shard_index]
+	assert sharded_browser.shards[shard_index].playwright_browser.is_connected()
+
+	# the context that was open on the dead browser drops its session, the next call creates one on the relaunched browser
+	assert context.session is None and new_context.session is None
+	assert sharded_browser.get_load(shard_index) == 2